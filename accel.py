@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Optional pyarrow-backed fast paths for type inference and numeric parsing.
+
+``infer_type`` and ``numeric_min_max`` classify and parse whole column
+batches with pyarrow.compute kernels (quote/comma/percent stripping, regex
+classification, float cast, min/max). Only values whose meaning is
+unambiguous — plain ASCII numbers and dates — take the vectorized path;
+everything else (Arabic-Indic digits, inf/nan, embedded whitespace, negative
+zero, …) is handed back to the stdlib implementation, so results are
+identical to the pure-Python path.
+
+When pyarrow is not installed ``available()`` is False and build_registry
+uses the stdlib path only. Run this file to check parity over the corpus:
+
+    python accel.py
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optional dependency
+    pa = None
+    pc = None
+
+# Batches smaller than this aren't worth the conversion to Arrow
+MIN_BATCH = 64
+
+_NUMBER = r"^-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$"
+_DATE = r"^(\d{4}/\d{1,2}/\d{1,2}|\d{1,2}/\d{1,2}/\d{4})$"
+# ASCII strings Python's strip()/float() treat specially: control chars
+# (str.strip() removes \x1c-\x1f), whitespace, '+', '_' and inf/nan spellings
+_PYTHON_ONLY = r"[\x00-\x20\x7f+_]|(?i:inf|nan)"
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _split(values: list[str]):
+    """Return (arrow array, mask of values safe for the vectorized path)."""
+    arr = pa.array(values, type=pa.string())
+    safe = pc.and_(
+        pc.string_is_ascii(arr),
+        pc.invert(pc.match_substring_regex(arr, _PYTHON_ONLY)),
+    )
+    return arr, safe
+
+
+def _clean(arr):
+    """Vectorized ``v.strip('"').replace(",", "")``."""
+    return pc.replace_substring(pc.utf8_trim(arr, '"'), ",", "")
+
+
+def infer_type(values: list[str], classify_value, type_from_counts) -> str:
+    """Vectorized ``build_registry.infer_type``.
+
+    `classify_value` / `type_from_counts` are the stdlib helpers, used for
+    the values the vectorized path can't vouch for and for the final rule.
+    """
+    if not values:
+        return "text"
+    arr, safe = _split(values)
+    fast = pc.filter(_clean(arr), safe)
+
+    is_date = pc.match_substring_regex(fast, _DATE)
+    is_pct = pc.ends_with(fast, "%")
+    pct = pc.replace_substring_regex(fast, "%$", "")
+    is_num = pc.and_(pc.invert(is_date), pc.match_substring_regex(pct, _NUMBER))
+    is_float = pc.and_(
+        is_num, pc.or_(is_pct, pc.match_substring(pct, "."))
+    )
+
+    date_count = pc.sum(is_date).as_py() or 0
+    num_count = pc.sum(is_num).as_py() or 0
+    float_count = pc.sum(is_float).as_py() or 0
+    int_count = num_count - float_count
+
+    for v in pc.filter(arr, pc.invert(safe)).to_pylist():
+        kind = classify_value(v)
+        if kind == "date":
+            date_count += 1
+        elif kind == "integer":
+            int_count += 1
+        elif kind == "decimal":
+            float_count += 1
+
+    return type_from_counts(int_count, float_count, date_count, len(values))
+
+
+def numeric_min_max(values: list[str], parse_numeric, numbers: list | None = None):
+    """Vectorized min/max of ``parse_numeric`` over a batch of values.
+
+    Returns (min, max) — (None, None) if nothing parses — or None when the
+    batch has NaN or negative zero, whose min()/max() results depend on
+    order; the caller then falls back to the stdlib path. The parsed values
+    are appended to `numbers`, if given, unless None is returned.
+    """
+    arr, safe = _split(values)
+    cleaned = pc.replace_substring_regex(_clean(arr), "%$", "")
+    fast = pc.and_(safe, pc.match_substring_regex(cleaned, _NUMBER))
+
+    nums = pc.cast(pc.filter(cleaned, fast), pa.float64())
+    lo = hi = None
+    if len(nums):
+        mm = pc.min_max(nums)
+        lo, hi = mm["min"].as_py(), mm["max"].as_py()
+
+    slow = []
+    for n in map(parse_numeric, pc.filter(arr, pc.invert(fast)).to_pylist()):
+        if n is None:
+            continue
+        if math.isnan(n):
+            return None
+        slow.append(n)
+        if lo is None or n < lo:
+            lo = n
+        if hi is None or n > hi:
+            hi = n
+
+    if lo == 0.0 or hi == 0.0:
+        zeros = pc.filter(nums, pc.equal(nums, 0.0)).to_pylist()
+        if any(math.copysign(1.0, z) < 0 for z in zeros):
+            return None
+    if numbers is not None:
+        numbers.extend(nums.to_pylist())
+        numbers.extend(slow)
+    return lo, hi
+
+
+def check_parity() -> dict:
+    """Profile every corpus file with and without the fast path.
+
+    Returns the files and data rows checked, and the paths of the files
+    whose profiles differ ("mismatches").
+    """
+    import build_registry
+
+    files = rows = 0
+    mismatches = []
+    for csv_path in build_registry.discover_csvs():
+        rel_path = csv_path.relative_to(build_registry.BASE_DIR)
+        stdlib = build_registry.profile_file(csv_path, use_accel=False)
+        fast = build_registry.profile_file(csv_path, use_accel=True)
+        files += 1
+        rows += stdlib["file"]["row_count"] if stdlib else 0
+        if stdlib == fast:
+            continue
+        mismatches.append(str(rel_path))
+        print(f"  MISMATCH {rel_path}")
+        for a, b in zip(stdlib["fields"], fast["fields"]):
+            if a != b:
+                diff = {k: (a[k], b[k]) for k in a if a[k] != b[k]}
+                print(f"    column {a['ordinal']} {a['name_ar']}: {diff}")
+    return {"files": files, "rows": rows, "mismatches": mismatches}
+
+
+def main():
+    if not available():
+        print("pyarrow is not installed — nothing to check", file=sys.stderr)
+        sys.exit(1)
+    print("Checking pyarrow fast path against the stdlib profiler...")
+    mismatches = check_parity()["mismatches"]
+    print(f"{len(mismatches)} file(s) differ")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark ejar_crawler against the local ejar_stub.
+
+Starts the stub with a fixed per-call latency (the real API's response time
+is what bounds a crawl), then runs a fresh crawl at each concurrency limit
+and reports calls/s, retries, throttled calls and connections opened. The
+crawler's rate limiter is set out of the way unless ``--stub-rate-limit``
+is given, in which case the stub answers 429 past that many requests/s and
+the crawler's adaptive limiter has to find the rate.
+
+Usage:
+
+    python bench_ejar.py                                 # concurrency 1 4 16 64
+    python bench_ejar.py --concurrency 8 32 --latency-ms 50
+    python bench_ejar.py --stub-rate-limit 100 --rate 20 --json ejar.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import ejar_crawler
+import ejar_stub
+
+
+def start_stub(args) -> tuple[subprocess.Popen, str]:
+    cmd = [
+        sys.executable,
+        str(Path(ejar_stub.__file__)),
+        "--port", "0",
+        "--cities", str(args.cities),
+        "--districts", str(args.districts),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.latency_ms / 4),
+        "--rate-limit", str(args.stub_rate_limit),
+        "--error-rate", str(args.error_rate),
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("Stub serving on "):
+        proc.kill()
+        sys.exit("ejar_stub failed to start")
+    url = line.split()[-1]
+    return proc, url[: url.index(ejar_crawler.API_PATH)]
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark the Ejar crawler.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub response time")
+    parser.add_argument("--cities", type=int, default=3, help="stub cities per region")
+    parser.add_argument("--districts", type=int, default=5, help="stub districts per city")
+    parser.add_argument("--years", type=int, nargs=2, default=[2024, 2025])
+    parser.add_argument("--stub-rate-limit", type=float, default=0.0, help="stub 429s past N req/s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub share of 500s")
+    parser.add_argument("--rate", type=float, help="crawler starting rate (default: unlimited)")
+    parser.add_argument("--max-rate", type=float, default=10_000.0)
+    parser.add_argument("--json", type=Path, help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    proc, base_url = start_stub(args)
+    results = []
+    try:
+        print(
+            f"Stub: {args.latency_ms:g} ms latency, {args.cities} cities x "
+            f"{args.districts} districts per region, years {args.years[0]}-{args.years[1]}"
+        )
+        print(f"  {'conc':>5} {'calls':>7} {'seconds':>8} {'calls/s':>8} "
+              f"{'retries':>8} {'throttled':>9} {'conns':>6} {'rate/s':>7}")
+        for concurrency in args.concurrency:
+            with tempfile.TemporaryDirectory(prefix="bench_ejar_") as tmp:
+                conn = ejar_crawler.open_ejar_db(Path(tmp) / "ejar.db")
+                crawler = ejar_crawler.EjarCrawler(
+                    conn,
+                    base_url=base_url,
+                    concurrency=concurrency,
+                    rate=args.rate or args.max_rate,
+                    max_rate=args.max_rate,
+                    years=tuple(args.years),
+                    usages=(0,),
+                    progress=False,
+                )
+                stats = asyncio.run(crawler.run())
+                conn.close()
+            stats["concurrency"] = concurrency
+            stats["calls_per_second"] = stats["calls"] / stats["wall_seconds"]
+            stats["final_rate"] = crawler.limiter.rate
+            results.append(stats)
+            print(
+                f"  {concurrency:>5} {stats['calls']:>7,} {stats['wall_seconds']:>8.2f} "
+                f"{stats['calls_per_second']:>8.1f} {stats['retries']:>8} "
+                f"{stats['throttled']:>9} {stats['connections']:>6} {crawler.limiter.rate:>7.1f}"
+            )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
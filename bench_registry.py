@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the registry builder.
+
+Generates a synthetic corpus that mimics the real schemas — MOJ common
+6-column files, monthly RE-Operations, REGA sales and rental indicators and
+the MOJ-RE-Index pivot exports — including their quirks (UTF-8 BOM, quoted
+thousands separators, NULL literals, leading spaces, M/D/YYYY dates and runs
+of comma-only blank rows). Then times ``process_file``,
+``build_field_aliases`` and a full ``main()`` against it at each requested
+scale, reporting rows/s, MB/s and peak RSS. The "scan" stage only
+decompresses and line-scans every file — the I/O side of a build.
+
+The "parity" stage is the correctness check: it profiles every file with
+and without the pyarrow fast path (``accel.check_parity``) and the run
+exits non-zero if any profile differs. It is skipped without pyarrow.
+
+With ``--compress`` the corpus is also repacked as .csv.gz, .csv.zst (needs
+zstandard) and/or one .zip per directory, and every stage runs again on
+each copy; MB/s is always CSV megabytes, "disk MB" what the copy occupies.
+
+Each stage runs in its own child process so peak RSS is per stage.
+
+Usage:
+
+    python bench_registry.py                      # scales 1 and 10
+    python bench_registry.py --scale 1 10 100 --jobs 4 --json bench.json
+    python bench_registry.py --scale 10 --jobs 4 --split-mb 8   # chunked files
+    python bench_registry.py --scale 10 --stages scan main --compress gz zst zip
+    python bench_registry.py --scale 1 --stages parity         # pyarrow vs stdlib
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import accel
+import build_registry
+import compressed
+from bytescan import LineScanner
+
+# Data rows per synthetic file at scale 1, roughly the size of a real file
+BASE_ROWS = {
+    "moj_common": 20_000,
+    "operations": 3_000,
+    "sales_indicators": 700,
+    "rental_indicators": 1_500,
+    "index_pivot": 200,
+}
+# build_field_aliases is fast; repeat it so the timing is measurable
+ALIAS_RUNS = 20
+# Comma-only blank rows appended to one rental file at scale 1
+BASE_BLANK_ROWS = 20_000
+
+REGIONS = [
+    "منطقة الرياض",
+    "منطقة مكة المكرمه",
+    "منطقة مكة المكرمة",
+    "المنطقة الشرقية",
+    "منطقة المدينة المنوره",
+    "منطقة القصيم",
+    "منطقة عسير",
+    "منطقة حائل",
+]
+MOJ_REGIONS = [" الرياض", "الرياض", "مكة المكرمة", "الشرقية", "القصيم", "الخدمات الرقمية"]
+CITIES = ["الرياض", "جده", "الدمام", "بريده", "مكة المكرمة", "الخبر", "حائل", "ابها"]
+DISTRICTS = ["الشفا", "النرجس", "الملقا", "الزهرة", "ابن خلدون", "مدينة العمال", "أخرى"]
+PROPERTY_TYPES = ["أرض", "شقة", "دور", "فيلا", "عمارة", "دوبلكس"]
+MONTHS = ["يناير", "فبراير", "مارس", "ابريل", "مايو", "يونيو"]
+
+
+def _quoted(n: int) -> str:
+    return f'"{n:,}"'
+
+
+def _write(path: Path, header: list[str], rows, bom: bool = True) -> int:
+    """Write a CSV with CRLF line endings; returns the number of data rows."""
+    count = 0
+    with open(path, "w", encoding="utf-8-sig" if bom else "utf-8", newline="") as f:
+        f.write(",".join(header) + "\r\n")
+        for row in rows:
+            f.write(",".join(row) + "\r\n")
+            count += 1
+    return count
+
+
+def _moj_common_rows(rng: random.Random, n: int, quarter: int):
+    ref = 27_000_000 + quarter * 1_000_000
+    for i in range(n):
+        month = (quarter - 1) * 3 + rng.randint(1, 3)
+        day = rng.randint(1, 28)
+        # Some exports use M/D/YYYY
+        date = f"2025/{month:02d}/{day:02d}" if i % 7 else f"{month}/{day}/2025"
+        yield [
+            rng.choice(MOJ_REGIONS),
+            rng.choice(CITIES),
+            rng.choice(["القطاع العام", "القطاع الخاص"]),
+            rng.choice(["خدمة إلكترونية", "خدمة إلكترونية جزئيا"]),
+            date,
+            _quoted(ref + i),
+        ]
+
+
+def _operations_rows(rng: random.Random, n: int, month: int):
+    for _ in range(n):
+        day = rng.randint(1, 28)
+        yield [
+            rng.choice(REGIONS),
+            rng.choice(CITIES),
+            rng.choice(["القطاع العام", "القطاع الخاص"]),
+            "خدمة إلكترونية جزئيا",
+            rng.choice(["عقارات/افراغ", "عقارات/تعديل صك", "عقارات/رهن"]),
+            f"{month}/{day}/2024",
+            f"1445/{rng.randint(1, 12):02d}/{day:02d}",
+            str(rng.randint(1, 400)),
+        ]
+
+
+def _sales_indicator_rows(rng: random.Random, n: int, quarter: int):
+    for _ in range(n):
+        deeds = rng.randint(1, 40)
+        area = round(rng.uniform(100, 50_000), 2)
+        value = rng.randint(100_000, 90_000_000)
+        if deeds < 3:
+            prices = ["NULL", "NULL", "NULL"]
+        else:
+            avg = value / area
+            prices = [f"{avg:.6f}", f"{avg * 1.2:.2f}", f"{avg * 0.8:.2f}"]
+        yield [
+            "2025",
+            str(quarter),
+            "الربع الأول ",
+            rng.choice(["الرياض", "الشرقية", "حائل"]),
+            rng.choice(CITIES),
+            rng.choice(DISTRICTS),
+            rng.choice(PROPERTY_TYPES),
+            rng.choice(["سكني", "تجاري"]),
+            str(deeds),
+            str(value),
+            str(area),
+            *prices,
+        ]
+
+
+def _rental_rows(rng: random.Random, n: int):
+    for _ in range(n):
+        yield [
+            str(rng.randint(2019, 2024)),
+            str(rng.randint(1, 4)),
+            "المنطقة الشرقية",
+            rng.choice(CITIES),
+            rng.choice(["شقة - سكني", "استديو - سكني", "فيلا - سكني", "محل - تجاري"]),
+            str(rng.randint(1, 900)),
+            f"{rng.uniform(5_000, 90_000):.5f}",
+        ]
+
+
+def _index_pivot(path: Path, rng: random.Random, n: int) -> int:
+    """Write a MOJ-RE-Index style pivot export (title + metadata rows)."""
+    width = 15
+    lines = [
+        ["المؤشر العقاري لمدينة جدة  في عام 2018 و2019 و2020 و 2021"]
+        + [f"Unnamed: {i}" for i in range(1, width)],
+        [""] * width,
+        ["المدينة", "جده"] + [""] * (width - 2),
+        ["حالة العملية(معتمدة/ملغية/..)", "معتمدة"] + [""] * (width - 2),
+        [""] * width,
+        ["", "", ""] + [str(y) for y in range(2018, 2022) for _ in range(3)],
+        ["الشهر", "تصنيف العقار", "نوع العقار"]
+        + ["السعر بالريال السعودي", "المساحة بالمتر المربع", "عدد الصفقات"] * 4,
+    ]
+    for _ in range(n):
+        row = [rng.choice(MONTHS), rng.choice(["", "سكني", "تجاري"]), rng.choice(PROPERTY_TYPES)]
+        for _ in range(4):
+            if rng.random() < 0.2:
+                row += ["", "", ""]
+            else:
+                row += [_quoted(rng.randint(10**5, 10**9)), f"{rng.uniform(100, 10**6):.4f}", str(rng.randint(1, 900))]
+        lines.append(row)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for row in lines:
+            f.write(",".join(row) + "\n")
+    return n
+
+
+def generate_corpus(root: Path, scale: float, seed: int = 1) -> dict:
+    """Create the synthetic corpus under root. Returns {files, rows, bytes}."""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    moj = root / "MOJ-RealEstate"
+    moj_sales = root / "MOJ-Sales"
+    moj.mkdir(exist_ok=True)
+    moj_sales.mkdir(exist_ok=True)
+
+    def rows(kind: str) -> int:
+        return max(1, int(BASE_ROWS[kind] * scale))
+
+    common_header = ["المنطقة", "المدينة", "نوع القطاع", "نوع الخدمة", "التاريخ ميلادي", "الرقم المرجعي"]
+    total = 0
+    for family in ("Transfers", "Mortgage", "Divide"):
+        for q in (1, 2, 3):
+            total += _write(
+                moj / f"MOJ-{family}-2025-Q{q}.csv",
+                common_header,
+                _moj_common_rows(rng, rows("moj_common"), q),
+            )
+
+    ops_header = ["المنطقة", "المدينة", "نوع القطاع", "نوع الخدمة", "نوع العملية",
+                  "التاريخ ميلادي", "التاريخ هجري", "عدد العمليات"]
+    for m in range(1, 13):
+        total += _write(
+            moj / f"MOJ-RE-Operations-2024-M{m:02d}.csv",
+            ops_header,
+            _operations_rows(rng, rows("operations"), m),
+        )
+
+    sales_header = ["السنة", "الربع", "الربع ", "المنطقة", "المدينة", "الحي", "نوع العقار",
+                    "تصنيف العقار", "عدد الصكوك ", "قيمة الصفقات", "المساحة M2",
+                    "متوسط سعر المتر", "الحد الأعلى لسعر المتر", "الحد الأدنى لسعر المتر "]
+    for region in ("Riyadh", "EP", "Hail"):
+        for q in (1, 2, 3):
+            total += _write(
+                root / f"Sales-transaction-indicators-in-{region}-Q{q}-2025.csv",
+                sales_header,
+                _sales_indicator_rows(rng, rows("sales_indicators"), q),
+            )
+
+    rental_header = ["السنة ", "الربع", "المنطقة ", "المدينة ", "نوع العقار ", "مجموع الصفقات", "المتوسط"]
+    for region in ("Eastern-Province", "Qassim"):
+        total += _write(
+            root / f"Rental-indicators-for-cities-in-{region}.csv",
+            rental_header,
+            _rental_rows(rng, rows("rental_indicators")),
+        )
+    # The open-data export bug: a long run of comma-only rows
+    with open(root / "Rental-indicators-for-cities-in-Eastern-Province.csv", "a", encoding="utf-8") as f:
+        f.write(",,,,,,\r\n" * int(BASE_BLANK_ROWS * scale))
+
+    for level in ("Cities", "Districts"):
+        total += _index_pivot(
+            moj_sales / f"MOJ-RE-Index-{level}-2018-2021.csv", rng, rows("index_pivot")
+        )
+
+    files = list(root.rglob("*.csv"))
+    return {
+        "files": len(files),
+        "rows": total,
+        "bytes": sum(p.stat().st_size for p in files),
+    }
+
+
+def compress_corpus(root: Path, fmt: str) -> Path:
+    """Repack root's CSVs as `fmt` (gz, zst or zip) into a sibling directory."""
+    dest = root.with_name(f"{root.name}-{fmt}")
+    if dest.exists():
+        shutil.rmtree(dest)
+    for csv_path in sorted(root.rglob("*.csv")):
+        rel = csv_path.relative_to(root)
+        (dest / rel.parent).mkdir(parents=True, exist_ok=True)
+        if fmt == "zip":
+            archive = dest / rel.parent / "corpus.zip"
+            with zipfile.ZipFile(archive, "a", zipfile.ZIP_DEFLATED) as zf:
+                zf.write(csv_path, rel.name)
+            continue
+        with open(csv_path, "rb") as src:
+            if fmt == "gz":
+                with gzip.open(dest / f"{rel}.gz", "wb") as out:
+                    shutil.copyfileobj(src, out)
+            else:
+                with open(dest / f"{rel}.zst", "wb") as out:
+                    compressed.zstandard.ZstdCompressor().copy_stream(src, out)
+    return dest
+
+
+def _disk_bytes(root: Path) -> int:
+    return sum(p.stat().st_size for p in root.rglob("*") if p.is_file())
+
+
+def _point_builder_at(root: Path):
+    """Aim build_registry's module-level paths at the synthetic corpus."""
+    build_registry.BASE_DIR = root
+    build_registry.DB_PATH = root / "registry.db"
+
+
+def _stage_process(root: Path, main_args: list[str]) -> dict:
+    """Serial process_file over the corpus into a fresh registry."""
+    conn = sqlite3.connect(str(root / "process.db"))
+    build_registry.create_schema(conn)
+    for csv_path in build_registry.discover_csvs():
+        build_registry.process_file(csv_path, conn)
+    conn.commit()
+    rows = conn.execute("SELECT SUM(row_count) FROM files").fetchone()[0] or 0
+    conn.close()
+    return {"rows": rows}
+
+
+def _stage_scan(root: Path, main_args: list[str]) -> dict:
+    """Decompress and line-scan every CSV without profiling; rows = lines."""
+    rows = 0
+    for csv_path in build_registry.discover_csvs():
+        encoding, _ = build_registry.detect_encoding(csv_path)
+        with compressed.open_buffer(csv_path) as buf:
+            scanner = LineScanner(buf, encoding)
+            header, start = scanner.header()
+            if header is None:
+                continue
+            scanner.track_offsets = False
+            rows += sum(1 for _ in scanner.lines(start))
+    return {"rows": rows}
+
+
+def _stage_main(root: Path, main_args: list[str]) -> dict:
+    build_registry.main(main_args)
+    conn = sqlite3.connect(str(build_registry.DB_PATH))
+    rows = conn.execute("SELECT SUM(row_count) FROM files").fetchone()[0] or 0
+    conn.close()
+    return {"rows": rows}
+
+
+def _stage_aliases(root: Path, main_args: list[str]) -> dict:
+    """build_field_aliases over the registry main() built; rows = fields."""
+    conn = sqlite3.connect(str(build_registry.DB_PATH))
+    for _ in range(ALIAS_RUNS):
+        build_registry.build_field_aliases(conn)
+    conn.commit()
+    fields = conn.execute("SELECT COUNT(*) FROM fields").fetchone()[0]
+    conn.close()
+    return {"rows": fields * ALIAS_RUNS}
+
+
+def _stage_parity(root: Path, main_args: list[str]) -> dict:
+    """Profile every CSV with and without pyarrow; rows = rows profiled."""
+    result = accel.check_parity()
+    return {"rows": result["rows"], "mismatches": result["mismatches"]}
+
+
+STAGES = {
+    "scan": _stage_scan,
+    "process": _stage_process,
+    "main": _stage_main,
+    "aliases": _stage_aliases,
+    "parity": _stage_parity,
+}
+
+
+def _child(stage: str, root: Path, main_args: list[str], conn):
+    _point_builder_at(root)
+    # Keep the builder's own progress output out of the report
+    sys.stdout = open(os.devnull, "w")
+    t0 = time.perf_counter()
+    c0 = time.process_time()
+    result = STAGES[stage](root, main_args)
+    result["wall"] = time.perf_counter() - t0
+    result["cpu"] = time.process_time() - c0
+    # ru_maxrss is KB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024
+    result["peak_rss_mb"] = max(maxrss, children) * scale / 2**20
+    conn.send(result)
+    conn.close()
+
+
+def run_stage(stage: str, root: Path, main_args: list[str]) -> dict:
+    """Run one stage in a fresh process so its peak RSS is its own."""
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_child, args=(stage, root, main_args, child))
+    proc.start()
+    result = parent.recv()
+    proc.join()
+    return result
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark the registry builder.")
+    parser.add_argument("--scale", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--jobs", type=int, default=1, help="--jobs passed to main()")
+    parser.add_argument("--split-mb", type=float, default=0, help="--split-mb passed to main()")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--compress",
+        nargs="+",
+        choices=["gz", "zst", "zip"],
+        default=[],
+        help="also run every stage on the corpus repacked in these formats",
+    )
+    parser.add_argument("--keep", type=Path, help="generate the corpora here and keep them")
+    parser.add_argument("--json", type=Path, help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    # "aliases" needs the registry that "main" builds
+    stages = [s for s in STAGES if s in args.stages]
+    if "aliases" in stages and "main" not in stages:
+        stages.insert(stages.index("aliases"), "main")
+    formats = list(args.compress)
+    if "zst" in formats and not compressed.zstd_available():
+        print("zstandard not installed — skipping zst")
+        formats.remove("zst")
+    if "parity" in stages and not accel.available():
+        print("pyarrow not installed — skipping the parity check")
+        stages.remove("parity")
+
+    main_args = ["--jobs", str(args.jobs), "--split-mb", str(args.split_mb)]
+    workdir = args.keep or Path(tempfile.mkdtemp(prefix="rega-bench-"))
+    results = []
+    mismatches = []
+    print(f"{'scale':>6} {'input':<5} {'stage':<8} {'files':>5} {'rows':>11} {'MB':>8} "
+          f"{'disk MB':>8} {'wall s':>8} {'rows/s':>11} {'MB/s':>7} {'peak MB':>8}")
+    try:
+        for scale in args.scale:
+            root = workdir / f"scale-{scale:g}"
+            if root.exists():
+                shutil.rmtree(root)
+            corpus = generate_corpus(root, scale, seed=args.seed)
+            mb = corpus["bytes"] / 2**20
+            inputs = [("csv", root)] + [(f, compress_corpus(root, f)) for f in formats]
+            for fmt, input_root in inputs:
+                disk_mb = _disk_bytes(input_root) / 2**20
+                for stage in stages:
+                    r = run_stage(stage, input_root, main_args)
+                    row = {"scale": scale, "input": fmt, "stage": stage, **corpus,
+                           "disk_bytes": int(disk_mb * 2**20), **r}
+                    results.append(row)
+                    stage_mb = mb if stage != "aliases" else 0.0
+                    for path in r.get("mismatches", []):
+                        mismatches.append(f"scale {scale:g} {fmt}: {path}")
+                    print(
+                        f"{scale:>6g} {fmt:<5} {stage:<8} {corpus['files']:>5} {r['rows']:>11,} "
+                        f"{stage_mb:>8.1f} {disk_mb:>8.1f} {r['wall']:>8.2f} "
+                        f"{r['rows'] / r['wall']:>11,.0f} {stage_mb / r['wall']:>7.1f} "
+                        f"{r['peak_rss_mb']:>8.1f}"
+                    )
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.json}")
+
+    if mismatches:
+        print("\nPARITY FAILED — pyarrow and stdlib profiles differ:", file=sys.stderr)
+        for line in mismatches:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Load test for registry_server.
+
+Fires a mix of catalog and aggregation requests at the server from
+`--concurrency` client threads and reports latency percentiles (p50, p90,
+p99, max), throughput and status counts. The request mix is derived from
+the served registry itself: file listings and details, canonical-field and
+enum lookups, region coverage and fact-table aggregations.
+
+Without ``--url`` a server is started on a free port for the run (its
+``--workers`` / ``--cache-mb`` can be set here). ``--revalidate`` makes the
+clients send If-None-Match with the ETags they have seen, as a browser or
+caching client would.
+
+Usage:
+
+    python bench_server.py --concurrency 32 --requests 5000
+    python bench_server.py --url http://127.0.0.1:8765 --revalidate
+    python bench_server.py --cache-mb 0 --json nocache.json
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import registry_server
+
+# Aggregations over the MOJ/REGA fact tables the mix draws from
+AGGREGATIONS = [
+    {"category": "operations", "group_by": "region,period", "measure": "operation_count"},
+    {"category": "sales_indicators", "group_by": "region,period", "measure": "deed_count"},
+    {"category": "sales_indicators", "group_by": "city", "measure": "total_price"},
+    {"category": "rental_indicators", "group_by": "region,period"},
+    {"category": "consolidated", "group_by": "period", "measure": "deed_count"},
+    {"category": "mortgage", "group_by": "region,period"},
+    {"category": "transfer", "group_by": "city"},
+]
+
+
+def _get(host: str, port: int, path: str, etag: str | None = None):
+    """Return (status, etag, body) for one GET on a fresh connection."""
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    try:
+        headers = {"If-None-Match": etag} if etag else {}
+        conn.request("GET", path, headers=headers)
+        resp = conn.getresponse()
+        return resp.status, resp.getheader("ETag"), resp.read()
+    finally:
+        conn.close()
+
+
+def request_mix(host: str, port: int, seed: int) -> list[str]:
+    """Build the list of request paths from what the server has."""
+    rng = random.Random(seed)
+    _, _, body = _get(host, port, "/files")
+    files = json.loads(body)
+    paths = ["/health", "/files"]
+    categories = sorted({f["category"] for f in files})
+    regions = sorted({r for f in files for r in f["region_coverage"] or []})
+    paths += [f"/files?{urlencode({'category': c})}" for c in categories]
+    paths += [f"/files/{f['file_id']}" for f in rng.sample(files, min(20, len(files)))]
+    for canonical in ("region", "city", "deed_count", "total_price", "property_type"):
+        paths.append(f"/fields?{urlencode({'canonical': canonical})}")
+    for field in ("region", "property_type", "sector_type", "service_type"):
+        paths.append(f"/enums?{urlencode({'field': field})}")
+        for category in rng.sample(categories, min(3, len(categories))):
+            paths.append(f"/enums?{urlencode({'field': field, 'category': category})}")
+    for region in regions:
+        paths.append(f"/coverage?{urlencode({'region': region})}")
+        paths.append(
+            f"/coverage?{urlencode({'region': region, 'from': '2025/01/01', 'to': '2025/06/30'})}"
+        )
+    for params in AGGREGATIONS:
+        paths.append(f"/aggregate?{urlencode(params)}")
+        for region in rng.sample(regions, min(3, len(regions))):
+            paths.append(f"/aggregate?{urlencode({**params, 'region': region})}")
+    return paths
+
+
+def run_load(
+    host: str,
+    port: int,
+    paths: list[str],
+    concurrency: int,
+    requests: int,
+    revalidate: bool = False,
+    seed: int = 1,
+) -> dict:
+    """Issue `requests` GETs from `concurrency` threads; return the stats."""
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def client(idx: int):
+        rng = random.Random(seed * 1000 + idx)
+        etags: dict[str, str] = {}
+        local_lat = []
+        local_status: Counter = Counter()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    break
+            path = rng.choice(paths)
+            t0 = time.perf_counter()
+            try:
+                status, etag, _ = _get(host, port, path, etags.get(path) if revalidate else None)
+            except OSError as e:
+                local_status[type(e).__name__] += 1
+                continue
+            local_lat.append(time.perf_counter() - t0)
+            local_status[status] += 1
+            if etag:
+                etags[path] = etag
+        with lock:
+            latencies.extend(local_lat)
+            statuses.update(local_status)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    result = {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(latencies) / wall, 1) if wall else None,
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+    }
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        for name, q in (("p50", 50), ("p90", 90), ("p99", 99)):
+            result[f"{name}_ms"] = round(cuts[q - 1] * 1000, 2)
+        result["max_ms"] = round(max(latencies) * 1000, 2)
+    return result
+
+
+def start_server(workers: int, cache_mb: float) -> tuple[subprocess.Popen, int]:
+    """Start registry_server on a free port; return (process, port)."""
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            str(Path(registry_server.__file__)),
+            "--port", "0",
+            "--workers", str(workers),
+            "--cache-mb", str(cache_mb),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = proc.stdout.readline()
+    if not line.startswith("Serving"):
+        proc.kill()
+        sys.exit("registry_server failed to start")
+    port = int(line.split("http://", 1)[1].split("/", 1)[0].rsplit(":", 1)[1])
+    return proc, port
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Load-test the registry HTTP server.")
+    parser.add_argument("--url", help="server to test (default: start one for the run)")
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads")
+    parser.add_argument("--requests", type=int, default=2000, help="total requests")
+    parser.add_argument("--warmup", type=int, default=0, help="untimed requests sent first")
+    parser.add_argument("--revalidate", action="store_true", help="send If-None-Match")
+    parser.add_argument("--workers", type=int, default=registry_server.DEFAULT_WORKERS)
+    parser.add_argument("--cache-mb", type=float, default=registry_server.DEFAULT_CACHE_MB)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        proc, port = start_server(args.workers, args.cache_mb)
+        host = registry_server.DEFAULT_HOST
+    try:
+        paths = request_mix(host, port, args.seed)
+        print(f"Load test: {len(paths)} distinct requests, concurrency {args.concurrency}")
+        if args.warmup:
+            run_load(host, port, paths, args.concurrency, args.warmup, seed=args.seed + 1)
+        result = run_load(
+            host, port, paths, args.concurrency, args.requests, args.revalidate, args.seed
+        )
+        _, _, body = _get(host, port, "/stats")
+        result["server"] = json.loads(body)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    print(
+        f"  {result['requests']:,} requests in {result['wall_seconds']:.2f}s"
+        f"  ({result['requests_per_second']:,} req/s)"
+    )
+    if "p50_ms" in result:
+        print(
+            f"  latency p50 {result['p50_ms']:.2f} ms  p90 {result['p90_ms']:.2f} ms"
+            f"  p99 {result['p99_ms']:.2f} ms  max {result['max_ms']:.2f} ms"
+        )
+    print(f"  statuses: {result['statuses']}")
+    print(f"  server: {result['server']['requests']}")
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
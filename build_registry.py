@@ -2,22 +2,43 @@
 """
 REGA/MOJ Data Registry Builder
 
-Scans all CSVs in ~/rega-data/, introspects their structure, and builds
-a self-describing SQLite registry database at ~/rega-data/registry.db.
+Scans all CSVs in ~/rega-data/ (plain, or compressed as .csv.gz, .csv.zst
+or inside .zip archives — see compressed.py), introspects their structure,
+and builds a self-describing SQLite registry database at
+~/rega-data/registry.db.
 
 No external dependencies — stdlib only.
 """
 
 from __future__ import annotations
 
+import argparse
 import csv
+import functools
+import hashlib
 import json
+import math
+import mmap
+import multiprocessing
 import os
 import re
 import sqlite3
+import sys
+import time
+import traceback
 from collections import Counter
 from pathlib import Path
 
+import accel
+import compressed
+import geography
+import hijri
+from bytescan import LineScanner, record_boundaries
+from compressed import detect_encoding
+from dedup import REPEATED_ROWS_SQL, duplicate_row_count, find_duplicates
+from instrument import StageTimer, file_hooks
+from sketches import KLL, HyperLogLog, MisraGries
+
 BASE_DIR = Path(__file__).parent.resolve()
 DB_PATH = BASE_DIR / "registry.db"
 
@@ -29,6 +50,29 @@ ENUM_THRESHOLD = 50
 SAMPLE_VALUES_COUNT = 5
 # Raw sample rows per file
 RAW_SAMPLE_COUNT = 10
+# Leading values/rows scanned for formatting quirks
+FORMAT_CHECK_ROWS = 200
+# Data rows buffered per column-wise accumulator update
+BATCH_ROWS = 5000
+# Files inserted per write transaction
+WRITE_BATCH_FILES = 16
+# HyperLogLog precision (2**p registers, ~1.04/sqrt(2**p) relative error)
+HLL_PRECISION = 14
+# Misra-Gries counters per column in sketch mode (exact below this many values)
+HEAVY_HITTERS_K = 2 * ENUM_THRESHOLD
+# KLL accuracy parameter for numeric columns (~1.7/k rank error, ~3k values kept)
+QUANTILE_K = 200
+# Percentiles stored per numeric column (field_quantiles.p1 … p99)
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+# Bytes hashed per sampled block when fingerprinting a file
+FINGERPRINT_BLOCK = 64 * 1024
+# Leading rows read to fix column types before a file is split into chunks
+SPLIT_PRESCAN_ROWS = 20 * SAMPLE_ROWS
+# Values checked against a known layout's column type before adopting it
+VALIDATE_ROWS = 100
+
+_DATE_YMD = re.compile(r"^(\d{4})/(\d{1,2})/(\d{1,2})$")
+_DATE_MDY = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
 
 # ── File classification rules ────────────────────────────────────────
 
@@ -65,6 +109,7 @@ CLASSIFICATION_RULES = [
     (r"Rental-indicators-.*\.csv", "REGA", "rental_indicators"),
     (r"quarter-report-SI\.csv", "REGA", "consolidated"),
     (r"Registered-Real-Estate-.*\.csv", "REGA", "gender_stats"),
+    (r"Ejar-Rental-Details\.csv", "REGA", "ejar_rental"),
 ]
 
 # ── Arabic → canonical English mapping ───────────────────────────────
@@ -76,6 +121,7 @@ ARABIC_TO_CANONICAL = {
     "الحي": "district",
     "الرقم المرجعي للصفقة": "transaction_ref",
     "الرقم المرجعي": "reference_number",
+    "الرقم المرجعي للوكالة": "poa_reference_number",
     "تاريخ الصفقة ميلادي": "date_gregorian",
     "تاريخ الصفقة هجري": "date_hijri",
     "التاريخ ميلادي": "date_gregorian",
@@ -96,8 +142,10 @@ ARABIC_TO_CANONICAL = {
     "السنة": "year",
     "الربع": "quarter",
     "ربع السنة": "quarter",
+    "رقم الربع": "quarter_id",
     "عدد الصكوك": "deed_count",
     "قيمة الصفقات": "transaction_value",
+    "مجموع سعر العقار": "total_price",
     "متوسط سعر المتر": "avg_price_per_m2",
     "الحد الأعلى لسعر المتر": "max_price_per_m2",
     "الحد الأدنى لسعر المتر": "min_price_per_m2",
@@ -118,12 +166,46 @@ ARABIC_TO_CANONICAL = {
     "deed_counts": "deed_count",
     "RealEstatePrice_SUM": "total_price",
     "Meter_Price_W_Avg_IQR": "weighted_avg_price_per_m2",
+    # English headers from the Eastern Province rental file
+    "year": "year",
+    "quarter": "quarter",
+    "Category": "property_type",
+    "total_deals": "total_transactions",
+    "average": "average",
+    # English headers from the Ejar crawler export (ejar_crawler.py)
+    "region_id": "region_id",
+    "city_id": "city_id",
+    "district_id": "district_id",
+    "rental_unit_usage": "rental_unit_usage",
+    "unit_name": "unit_type",
+    "sum_deals": "total_transactions",
+    "sum_rent": "total_rent",
+    "avg_rent": "average",
+    "avg_min_range_1": "avg_min_range_1",
+    "avg_max_range_1": "avg_max_range_1",
+    "avg_min_range_2": "avg_min_range_2",
+    "avg_max_range_2": "avg_max_range_2",
+    "avg_min_range_3": "avg_min_range_3",
+    "avg_max_range_3": "avg_max_range_3",
+    "total_deals_range_1": "total_deals_range_1",
+    "total_deals_range_2": "total_deals_range_2",
+    "total_deals_range_3": "total_deals_range_3",
+    "total_rent_sum_range_1": "total_rent_sum_range_1",
+    "total_rent_sum_range_2": "total_rent_sum_range_2",
+    "total_rent_sum_range_3": "total_rent_sum_range_3",
+    "change_percent": "change_percent",
     # Gender stats
     "Gender": "gender",
     "RENs": "registered_count",
     "Created Date": "created_date",
 }
 
+# Hijri date columns and the Gregorian column each one restates
+HIJRI_DATE_PAIRS = {
+    "date_hijri": "date_gregorian",
+    "decision_date_hijri": "decision_date_gregorian",
+}
+
 
 def classify_file(filename: str) -> tuple[str, str]:
     """Return (source, category) for a CSV filename."""
@@ -133,13 +215,40 @@ def classify_file(filename: str) -> tuple[str, str]:
     return "UNKNOWN", "unknown"
 
 
-def detect_encoding(filepath: Path) -> tuple[str, bool]:
-    """Check for UTF-8 BOM. Returns (encoding, has_bom)."""
+def file_fingerprint(filepath: Path) -> str:
+    """Hash the file size and mtime plus its header, middle and tail blocks.
+
+    Identifies a file version for data.db's loads (fact_store.py), so it
+    changes whenever an incremental build re-profiles the file (see
+    ``plan_incremental``). Compressed files are hashed as stored; a zip
+    member by its name, CRC and size.
+    """
+    if compressed.archive_member(filepath):
+        info = compressed.zip_info(filepath)
+        key = f"{info.filename}:{info.CRC}:{info.file_size}"
+        return hashlib.sha256(key.encode()).hexdigest()
+    stat = filepath.stat()
+    size = stat.st_size
+    h = hashlib.sha256(f"{size}:{stat.st_mtime}".encode())
     with open(filepath, "rb") as f:
-        head = f.read(3)
-    if head == b"\xef\xbb\xbf":
-        return "utf-8-sig", True
-    return "utf-8", False
+        h.update(f.read(FINGERPRINT_BLOCK))
+        if size > 2 * FINGERPRINT_BLOCK:
+            f.seek(size // 2)
+            h.update(f.read(FINGERPRINT_BLOCK))
+        if size > FINGERPRINT_BLOCK:
+            f.seek(max(FINGERPRINT_BLOCK, size - FINGERPRINT_BLOCK))
+            h.update(f.read(FINGERPRINT_BLOCK))
+    return h.hexdigest()
+
+
+def header_fingerprint(headers: list[str]) -> str:
+    """Hash a file's cleaned header row into its layout key.
+
+    Headers are folded like place names (geography.fold_arabic), so exports
+    that differ only in hamza forms, ta marbuta or spacing share a layout.
+    """
+    key = "\x1f".join(geography.fold_arabic(h) for h in headers)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
 
 
 def clean_value(val: str) -> str:
@@ -169,46 +278,30 @@ def parse_numeric(val: str) -> float | None:
         return None
 
 
-def infer_type(values: list[str]) -> str:
-    """Infer data type from a sample of non-null string values.
-
-    Returns one of: 'integer', 'decimal', 'date', 'text'
-    """
-    if not values:
-        return "text"
-
-    date_patterns = [
-        re.compile(r"^\d{4}/\d{1,2}/\d{1,2}$"),  # YYYY/MM/DD
-        re.compile(r"^\d{1,2}/\d{1,2}/\d{4}$"),  # M/D/YYYY
-    ]
-
-    int_count = 0
-    float_count = 0
-    date_count = 0
-    total = len(values)
+def classify_value(v: str) -> str | None:
+    """Classify one value as 'date', 'integer' or 'decimal' (None = text)."""
+    stripped = v.strip().strip('"').replace(",", "")
 
-    for v in values:
-        stripped = v.strip().strip('"').replace(",", "")
+    # Check date
+    if _DATE_YMD.match(stripped) or _DATE_MDY.match(stripped):
+        return "date"
 
-        # Check date
-        if any(p.match(stripped) for p in date_patterns):
-            date_count += 1
-            continue
+    # Check percentage
+    pct = stripped
+    if pct.endswith("%"):
+        pct = pct[:-1]
 
-        # Check percentage
-        pct = stripped
-        if pct.endswith("%"):
-            pct = pct[:-1]
+    try:
+        float(pct)
+    except ValueError:
+        return None
+    if "." in pct or stripped.endswith("%"):
+        return "decimal"
+    return "integer"
 
-        try:
-            f = float(pct)
-            if "." in pct or stripped.endswith("%"):
-                float_count += 1
-            else:
-                int_count += 1
-        except ValueError:
-            pass
 
+def type_from_counts(int_count: int, float_count: int, date_count: int, total: int) -> str:
+    """Pick a column type from per-value classification counts (80% rule)."""
     threshold = 0.8 * total
     if date_count >= threshold:
         return "date"
@@ -219,21 +312,39 @@ def infer_type(values: list[str]) -> str:
     return "text"
 
 
+def infer_type(values: list[str]) -> str:
+    """Infer data type from a sample of non-null string values.
+
+    Returns one of: 'integer', 'decimal', 'date', 'text'
+    """
+    if not values:
+        return "text"
+
+    counts = Counter(map(classify_value, values))
+    return type_from_counts(
+        counts["integer"], counts["decimal"], counts["date"], len(values)
+    )
+
+
+def normalize_date(val: str) -> str | None:
+    """Normalize a YYYY/MM/DD or M/D/YYYY string to zero-padded YYYY/MM/DD."""
+    m = _DATE_YMD.match(val)
+    if m:
+        return f"{m.group(1)}/{int(m.group(2)):02d}/{int(m.group(3)):02d}"
+    m = _DATE_MDY.match(val)
+    if m:
+        return f"{m.group(3)}/{int(m.group(1)):02d}/{int(m.group(2)):02d}"
+    return None
+
+
 def extract_date_range(values: list[str]) -> tuple[str | None, str | None]:
     """Extract min/max date strings from a list of date-like values."""
     dates = []
     for v in values:
         v = v.strip().strip('"')
         # Normalize to YYYY/MM/DD for sorting
-        m = re.match(r"^(\d{4})/(\d{1,2})/(\d{1,2})$", v)
-        if m:
-            dates.append(
-                (v, f"{m.group(1)}/{int(m.group(2)):02d}/{int(m.group(3)):02d}")
-            )
-            continue
-        m = re.match(r"^(\d{1,2})/(\d{1,2})/(\d{4})$", v)
-        if m:
-            norm = f"{m.group(3)}/{int(m.group(1)):02d}/{int(m.group(2)):02d}"
+        norm = normalize_date(v)
+        if norm:
             dates.append((v, norm))
 
     if not dates:
@@ -265,15 +376,138 @@ def get_date_column_idx(headers: list[str]) -> int | None:
     return None
 
 
+def get_coverage_columns(headers: list[str]) -> dict[str, int]:
+    """Column index of each coverage cell part the file has: region, city,
+    Gregorian date, year and quarter (first column of each wins), plus the
+    Hijri column restating that date, which rides along in the same cells
+    so each distinct Hijri/Gregorian pair is checked once."""
+    date_idx = get_date_column_idx(headers)
+    parts = {
+        "region": get_region_column_idx(headers),
+        "city": None,
+        "date": date_idx,
+        "year": None,
+        "quarter": None,
+        "hijri": None,
+    }
+    for i, h in enumerate(headers):
+        canonical = ARABIC_TO_CANONICAL.get(clean_header(h))
+        if canonical == "quarter_number":
+            canonical = "quarter"
+        if canonical in ("city", "year", "quarter") and parts[canonical] is None:
+            parts[canonical] = i
+        elif (
+            canonical in HIJRI_DATE_PAIRS
+            and date_idx is not None
+            and ARABIC_TO_CANONICAL.get(clean_header(headers[date_idx]))
+            == HIJRI_DATE_PAIRS[canonical]
+        ):
+            parts["hijri"] = i
+    return {part: i for part, i in parts.items() if i is not None}
+
+
+_QUARTER_NAMES = {"الاول": 1, "الأول": 1, "الثاني": 2, "الثالث": 3, "الرابع": 4}
+
+
+def quarter_number(val: str) -> int | None:
+    """1–4 from "3", "3.0", "Q3" or "الربع الثالث"."""
+    m = re.search(r"[1-4]", val)
+    if m:
+        return int(m.group())
+    for word in val.split():
+        if word in _QUARTER_NAMES:
+            return _QUARTER_NAMES[word]
+    return None
+
+
+def period_months(
+    date: str | None, year: str | None, quarter: str | None
+) -> tuple[str | None, str | None]:
+    """First and last "YYYY-MM" month a row's period spans (None, None if
+    undated): its date's month, else its year's quarter, else its year."""
+    if date:
+        norm = normalize_date(date.strip('"'))
+        if norm:
+            month = norm[:7].replace("/", "-")
+            return month, month
+    if not year:
+        return None, None
+    try:
+        y = int(float(year.strip('"')))
+    except ValueError:
+        return None, None
+    q = quarter_number(quarter) if quarter else None
+    if q is None:
+        return f"{y:04d}-01", f"{y:04d}-12"
+    return f"{y:04d}-{3 * q - 2:02d}", f"{y:04d}-{3 * q:02d}"
+
+
+def coverage_cells(parts: list[str], cells: Counter) -> list[tuple]:
+    """Resolve raw cell counts into (region_id, city_key, first_month,
+    last_month, row_count) rows: regions to geography IDs, cities to their
+    spelling-insensitive key, periods to months."""
+    resolved: Counter = Counter()
+    for raw, n in cells.items():
+        cell = dict(zip(parts, (None if v.upper() == "NULL" else v for v in raw)))
+        city = cell.get("city")
+        first, last = period_months(cell.get("date"), cell.get("year"), cell.get("quarter"))
+        resolved[
+            geography.region_id(cell.get("region")),
+            geography.normalize_name(city) if city else None,
+            first,
+            last,
+        ] += n
+    return [(*key, n) for key, n in resolved.items()]
+
+
+def check_hijri_dates(parts: dict[str, int], cells: Counter) -> dict | None:
+    """Cross-check a file's Hijri dates against the Gregorian ones they
+    restate, once per distinct pair of the raw cell counts.
+
+    Returns the two columns' ordinals and the rows checked, mismatched (both
+    dates valid but on different days) and unconverted (the Hijri date does
+    not parse or is outside ``hijri.UMM_AL_QURA``), plus the first mismatch
+    seen; None if the file has no such pair of columns.
+    """
+    if "hijri" not in parts:
+        return None
+    names = list(parts)
+    at_h, at_g = names.index("hijri"), names.index("date")
+    result = {
+        "hijri_ordinal": parts["hijri"],
+        "gregorian_ordinal": parts["date"],
+        "checked_rows": 0,
+        "mismatched_rows": 0,
+        "unconverted_rows": 0,
+        "first_mismatch": None,
+    }
+    for raw, n in cells.items():
+        h, g = raw[at_h], raw[at_g]
+        if not h or not g or "NULL" in (h.upper(), g.upper()):
+            continue
+        gregorian = normalize_date(g.strip('"'))
+        if gregorian is None:
+            continue
+        result["checked_rows"] += n
+        converted = hijri.hijri_to_iso(h)
+        if converted is None:
+            result["unconverted_rows"] += n
+        elif converted != gregorian.replace("/", "-"):
+            result["mismatched_rows"] += n
+            if result["first_mismatch"] is None:
+                result["first_mismatch"] = f"{h} = {converted}, not {g}"
+    return result
+
+
 def discover_csvs() -> list[Path]:
-    """Find all CSV files under BASE_DIR."""
+    """Find all CSV files under BASE_DIR, compressed ones and zip members
+    included (see ``compressed.csv_sources``)."""
     csvs = []
     for root, dirs, files in os.walk(BASE_DIR):
         # Skip hidden dirs and charts
         dirs[:] = [d for d in dirs if not d.startswith(".") and d != "charts"]
         for f in files:
-            if f.lower().endswith(".csv"):
-                csvs.append(Path(root) / f)
+            csvs.extend(compressed.csv_sources(Path(root) / f))
     csvs.sort(key=lambda p: p.name)
     return csvs
 
@@ -294,8 +528,40 @@ def create_schema(conn: sqlite3.Connection):
             has_bom INTEGER,
             date_range_start TEXT,
             date_range_end TEXT,
-            region_coverage TEXT,
-            notes TEXT
+            notes TEXT,
+            file_mtime REAL,
+            fingerprint TEXT,
+            data_offset INTEGER,
+            data_end INTEGER,
+            blank_rows INTEGER,
+            layout TEXT,
+            compression TEXT,
+            compressed_size INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS file_regions (
+            file_id INTEGER NOT NULL REFERENCES files(id),
+            region_id INTEGER NOT NULL REFERENCES geo_regions(id),
+            PRIMARY KEY (file_id, region_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS file_coverage (
+            file_id INTEGER NOT NULL REFERENCES files(id),
+            region_id INTEGER REFERENCES geo_regions(id),
+            city_key TEXT,
+            first_month TEXT,
+            last_month TEXT,
+            row_count INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS date_checks (
+            file_id INTEGER NOT NULL REFERENCES files(id),
+            hijri_ordinal INTEGER NOT NULL,
+            gregorian_ordinal INTEGER NOT NULL,
+            checked_rows INTEGER NOT NULL,
+            mismatched_rows INTEGER NOT NULL,
+            unconverted_rows INTEGER NOT NULL,
+            first_mismatch TEXT
         );
 
         CREATE TABLE IF NOT EXISTS fields (
@@ -306,9 +572,11 @@ def create_schema(conn: sqlite3.Connection):
             name_en TEXT,
             canonical_name TEXT,
             data_type TEXT,
+            calendar TEXT,
             nullable INTEGER,
             null_count INTEGER,
             distinct_count INTEGER,
+            distinct_error REAL,
             min_value TEXT,
             max_value TEXT,
             sample_values TEXT,
@@ -328,7 +596,27 @@ def create_schema(conn: sqlite3.Connection):
             file_id INTEGER NOT NULL REFERENCES files(id),
             row_number INTEGER NOT NULL,
             raw_line TEXT,
-            parsed_json TEXT
+            parsed_json TEXT,
+            byte_offset INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS field_sketches (
+            field_id INTEGER PRIMARY KEY REFERENCES fields(id),
+            hll BLOB,
+            heavy_hitters TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS field_quantiles (
+            field_id INTEGER PRIMARY KEY REFERENCES fields(id),
+            value_count INTEGER NOT NULL,
+            p1 REAL,
+            p5 REAL,
+            p25 REAL,
+            p50 REAL,
+            p75 REAL,
+            p95 REAL,
+            p99 REAL,
+            kll BLOB
         );
 
         CREATE TABLE IF NOT EXISTS field_aliases (
@@ -337,158 +625,628 @@ def create_schema(conn: sqlite3.Connection):
             source TEXT NOT NULL,
             file_count INTEGER DEFAULT 1
         );
-    """)
 
+        CREATE TABLE IF NOT EXISTS index_values (
+            file_id INTEGER NOT NULL REFERENCES files(id),
+            level TEXT NOT NULL,
+            region TEXT,
+            city TEXT,
+            district TEXT,
+            period TEXT NOT NULL,
+            property_classification TEXT NOT NULL,
+            property_type TEXT NOT NULL,
+            status TEXT,
+            metric TEXT NOT NULL,
+            value REAL NOT NULL
+        );
 
-def process_file(filepath: Path, conn: sqlite3.Connection):
-    """Process a single CSV file and insert into registry."""
-    filename = filepath.name
-    rel_path = str(filepath.relative_to(BASE_DIR))
-    source, category = classify_file(filename)
-    encoding, has_bom = detect_encoding(filepath)
-    file_size = filepath.stat().st_size
+        CREATE TABLE IF NOT EXISTS duplicate_refs (
+            ref TEXT NOT NULL,
+            file_id INTEGER NOT NULL REFERENCES files(id),
+            row_count INTEGER NOT NULL,
+            PRIMARY KEY (ref, file_id)
+        ) WITHOUT ROWID;
 
-    print(f"  {rel_path} [{source}/{category}]", end="", flush=True)
+        CREATE TABLE IF NOT EXISTS file_overlaps (
+            file_id INTEGER NOT NULL REFERENCES files(id),
+            other_file_id INTEGER NOT NULL REFERENCES files(id),
+            shared_refs INTEGER NOT NULL,
+            shared_rows INTEGER NOT NULL,
+            PRIMARY KEY (file_id, other_file_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS search_terms (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            term TEXT NOT NULL,
+            folded TEXT NOT NULL,
+            field TEXT,
+            file_count INTEGER NOT NULL
+        );
 
-    # Read all raw lines for sampling
-    with open(filepath, "r", encoding=encoding, newline="") as f:
-        raw_lines = f.readlines()
+        CREATE TABLE IF NOT EXISTS search_postings (
+            term_id INTEGER NOT NULL REFERENCES search_terms(id),
+            file_id INTEGER NOT NULL REFERENCES files(id),
+            PRIMARY KEY (term_id, file_id)
+        ) WITHOUT ROWID;
 
-    if not raw_lines:
-        print(" (empty)")
-        return
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+            folded, content='search_terms', content_rowid='id', tokenize='trigram'
+        );
 
-    # Parse CSV
-    with open(filepath, "r", encoding=encoding, newline="") as f:
-        reader = csv.reader(f)
-        try:
-            raw_headers = next(reader)
-        except StopIteration:
-            print(" (no headers)")
-            return
+        CREATE TABLE IF NOT EXISTS layouts (
+            fingerprint TEXT PRIMARY KEY,
+            col_count INTEGER NOT NULL,
+            headers TEXT NOT NULL,
+            column_types TEXT NOT NULL,
+            canonical_names TEXT NOT NULL,
+            file_count INTEGER NOT NULL,
+            first_build INTEGER
+        );
 
-        headers = [clean_header(h) for h in raw_headers]
-        col_count = len(headers)
+        CREATE TABLE IF NOT EXISTS builds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            jobs INTEGER,
+            backend TEXT,
+            file_count INTEGER,
+            row_count INTEGER,
+            bytes_read INTEGER,
+            wall_seconds REAL,
+            cpu_seconds REAL
+        );
 
-        # Read all rows (we need full counts)
-        rows = []
-        for row in reader:
-            if row and any(c.strip() for c in row):  # skip blank rows
-                rows.append(row)
+        CREATE TABLE IF NOT EXISTS build_stats (
+            build_id INTEGER NOT NULL REFERENCES builds(id),
+            path TEXT,
+            stage TEXT NOT NULL,
+            wall_seconds REAL,
+            cpu_seconds REAL,
+            row_count INTEGER,
+            bytes_read INTEGER,
+            peak_memory INTEGER
+        );
+    """)
+    geography.create_geo_schema(conn)
 
-    row_count = len(rows)
 
-    # Detect notes about the file
-    notes_parts = []
-    if category == "index":
-        notes_parts.append("pivot-table export with multi-row headers")
+class ColumnStats:
+    """Streaming accumulator for one column of a CSV file.
 
-    # Per-column analysis
-    col_data: list[dict] = []
-    region_idx = get_region_column_idx(headers)
-    date_idx = get_date_column_idx(headers)
-    regions: set[str] = set()
-    date_values: list[str] = []
+    Values are fed in row batches by ``profile_file``. Type inference still
+    looks at the first ``SAMPLE_ROWS`` non-null values only; once that sample
+    is full the type is fixed and only the matching min/max accumulator is
+    updated for the remaining rows.
 
-    for col_idx in range(col_count):
-        values = []
-        null_count = 0
-        formatting_notes: list[str] = []
+    With ``sketch=True`` the exact distinct set and enum counter are replaced
+    by a HyperLogLog and a Misra-Gries summary, so memory per column is fixed.
+    The Misra-Gries summary stays exact up to ``HEAVY_HITTERS_K`` distinct
+    values, which keeps enum detection identical to the exact mode.
 
-        for row in rows:
-            if col_idx < len(row):
-                v = row[col_idx].strip()
-                if not v or v.upper() == "NULL":
-                    null_count += 1
-                else:
-                    values.append(v)
-                    # Track regions
-                    if col_idx == region_idx:
-                        regions.add(v.strip())
-                    # Track dates
-                    if col_idx == date_idx:
-                        date_values.append(v)
-            else:
-                null_count += 1
-
-        # Detect formatting quirks
-        has_quoted_commas = any('"' in v and "," in v.strip('"') for v in values[:200])
-        has_null_literal = any(
-            row[col_idx].strip().upper() == "NULL"
-            for row in rows[:200]
-            if col_idx < len(row) and row[col_idx].strip()
-        )
-        has_pct = any(v.endswith("%") for v in values[:200])
+    Numeric columns also feed a KLL sketch (``QUANTILE_K``), which gives
+    their percentiles in fixed memory and is stored so per-file sketches
+    can be merged later (``merge_field_quantiles``).
 
-        if has_quoted_commas:
-            formatting_notes.append("quoted_commas")
-        if has_null_literal:
-            formatting_notes.append("NULL_literal")
-        if has_pct:
-            formatting_notes.append("percentage_strings")
+    With ``use_accel=True`` type inference and numeric min/max run through
+    the pyarrow kernels in ``accel`` (same results, see accel.py).
 
-        # Distinct values (sample first SAMPLE_ROWS for performance)
-        sample_slice = values[:SAMPLE_ROWS] if len(values) > SAMPLE_ROWS else values
-        counter = Counter(sample_slice)
-        distinct_count = len(set(values))
+    Time spent on type inference and distinct/enum counting is charged to
+    the "infer" and "enum" stages of `timer`.
 
-        # Type inference
-        data_type = infer_type(sample_slice)
+    For byte-range chunks of one file (see ``profile_file_split``) the
+    column's type is either already known (`data_type`) or `deferred`: the
+    chunk then keeps its first ``SAMPLE_ROWS`` values and feeds every value
+    to both the numeric and the date accumulators, and the type is decided
+    once the chunks are merged in file order with ``merge``.
 
-        # If enum check
+    A column of a known header layout gets that layout's `expected_type`:
+    only the first ``VALIDATE_ROWS`` values are classified, and if they
+    agree the type is fixed right away. If they don't, the column falls
+    back to the full ``SAMPLE_ROWS`` sample and `drifted_from` keeps the
+    type the layout expected.
+    """
+
+    def __init__(
+        self,
+        ordinal: int,
+        name: str,
+        track_dates: bool = False,
+        sketch: bool = False,
+        use_accel: bool = False,
+        timer: StageTimer | None = None,
+        data_type: str | None = None,
+        deferred: bool = False,
+        expected_type: str | None = None,
+    ):
+        self.ordinal = ordinal
+        self.name = name
+        self.use_accel = use_accel
+        self.timer = timer or StageTimer()
+        self.deferred = deferred
+        self.expected_type = None if deferred or data_type else expected_type
+        self.drifted_from: str | None = None
+        self.null_count = 0
+        self.value_count = 0
+        self.head: list[str] = []
+        self.distinct: set[str] | None = None if sketch else set()
+        self.hll = HyperLogLog(HLL_PRECISION) if sketch else None
+        self.heavy = MisraGries(HEAVY_HITTERS_K) if sketch else None
+        self.first_distinct: dict[str, None] = {}
+        self.enum_counter: Counter | None = None if sketch else Counter()
+        self.data_type = data_type
+        self.track_numeric = deferred or data_type in ("integer", "decimal")
+        self.track_dates = track_dates or deferred or data_type == "date"
+        self.num_min: float | None = None
+        self.num_max: float | None = None
+        self.quantiles = KLL(QUANTILE_K)
+        self.date_min: tuple[str, str] | None = None
+        self.date_max: tuple[str, str] | None = None
+        # Value / row index of the first quirk within FORMAT_CHECK_ROWS
+        self.quoted_commas_at: int | None = None
+        self.pct_at: int | None = None
+        self.null_literal_at: int | None = None
+
+    def add_batch(self, values: list[str]):
+        """Feed a batch of stripped, non-null values in file order."""
+        if not values:
+            return
+        if self.value_count < FORMAT_CHECK_ROWS:
+            checked = values[: FORMAT_CHECK_ROWS - self.value_count]
+            for at, v in enumerate(checked, self.value_count):
+                if self.quoted_commas_at is None and '"' in v and "," in v.strip('"'):
+                    self.quoted_commas_at = at
+                if self.pct_at is None and v.endswith("%"):
+                    self.pct_at = at
+        self.value_count += len(values)
+
+        with self.timer("enum"):
+            if self.distinct is not None:
+                self.distinct.update(values)
+            else:
+                batch_counts = Counter(values)
+                self.hll.update(batch_counts)
+                self.heavy.update(batch_counts)
+            if len(self.first_distinct) < SAMPLE_VALUES_COUNT:
+                for v in values:
+                    self.first_distinct.setdefault(v)
+                    if len(self.first_distinct) >= SAMPLE_VALUES_COUNT:
+                        break
+            if self.enum_counter is not None:
+                self.enum_counter.update(values)
+                # More distinct values than an enum can hold — stop counting
+                if len(self.enum_counter) > ENUM_THRESHOLD:
+                    self.enum_counter = None
+
+        if self.deferred:
+            self.head.extend(values[: SAMPLE_ROWS - len(self.head)])
+        elif self.expected_type:
+            needed = VALIDATE_ROWS - len(self.head)
+            self.head.extend(values[:needed])
+            if self.track_dates:
+                self._add_dates(values[:needed])
+            if len(self.head) < VALIDATE_ROWS:
+                return
+            with self.timer("infer"):
+                self._check_expected()
+            values = values[needed:]
+        if self.data_type is None and not self.deferred:
+            needed = SAMPLE_ROWS - len(self.head)
+            self.head.extend(values[:needed])
+            if self.track_dates:
+                self._add_dates(values[:needed])
+            if len(self.head) < SAMPLE_ROWS:
+                return
+            with self.timer("infer"):
+                self._decide_type()
+            values = values[needed:]
+
+        if self.track_numeric:
+            self._add_numerics(values)
+        if self.track_dates:
+            self._add_dates(values)
+
+    def _add_numerics(self, values: list[str]):
+        result = None
+        if self.use_accel and len(values) >= accel.MIN_BATCH:
+            nums = []
+            result = accel.numeric_min_max(values, parse_numeric, nums)
+        if result is None:
+            nums = [n for n in map(parse_numeric, values) if n is not None]
+            if not nums:
+                return
+            lo = min(nums)
+            hi = max(nums)
+        else:
+            lo, hi = result
+            if lo is None:
+                return
+        self.quantiles.update(n for n in nums if not math.isnan(n))
+        if self.num_min is None or lo < self.num_min:
+            self.num_min = lo
+        if self.num_max is None or hi > self.num_max:
+            self.num_max = hi
+
+    def _add_dates(self, values: list[str]):
+        for v in values:
+            v = v.strip('"')
+            norm = normalize_date(v)
+            if norm is None:
+                continue
+            # Earliest first occurrence / latest last occurrence, as a stable sort
+            if self.date_min is None or norm < self.date_min[1]:
+                self.date_min = (v, norm)
+            if self.date_max is None or norm >= self.date_max[1]:
+                self.date_max = (v, norm)
+
+    def _infer(self) -> str:
+        if self.use_accel and len(self.head) >= accel.MIN_BATCH:
+            return accel.infer_type(self.head, classify_value, type_from_counts)
+        return infer_type(self.head)
+
+    def _check_expected(self):
+        """Adopt the layout's type if the sample agrees; else keep sampling."""
+        if self._infer() == self.expected_type:
+            self._set_type(self.expected_type)
+        else:
+            self.drifted_from = self.expected_type
+        self.expected_type = None
+
+    def _decide_type(self):
+        self._set_type(self._infer())
+
+    def _set_type(self, data_type: str):
+        self.data_type = data_type
+        if self.deferred:
+            return  # every value already went to both accumulators
+        if self.data_type in ("integer", "decimal"):
+            self.track_numeric = True
+            self._add_numerics(self.head)
+        elif self.data_type == "date" and not self.track_dates:
+            self.track_dates = True
+            self._add_dates(self.head)
+
+    def merge(self, other: ColumnStats):
+        """Fold in `other`, the same column over the rows that follow ours.
+
+        The result is what one pass over both row ranges would give; only
+        sketch-mode heavy-hitter counts may differ (within their error bound)
+        once a column has more than ``HEAVY_HITTERS_K`` distinct values.
+        """
+        rows = self.null_count + self.value_count
+        for attr, offset in (
+            ("quoted_commas_at", self.value_count),
+            ("pct_at", self.value_count),
+            ("null_literal_at", rows),
+        ):
+            at = getattr(other, attr)
+            if getattr(self, attr) is None and at is not None:
+                if offset + at < FORMAT_CHECK_ROWS:
+                    setattr(self, attr, offset + at)
+        self.null_count += other.null_count
+        self.value_count += other.value_count
+
+        if self.distinct is not None:
+            self.distinct.update(other.distinct)
+        else:
+            self.hll.merge(other.hll)
+            self.heavy.merge(other.heavy)
+        for v in other.first_distinct:
+            if len(self.first_distinct) >= SAMPLE_VALUES_COUNT:
+                break
+            self.first_distinct.setdefault(v)
+        if self.enum_counter is not None:
+            if other.enum_counter is None:
+                self.enum_counter = None
+            else:
+                self.enum_counter.update(other.enum_counter)
+                if len(self.enum_counter) > ENUM_THRESHOLD:
+                    self.enum_counter = None
+        if self.deferred:
+            self.head.extend(other.head[: SAMPLE_ROWS - len(self.head)])
+
+        self.quantiles.merge(other.quantiles)
+        if other.num_min is not None:
+            if self.num_min is None or other.num_min < self.num_min:
+                self.num_min = other.num_min
+            if self.num_max is None or other.num_max > self.num_max:
+                self.num_max = other.num_max
+        # Earliest first occurrence / latest last occurrence, as in _add_dates
+        if other.date_min is not None:
+            if self.date_min is None or other.date_min[1] < self.date_min[1]:
+                self.date_min = other.date_min
+            if self.date_max is None or other.date_max[1] >= self.date_max[1]:
+                self.date_max = other.date_max
+
+    def date_range(self) -> tuple[str | None, str | None]:
+        if self.date_min is None:
+            return None, None
+        return self.date_min[0], self.date_max[0]
+
+    def finish(self) -> dict:
+        """Return the column's registry record."""
+        if self.data_type is None:
+            with self.timer("infer"):
+                if self.expected_type and self.head:
+                    self._check_expected()
+                if self.data_type is None:
+                    self._decide_type()
+        data_type = self.data_type
+
+        distinct_error = None
+        hll_blob = None
+        heavy_json = None
+        if self.distinct is not None:
+            distinct_count = len(self.distinct)
+        else:
+            hll_blob = self.hll.to_bytes()
+            heavy_json = self.heavy.to_json()
+            if self.heavy.exact:
+                distinct_count = len(self.heavy.counts)
+                distinct_error = 0.0
+                self.enum_counter = self.heavy.counts
+            else:
+                distinct_count = self.hll.estimate()
+                distinct_error = round(self.hll.relative_error, 4)
         is_enum = (
             distinct_count <= ENUM_THRESHOLD
             and distinct_count > 0
             and data_type == "text"
         )
 
-        # Min/max for numerics
         min_val = None
         max_val = None
+        calendar = None
+        quantiles = None
         if data_type in ("integer", "decimal"):
-            nums = [parse_numeric(v) for v in values]
-            nums = [n for n in nums if n is not None]
-            if nums:
-                min_val = str(min(nums))
-                max_val = str(max(nums))
+            if self.num_min is not None:
+                min_val = str(self.num_min)
+                max_val = str(self.num_max)
+            if self.quantiles.count:
+                quantiles = {
+                    "value_count": self.quantiles.count,
+                    "percentiles": self.quantiles.quantiles([p / 100 for p in PERCENTILES]),
+                    "kll": self.quantiles.to_bytes(),
+                }
         elif data_type == "date":
-            d_start, d_end = extract_date_range(values)
-            min_val = d_start
-            max_val = d_end
-
-        # Sample values (5 distinct)
-        distinct_vals = list(dict.fromkeys(values))  # preserves order, deduplicates
-        sample_vals = distinct_vals[:SAMPLE_VALUES_COUNT]
-
-        # Canonical name
-        header_name = headers[col_idx]
-        canonical = ARABIC_TO_CANONICAL.get(header_name)
-
-        col_data.append(
-            {
-                "ordinal": col_idx,
-                "name_ar": header_name,
-                "canonical_name": canonical,
-                "data_type": data_type,
-                "nullable": 1 if null_count > 0 else 0,
-                "null_count": null_count,
-                "distinct_count": distinct_count,
-                "min_value": min_val,
-                "max_value": max_val,
-                "sample_values": json.dumps(sample_vals, ensure_ascii=False),
-                "formatting_notes": ", ".join(formatting_notes)
-                if formatting_notes
-                else None,
-                "is_enum": is_enum,
-                "enum_counter": Counter(values) if is_enum else None,
-            }
+            min_val, max_val = self.date_range()
+            if self.date_min is not None:
+                year = int(self.date_min[1][:4])
+                calendar = "hijri" if hijri.is_hijri_year(year) else "gregorian"
+
+        formatting_notes: list[str] = []
+        if self.quoted_commas_at is not None:
+            formatting_notes.append("quoted_commas")
+        if self.null_literal_at is not None:
+            formatting_notes.append("NULL_literal")
+        if self.pct_at is not None:
+            formatting_notes.append("percentage_strings")
+
+        return {
+            "ordinal": self.ordinal,
+            "name_ar": self.name,
+            "canonical_name": ARABIC_TO_CANONICAL.get(self.name),
+            "data_type": data_type,
+            "calendar": calendar,
+            "nullable": 1 if self.null_count > 0 else 0,
+            "null_count": self.null_count,
+            "distinct_count": distinct_count,
+            "distinct_error": distinct_error,
+            "min_value": min_val,
+            "max_value": max_val,
+            "sample_values": json.dumps(
+                list(self.first_distinct), ensure_ascii=False
+            ),
+            "formatting_notes": ", ".join(formatting_notes)
+            if formatting_notes
+            else None,
+            "is_enum": is_enum,
+            "enum_counter": self.enum_counter if is_enum else None,
+            "hll": hll_blob,
+            "heavy_hitters": heavy_json,
+            "quantiles": quantiles,
+            "drifted_from": self.drifted_from,
+        }
+
+
+def _profile_batch(
+    batch: list[list[str]],
+    rows_before: int,
+    columns: list[ColumnStats],
+    cell_cols: tuple[int, ...] = (),
+    cells: Counter | None = None,
+):
+    """Feed a batch of data rows into the per-column accumulators, and count
+    its rows per raw coverage cell (the values of the `cell_cols` columns)."""
+    check_rows = max(0, FORMAT_CHECK_ROWS - rows_before)
+    picked = {}
+    for col in columns:
+        i = col.ordinal
+        try:
+            vals = [row[i].strip() for row in batch]
+        except IndexError:
+            # Short rows — missing trailing cells count as nulls
+            vals = [row[i].strip() if i < len(row) else "" for row in batch]
+
+        values = [v for v in vals if v and v.upper() != "NULL"]
+        col.null_count += len(vals) - len(values)
+        if check_rows and col.null_literal_at is None:
+            for at, v in enumerate(vals[:check_rows], rows_before):
+                if v.upper() == "NULL":
+                    col.null_literal_at = at
+                    break
+        col.add_batch(values)
+        if i in cell_cols:
+            picked[i] = vals
+    if cells is not None and cell_cols:
+        cells.update(zip(*(picked[i] for i in cell_cols)))
+
+
+def _file_info(filepath: Path, timer: StageTimer) -> dict:
+    """The registry's file-level facts that don't need a scan.
+
+    For a compressed file, `file_size` (the decompressed size) is None until
+    the file has been read through.
+    """
+    source, category = classify_file(filepath.name)
+    kind = compressed.compression(filepath)
+    with timer("read"):
+        encoding, has_bom = detect_encoding(filepath)
+        size, mtime = compressed.source_stat(filepath)
+        fingerprint = file_fingerprint(filepath)
+    return {
+        "source": source,
+        "category": category,
+        "filename": filepath.name,
+        "path": str(filepath.relative_to(BASE_DIR)),
+        "file_size": None if kind else size,
+        "encoding": encoding,
+        "has_bom": int(has_bom),
+        "file_mtime": mtime,
+        "fingerprint": fingerprint,
+        "compression": kind,
+        "compressed_size": size if kind else None,
+    }
+
+
+def _read_header(mm: mmap.mmap | compressed.StreamBuffer, encoding: str) -> tuple[list[str], int] | None:
+    """Return (cleaned headers, offset after the header line), None if empty."""
+    header_line, data_start = LineScanner(mm, encoding).header()
+    if header_line is None:
+        return None
+    raw_headers = next(csv.reader([header_line]), [])
+    return [clean_header(h) for h in raw_headers], data_start
+
+
+def _new_columns(
+    headers: list[str],
+    sketch: bool,
+    use_accel: bool,
+    timer: StageTimer,
+    types: list[str | None] | None = None,
+    expected: list[str | None] | None = None,
+) -> list[ColumnStats]:
+    """One ColumnStats per header; `types` presets (or defers) each type,
+    `expected` gives a known layout's types to validate."""
+    date_idx = get_date_column_idx(headers)
+    return [
+        ColumnStats(
+            i,
+            h,
+            track_dates=(i == date_idx),
+            sketch=sketch,
+            use_accel=use_accel,
+            timer=timer,
+            data_type=types[i] if types else None,
+            deferred=types is not None and types[i] is None,
+            expected_type=expected[i] if expected else None,
         )
+        for i, h in enumerate(headers)
+    ]
+
+
+def _profile_range(
+    mm: mmap.mmap | compressed.StreamBuffer,
+    encoding: str,
+    start: int,
+    end: int,
+    columns: list[ColumnStats],
+    cell_cols: tuple[int, ...],
+    timer: StageTimer,
+) -> dict:
+    """Feed the data rows in mm[start:end] to `columns`.
+
+    Returns the range's row and blank-row counts, rows per raw coverage
+    cell (values of the `cell_cols` columns), first ``RAW_SAMPLE_COUNT``
+    rows as (row, byte offset, raw line), and the offsets of its first and
+    past its last data line (None if it has none).
+    """
+    # (row, byte offset, raw line) of the first RAW_SAMPLE_COUNT data rows
+    sample_rows: list[tuple[list[str], int, str]] = []
+    cells: Counter = Counter()
+    row_count = 0
+    blank_rows = 0
+
+    scanner = LineScanner(mm, encoding)
+    reader = csv.reader(scanner.lines(start, end))
+    batch: list[list[str]] = []
+    for row in reader:
+        # Comma-only lines never get here; this catches e.g. '" ",,'
+        if not row or not any(c.strip() for c in row):
+            blank_rows += 1
+            continue
+        if len(sample_rows) < RAW_SAMPLE_COUNT:
+            sample_rows.append(
+                (row, scanner.line_offset, scanner.raw_line.rstrip("\r\n"))
+            )
+            if len(sample_rows) == RAW_SAMPLE_COUNT:
+                scanner.track_offsets = False
+        batch.append(row)
+        if len(batch) >= BATCH_ROWS:
+            with timer("columns"):
+                _profile_batch(batch, row_count, columns, cell_cols, cells)
+            row_count += len(batch)
+            batch = []
+    if batch:
+        with timer("columns"):
+            _profile_batch(batch, row_count, columns, cell_cols, cells)
+        row_count += len(batch)
+
+    return {
+        "row_count": row_count,
+        "blank_rows": blank_rows + scanner.blank_lines,
+        "cells": cells,
+        "sample_rows": sample_rows,
+        "data_offset": scanner.data_offset,
+        "data_end": scanner.data_end if scanner.data_offset is not None else None,
+    }
+
+
+def _assemble_profile(
+    info: dict,
+    headers: list[str],
+    columns: list[ColumnStats],
+    data_start: int,
+    scans: list[dict],
+    timer: StageTimer,
+    layouts: dict[str, list] | None = None,
+) -> dict:
+    """Build the ``profile_file`` result from the (merged) column stats and
+    the row-range scans, which must be in file order.
+
+    With the registry's known `layouts`, a header layout outside them or a
+    column whose type differs from its layout's is noted as schema drift.
+    """
+    category = info["category"]
+    part_cols = get_coverage_columns(headers)
+    parts = list(part_cols)
+    cells: Counter = sum((scan["cells"] for scan in scans), Counter())
+    regions: set[str] = set()
+    if "region" in parts:
+        at = parts.index("region")
+        regions = {raw[at] for raw in cells if raw[at] and raw[at].upper() != "NULL"}
+    row_count = sum(scan["row_count"] for scan in scans)
+    blank_rows = sum(scan["blank_rows"] for scan in scans)
+    sample_rows = [row for scan in scans for row in scan["sample_rows"]]
+    sample_rows = sample_rows[:RAW_SAMPLE_COUNT]
+    with_data = [scan for scan in scans if scan["data_offset"] is not None]
+    data_offset = with_data[0]["data_offset"] if with_data else data_start
+    data_end = with_data[-1]["data_end"] if with_data else data_start
+
+    # Detect notes about the file
+    notes_parts = []
+    if category == "index":
+        notes_parts.append("pivot-table export with multi-row headers")
+
+    with timer("finish"):
+        col_data = [col.finish() for col in columns]
 
     # Date range from date column
     date_start = None
     date_end = None
-    if date_values:
-        date_start, date_end = extract_date_range(date_values)
+    date_idx = get_date_column_idx(headers)
+    if date_idx is not None:
+        date_start, date_end = columns[date_idx].date_range()
     # Fallback: try year column for REGA files
     if not date_start:
         for cd in col_data:
@@ -501,48 +1259,306 @@ def process_file(filepath: Path, conn: sqlite3.Connection):
                 date_end = cd["max_value"]
                 break
 
-    # Region coverage
-    region_coverage = (
-        json.dumps(sorted(regions), ensure_ascii=False) if regions else None
-    )
+    layout = header_fingerprint(headers)
+    if layouts:
+        if layout not in layouts:
+            notes_parts.append("schema drift: new header layout")
+        changed = [
+            f"{cd['name_ar']} {cd['drifted_from']}→{cd['data_type']}"
+            for cd in col_data
+            if cd["drifted_from"] and cd["drifted_from"] != cd["data_type"]
+        ]
+        if changed:
+            notes_parts.append("schema drift: " + ", ".join(changed[:5]))
+
+    date_check = check_hijri_dates(part_cols, cells)
+    if date_check and date_check["mismatched_rows"]:
+        notes_parts.append(
+            f"hijri/gregorian mismatch: {date_check['mismatched_rows']:,}"
+            f" of {date_check['checked_rows']:,} rows"
+        )
+
+    # Region coverage, as canonical region IDs
+    region_ids = {geography.region_id(r) for r in regions}
+    unmatched = sorted(r for r in regions if geography.region_id(r) is None)
+    if unmatched:
+        notes_parts.append("unrecognized regions: " + ", ".join(unmatched[:5]))
 
     notes = "; ".join(notes_parts) if notes_parts else None
 
+    # Raw samples, with the byte offset of each row's line
+    samples = []
+    for idx, (row, byte_offset, raw_line) in enumerate(sample_rows):
+        parsed = {}
+        for col_idx, header in enumerate(headers):
+            if col_idx < len(row):
+                parsed[header] = row[col_idx].strip()
+            else:
+                parsed[header] = None
+        samples.append(
+            (idx + 1, raw_line, json.dumps(parsed, ensure_ascii=False), byte_offset)
+        )
+
+    return {
+        "file": {
+            **info,
+            "row_count": row_count,
+            "col_count": len(headers),
+            "date_range_start": date_start,
+            "date_range_end": date_end,
+            "regions": sorted(region_ids - {None}),
+            "coverage": coverage_cells(parts, cells),
+            "date_check": date_check,
+            "notes": notes,
+            "data_offset": data_offset,
+            "data_end": data_end,
+            "blank_rows": blank_rows,
+            "layout": layout,
+        },
+        "fields": col_data,
+        "samples": samples,
+    }
+
+
+def profile_file(
+    filepath: Path,
+    sketch: bool = False,
+    use_accel: bool | None = None,
+    timer: StageTimer | None = None,
+    layouts: dict[str, list] | None = None,
+) -> dict | None:
+    """Profile a CSV file in a single streaming pass.
+
+    Returns a dict with "file", "fields" and "samples" entries ready for
+    ``insert_profile``, or None if the file is empty. Only the first
+    ``RAW_SAMPLE_COUNT`` raw lines and parsed rows are kept in memory.
+    With `sketch`, distinct counts and enum candidates come from fixed-size
+    sketches (see ``ColumnStats``). `use_accel` defaults to using the
+    pyarrow fast path whenever pyarrow is installed. `layouts` maps known
+    header fingerprints to their column types (see ``known_layouts``): a
+    file with a known header only validates those types on a short sample.
+
+    Per-stage times (read, parse, columns, infer, enum, finish) are added
+    to `timer` when one is given.
+    """
+    if use_accel is None:
+        use_accel = accel.available()
+    timer = timer or StageTimer()
+    info = _file_info(filepath, timer)
+    if info["file_size"] == 0:
+        return None
+
+    # Line scanning, decoding (and decompression) and CSV parsing are charged
+    # to "parse", the column-wise work on each batch to "columns" (and the
+    # stages nested in it)
+    with timer("parse"), compressed.open_buffer(filepath) as mm:
+        header = _read_header(mm, info["encoding"])
+        if header is None:
+            return None
+        headers, data_start = header
+        expected = (layouts or {}).get(header_fingerprint(headers))
+        columns = _new_columns(headers, sketch, use_accel, timer, expected=expected)
+        scan = _profile_range(
+            mm,
+            info["encoding"],
+            data_start,
+            len(mm),
+            columns,
+            tuple(get_coverage_columns(headers).values()),
+            timer,
+        )
+        # Read through, so a stream's length is now exact
+        info["file_size"] = len(mm)
+
+    return _assemble_profile(
+        info, headers, columns, data_start, [scan], timer, layouts
+    )
+
+
+def _prescan_types(
+    mm: mmap.mmap,
+    encoding: str,
+    start: int,
+    headers: list[str],
+    use_accel: bool,
+    expected: list[str | None] | None = None,
+) -> tuple[list[str | None], dict[int, str]]:
+    """Decide column types from the leading rows, exactly as a serial pass.
+
+    Stops once every column has ``SAMPLE_ROWS`` values (or, with a known
+    layout's `expected` types, a validated sample) or after
+    ``SPLIT_PRESCAN_ROWS`` rows; columns still short of a full sample come
+    back as None and are profiled with a deferred type. Also returns
+    {ordinal: expected type} for columns that failed validation.
+    """
+    columns = _new_columns(headers, False, use_accel, StageTimer(), expected=expected)
+    reader = csv.reader(LineScanner(mm, encoding).lines(start))
+    batch: list[list[str]] = []
+    rows = 0
+    for row in reader:
+        if not row or not any(c.strip() for c in row):
+            continue
+        batch.append(row)
+        if len(batch) >= SAMPLE_ROWS:
+            _profile_batch(batch, rows, columns)
+            rows += len(batch)
+            batch = []
+            if rows >= SPLIT_PRESCAN_ROWS or all(c.data_type for c in columns):
+                break
+    drifted = {col.ordinal: col.drifted_from for col in columns if col.drifted_from}
+    return [col.data_type for col in columns], drifted
+
+
+def _profile_range_worker(task: tuple) -> tuple[list[ColumnStats], dict, StageTimer, float]:
+    """Profile one byte range of a split file in a worker process."""
+    filepath, encoding, start, end, headers, types, sketch, use_accel = task
+    cpu0 = time.process_time()
+    timer = StageTimer()
+    with timer("parse"), open(filepath, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        columns = _new_columns(headers, sketch, use_accel, timer, types)
+        scan = _profile_range(
+            mm,
+            encoding,
+            start,
+            end,
+            columns,
+            tuple(get_coverage_columns(headers).values()),
+            timer,
+        )
+    return columns, scan, timer, time.process_time() - cpu0
+
+
+def profile_file_split(
+    filepath: Path,
+    pool: multiprocessing.pool.Pool,
+    parts: int,
+    sketch: bool = False,
+    use_accel: bool | None = None,
+    timer: StageTimer | None = None,
+    layouts: dict[str, list] | None = None,
+) -> tuple[dict | None, float]:
+    """Profile one large file as `parts` byte-range chunks on `pool`.
+
+    Chunks end on record boundaries (see ``bytescan.record_boundaries``);
+    their column stats are merged in file order, so the profile equals
+    ``profile_file``'s (up to sketch-mode heavy-hitter counts). Returns
+    (profile, CPU seconds spent in the workers).
+    """
+    if use_accel is None:
+        use_accel = accel.available()
+    timer = timer or StageTimer()
+    info = _file_info(filepath, timer)
+    if info["file_size"] == 0:
+        return None, 0.0
+    encoding = info["encoding"]
+
+    with open(filepath, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        with timer("parse"):
+            header = _read_header(mm, encoding)
+            if header is None:
+                return None, 0.0
+            headers, data_start = header
+            bounds = record_boundaries(mm, data_start, len(mm), parts)
+        with timer("infer"):
+            types, drifted = _prescan_types(
+                mm,
+                encoding,
+                data_start,
+                headers,
+                use_accel,
+                (layouts or {}).get(header_fingerprint(headers)),
+            )
+
+    tasks = [
+        (filepath, encoding, start, end, headers, types, sketch, use_accel)
+        for start, end in zip(bounds, bounds[1:])
+    ]
+    results = pool.map(_profile_range_worker, tasks)
+
+    with timer("merge"):
+        columns = results[0][0]
+        for other_columns, *_ in results[1:]:
+            for col, other in zip(columns, other_columns):
+                col.merge(other)
+    for col in columns:
+        col.timer = timer
+        col.drifted_from = drifted.get(col.ordinal)
+    worker_cpu = 0.0
+    for _, _, chunk_timer, cpu in results:
+        timer.merge(chunk_timer)
+        worker_cpu += cpu
+    scans = [scan for _, scan, _, _ in results]
+    profile = _assemble_profile(
+        info, headers, columns, data_start, scans, timer, layouts
+    )
+    return profile, worker_cpu
+
+
+def insert_profile(conn: sqlite3.Connection, profile: dict) -> int:
+    """Insert a ``profile_file`` result into the registry. Returns file id."""
+    fr = profile["file"]
+
     # ── Insert file record ──
     cur = conn.execute(
         """
         INSERT INTO files (source, category, filename, path, file_size,
             row_count, col_count, encoding, has_bom,
-            date_range_start, date_range_end, region_coverage, notes)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            date_range_start, date_range_end, notes,
+            file_mtime, fingerprint, data_offset, data_end, blank_rows, layout,
+            compression, compressed_size)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """,
         (
-            source,
-            category,
-            filename,
-            rel_path,
-            file_size,
-            row_count,
-            col_count,
-            encoding,
-            int(has_bom),
-            date_start,
-            date_end,
-            region_coverage,
-            notes,
+            fr["source"],
+            fr["category"],
+            fr["filename"],
+            fr["path"],
+            fr["file_size"],
+            fr["row_count"],
+            fr["col_count"],
+            fr["encoding"],
+            fr["has_bom"],
+            fr["date_range_start"],
+            fr["date_range_end"],
+            fr["notes"],
+            fr["file_mtime"],
+            fr["fingerprint"],
+            fr["data_offset"],
+            fr["data_end"],
+            fr["blank_rows"],
+            fr["layout"],
+            fr["compression"],
+            fr["compressed_size"],
         ),
     )
     file_id = cur.lastrowid
+    conn.executemany(
+        "INSERT INTO file_coverage VALUES (?, ?, ?, ?, ?, ?)",
+        [(file_id, *cell) for cell in fr["coverage"]],
+    )
+    if fr["date_check"] is not None:
+        conn.execute(
+            "INSERT INTO date_checks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (file_id, *fr["date_check"].values()),
+        )
+    conn.executemany(
+        "INSERT INTO file_regions (file_id, region_id) VALUES (?, ?)",
+        [(file_id, rid) for rid in fr["regions"]],
+    )
 
     # ── Insert fields ──
-    for cd in col_data:
+    for cd in profile["fields"]:
         cur = conn.execute(
             """
             INSERT INTO fields (file_id, ordinal, name_ar, name_en,
-                canonical_name, data_type, nullable, null_count,
-                distinct_count, min_value, max_value, sample_values,
-                formatting_notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                canonical_name, data_type, calendar, nullable, null_count,
+                distinct_count, distinct_error, min_value, max_value,
+                sample_values, formatting_notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
             (
                 file_id,
@@ -551,9 +1567,11 @@ def process_file(filepath: Path, conn: sqlite3.Connection):
                 None,
                 cd["canonical_name"],
                 cd["data_type"],
+                cd["calendar"],
                 cd["nullable"],
                 cd["null_count"],
                 cd["distinct_count"],
+                cd["distinct_error"],
                 cd["min_value"],
                 cd["max_value"],
                 cd["sample_values"],
@@ -562,43 +1580,200 @@ def process_file(filepath: Path, conn: sqlite3.Connection):
         )
         field_id = cur.lastrowid
 
+        if cd["hll"] is not None:
+            conn.execute(
+                """
+                INSERT INTO field_sketches (field_id, hll, heavy_hitters)
+                VALUES (?, ?, ?)
+            """,
+                (field_id, cd["hll"], cd["heavy_hitters"]),
+            )
+
+        if cd["quantiles"] is not None:
+            q = cd["quantiles"]
+            conn.execute(
+                f"""
+                INSERT INTO field_quantiles (field_id, value_count,
+                    {", ".join(f"p{p}" for p in PERCENTILES)}, kll)
+                VALUES (?, ?, {", ".join("?" * len(PERCENTILES))}, ?)
+            """,
+                (field_id, q["value_count"], *q["percentiles"], q["kll"]),
+            )
+
         # Enum values
         if cd["is_enum"] and cd["enum_counter"]:
             total = sum(cd["enum_counter"].values())
-            for val, count in cd["enum_counter"].most_common():
-                pct = round(count / total * 100, 2) if total else 0
-                conn.execute(
-                    """
-                    INSERT INTO enum_values (field_id, value, count, percentage)
-                    VALUES (?, ?, ?, ?)
-                """,
-                    (field_id, val, count, pct),
-                )
+            conn.executemany(
+                """
+                INSERT INTO enum_values (field_id, value, count, percentage)
+                VALUES (?, ?, ?, ?)
+            """,
+                [
+                    (field_id, val, count, round(count / total * 100, 2) if total else 0)
+                    for val, count in cd["enum_counter"].most_common()
+                ],
+            )
 
     # ── Insert raw samples ──
-    sample_indices = list(range(min(RAW_SAMPLE_COUNT, len(rows))))
-    for idx in sample_indices:
-        row = rows[idx]
-        # Raw CSV line (from raw_lines, offset +1 for header)
-        raw_idx = idx + 1  # skip header line
-        raw_line = raw_lines[raw_idx].rstrip("\r\n") if raw_idx < len(raw_lines) else ""
+    conn.executemany(
+        """
+        INSERT INTO samples (file_id, row_number, raw_line, parsed_json, byte_offset)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+        [(file_id, *sample) for sample in profile["samples"]],
+    )
 
-        parsed = {}
-        for col_idx, header in enumerate(headers):
-            if col_idx < len(row):
-                parsed[header] = row[col_idx].strip()
-            else:
-                parsed[header] = None
+    return file_id
 
+
+def process_file(filepath: Path, conn: sqlite3.Connection):
+    """Process a single CSV file and insert into registry."""
+    rel_path = str(filepath.relative_to(BASE_DIR))
+    source, category = classify_file(filepath.name)
+
+    print(f"  {rel_path} [{source}/{category}]", end="", flush=True)
+
+    profile = profile_file(filepath)
+    if profile is None:
+        print(" (empty)")
+        return
+
+    insert_profile(conn, profile)
+    fr = profile["file"]
+    print(f"  ({fr['row_count']} rows, {fr['col_count']} cols)")
+
+
+def delete_file_entries(conn: sqlite3.Connection, file_ids: list[int]):
+    """Remove files and everything hanging off them from the registry."""
+    for file_id in file_ids:
         conn.execute(
             """
-            INSERT INTO samples (file_id, row_number, raw_line, parsed_json)
-            VALUES (?, ?, ?, ?)
+            DELETE FROM enum_values
+            WHERE field_id IN (SELECT id FROM fields WHERE file_id = ?)
         """,
-            (file_id, idx + 1, raw_line, json.dumps(parsed, ensure_ascii=False)),
+            (file_id,),
         )
+        conn.execute(
+            """
+            DELETE FROM field_sketches
+            WHERE field_id IN (SELECT id FROM fields WHERE file_id = ?)
+        """,
+            (file_id,),
+        )
+        conn.execute(
+            """
+            DELETE FROM field_quantiles
+            WHERE field_id IN (SELECT id FROM fields WHERE file_id = ?)
+        """,
+            (file_id,),
+        )
+        conn.execute("DELETE FROM fields WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM samples WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM index_values WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM file_regions WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM file_coverage WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM date_checks WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+
+def plan_incremental(
+    conn: sqlite3.Connection, csvs: list[Path]
+) -> tuple[list[Path], list[int], int, int]:
+    """Compare discovered CSVs against the stored sizes and mtimes.
+
+    Returns (files to profile, stale file ids to delete, unchanged count,
+    removed count).
+    A file is unchanged only when both its size and its mtime match; any
+    other file is re-profiled. The sampled content fingerprint can't vouch
+    for a file whose mtime moved, since an edit between its sampled blocks
+    leaves it unchanged. Compressed files compare their size on disk.
+    """
+    stored = {
+        path: (file_id, size, mtime)
+        for file_id, path, size, mtime in conn.execute("""
+            SELECT id, path, COALESCE(compressed_size, file_size), file_mtime
+            FROM files
+        """)
+    }
 
-    print(f"  ({row_count} rows, {col_count} cols)")
+    to_profile: list[Path] = []
+    stale_ids: list[int] = []
+    unchanged = 0
+    for csv_path in csvs:
+        rel_path = str(csv_path.relative_to(BASE_DIR))
+        entry = stored.pop(rel_path, None)
+        if entry is None:
+            to_profile.append(csv_path)
+            continue
+        file_id, size, mtime = entry
+        disk_size, disk_mtime = compressed.source_stat(csv_path)
+        if disk_size == size and disk_mtime == mtime:
+            unchanged += 1
+            continue
+        to_profile.append(csv_path)
+        stale_ids.append(file_id)
+
+    # Whatever is left in `stored` no longer exists on disk
+    stale_ids.extend(entry[0] for entry in stored.values())
+    return to_profile, stale_ids, unchanged, len(stored)
+
+
+# Tables profiling fills row by row for each file
+PER_FILE_TABLES = ("file_coverage", "date_checks")
+
+
+def schema_is_current(conn: sqlite3.Connection) -> bool:
+    """True if every table of an existing registry has all current columns.
+
+    Missing tables are fine (``create_schema`` adds them); a table from an
+    older builder (e.g. files without fingerprints, or with the JSON
+    region_coverage column file_regions replaced) means a full rebuild. So
+    does a missing per-file table next to existing files, which an
+    incremental build would fill for new files only.
+    """
+    current = sqlite3.connect(":memory:")
+    create_schema(current)
+    tables = current.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    has_files = bool(conn.execute("PRAGMA table_info(files)").fetchall())
+    for (table,) in tables:
+        want = {row[1] for row in current.execute(f"PRAGMA table_info({table})")}
+        have = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if (have and want != have) or (not have and has_files and table in PER_FILE_TABLES):
+            current.close()
+            return False
+    current.close()
+    return True
+
+
+def create_indexes(conn: sqlite3.Connection):
+    """Create (or keep) the registry's lookup indexes."""
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_fields_file_id ON fields(file_id);
+        CREATE INDEX IF NOT EXISTS idx_fields_canonical ON fields(canonical_name);
+        CREATE INDEX IF NOT EXISTS idx_enum_field_id ON enum_values(field_id);
+        CREATE INDEX IF NOT EXISTS idx_samples_file_id ON samples(file_id);
+        CREATE INDEX IF NOT EXISTS idx_aliases_canonical ON field_aliases(canonical_name);
+        CREATE INDEX IF NOT EXISTS idx_files_source_cat ON files(source, category);
+        CREATE INDEX IF NOT EXISTS idx_files_path ON files(path);
+        CREATE INDEX IF NOT EXISTS idx_file_regions_region ON file_regions(region_id);
+        CREATE INDEX IF NOT EXISTS idx_file_coverage_region
+            ON file_coverage(region_id, city_key, first_month);
+        CREATE INDEX IF NOT EXISTS idx_file_coverage_city
+            ON file_coverage(city_key, first_month);
+        CREATE INDEX IF NOT EXISTS idx_build_stats_build ON build_stats(build_id, path);
+        CREATE INDEX IF NOT EXISTS idx_index_region
+            ON index_values(level, region, metric, property_classification,
+                             property_type, period);
+        CREATE INDEX IF NOT EXISTS idx_index_city
+            ON index_values(level, city, metric, property_classification,
+                             property_type, period);
+        CREATE INDEX IF NOT EXISTS idx_index_district
+            ON index_values(level, district, metric, property_classification,
+                             property_type, period);
+        CREATE INDEX IF NOT EXISTS idx_index_file ON index_values(file_id);
+    """)
 
 
 def build_field_aliases(conn: sqlite3.Connection):
@@ -624,8 +1799,108 @@ def build_field_aliases(conn: sqlite3.Connection):
         )
 
 
-def print_summary(conn: sqlite3.Connection):
-    """Print a summary of the built registry."""
+def merge_field_sketches(
+    conn: sqlite3.Connection,
+    canonical_name: str | None = None,
+    category: str | None = None,
+) -> dict | None:
+    """Merge stored per-file sketches into one total, without rescanning.
+
+    Selects fields by canonical name and/or file category (sketch-mode builds
+    only). Returns {"fields", "distinct_count", "distinct_error",
+    "top_values", "count_error"} or None if no sketches match.
+    """
+    where = []
+    params: list[str] = []
+    if canonical_name is not None:
+        where.append("f.canonical_name = ?")
+        params.append(canonical_name)
+    if category is not None:
+        where.append("fi.category = ?")
+        params.append(category)
+    rows = conn.execute(
+        f"""
+        SELECT s.hll, s.heavy_hitters
+        FROM field_sketches s
+        JOIN fields f ON f.id = s.field_id
+        JOIN files fi ON fi.id = f.file_id
+        {"WHERE " + " AND ".join(where) if where else ""}
+    """,
+        params,
+    ).fetchall()
+    if not rows:
+        return None
+
+    hll = HyperLogLog.from_bytes(rows[0][0])
+    heavy = MisraGries.from_json(rows[0][1])
+    for hll_blob, heavy_json in rows[1:]:
+        hll.merge(HyperLogLog.from_bytes(hll_blob))
+        heavy.merge(MisraGries.from_json(heavy_json))
+
+    if heavy.exact:
+        distinct_count, distinct_error = len(heavy.counts), 0.0
+    else:
+        distinct_count, distinct_error = hll.estimate(), hll.relative_error
+    return {
+        "fields": len(rows),
+        "distinct_count": distinct_count,
+        "distinct_error": round(distinct_error, 4),
+        "top_values": heavy.most_common(ENUM_THRESHOLD),
+        "count_error": heavy.offset,
+    }
+
+
+def merge_field_quantiles(
+    conn: sqlite3.Connection,
+    canonical_name: str | None = None,
+    category: str | None = None,
+) -> dict | None:
+    """Merge stored per-file KLL sketches into category-wide percentiles.
+
+    Selects numeric fields by canonical name and/or file category, as
+    ``merge_field_sketches`` does. Returns {"fields", "value_count",
+    "percentiles": {"p1": …, "p99": …}} or None if no sketches match.
+    """
+    where = []
+    params: list[str] = []
+    if canonical_name is not None:
+        where.append("f.canonical_name = ?")
+        params.append(canonical_name)
+    if category is not None:
+        where.append("fi.category = ?")
+        params.append(category)
+    rows = conn.execute(
+        f"""
+        SELECT q.kll
+        FROM field_quantiles q
+        JOIN fields f ON f.id = q.field_id
+        JOIN files fi ON fi.id = f.file_id
+        {"WHERE " + " AND ".join(where) if where else ""}
+    """,
+        params,
+    ).fetchall()
+    if not rows:
+        return None
+
+    kll = KLL.from_bytes(rows[0][0])
+    for (blob,) in rows[1:]:
+        kll.merge(KLL.from_bytes(blob))
+    values = kll.quantiles([p / 100 for p in PERCENTILES])
+    return {
+        "fields": len(rows),
+        "value_count": kll.count,
+        "percentiles": {f"p{p}": v for p, v in zip(PERCENTILES, values)},
+    }
+
+
+def print_summary(
+    conn: sqlite3.Connection, timing: tuple[float, float, int] | None = None
+):
+    """Print a summary of the built registry.
+
+    `timing` is (serial-estimate seconds from ``write_profiles``, profiling
+    wall seconds, jobs).
+    """
     file_count = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
     field_count = conn.execute("SELECT COUNT(*) FROM fields").fetchone()[0]
     sample_count = conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
@@ -635,12 +1910,15 @@ def print_summary(conn: sqlite3.Connection):
     ).fetchone()[0]
 
     total_rows = conn.execute("SELECT SUM(row_count) FROM files").fetchone()[0] or 0
+    repeated_rows = duplicate_row_count(conn)
 
     print("\n" + "=" * 60)
     print("REGISTRY SUMMARY")
     print("=" * 60)
     print(f"  Files cataloged:     {file_count}")
-    print(f"  Total data rows:     {total_rows:,}")
+    print(f"  Total data rows:     {total_rows - repeated_rows:,}")
+    if repeated_rows:
+        print(f"    (+ {repeated_rows:,} rows repeating another file's reference numbers)")
     print(f"  Fields cataloged:    {field_count}")
     print(f"  Enum values stored:  {enum_count}")
     print(f"  Sample rows stored:  {sample_count}")
@@ -649,11 +1927,76 @@ def print_summary(conn: sqlite3.Connection):
 
     # By source/category
     print("FILES BY SOURCE/CATEGORY:")
-    for source, category, cnt, rows in conn.execute("""
-        SELECT source, category, COUNT(*), SUM(row_count)
-        FROM files GROUP BY source, category ORDER BY source, category
+    for source, category, cnt, rows, repeated in conn.execute(f"""
+        SELECT f.source, f.category, COUNT(*), SUM(f.row_count),
+               COALESCE(SUM(r.repeated), 0)
+        FROM files f
+        LEFT JOIN (SELECT file_id, SUM(row_count) AS repeated
+                   FROM ({REPEATED_ROWS_SQL}) GROUP BY file_id) r ON r.file_id = f.id
+        GROUP BY f.source, f.category ORDER BY f.source, f.category
     """):
-        print(f"  {source}/{category}: {cnt} files, {rows:,} rows")
+        line = f"  {source}/{category}: {cnt} files, {rows - repeated:,} rows"
+        print(line + (f" (+ {repeated:,} repeated)" if repeated else ""))
+
+    packed = conn.execute("""
+        SELECT compression, COUNT(*), SUM(compressed_size), SUM(file_size)
+        FROM files WHERE compression IS NOT NULL
+        GROUP BY compression ORDER BY compression
+    """).fetchall()
+    if packed:
+        print("\nCOMPRESSED INPUTS (size on disk → CSV size):")
+        for kind, cnt, packed_size, size in packed:
+            ratio = size / packed_size if packed_size else 0.0
+            print(
+                f"  {kind}: {cnt} files, {packed_size / 2**20:.1f} MB → "
+                f"{size / 2**20:.1f} MB ({ratio:.1f}x)"
+            )
+
+    checks = conn.execute("""
+        SELECT fi.path, d.checked_rows, d.mismatched_rows, d.unconverted_rows,
+               d.first_mismatch
+        FROM date_checks d JOIN files fi ON fi.id = d.file_id
+        ORDER BY d.mismatched_rows + d.unconverted_rows DESC, fi.path
+    """).fetchall()
+    if checks:
+        checked = sum(row[1] for row in checks)
+        print(
+            f"\nHIJRI/GREGORIAN DATES ({checked:,} rows in {len(checks)} files "
+            "checked against the Umm al-Qura table):"
+        )
+        bad = [row for row in checks if row[2] or row[3]]
+        for path, rows, mismatched, unconverted, example in bad[:10]:
+            print(f"  {path}: {mismatched:,} mismatched, {unconverted:,} unconverted of {rows:,}")
+            if example:
+                print(f"    e.g. {example}")
+        if not bad:
+            print("  all dates agree")
+
+    overlaps = conn.execute("""
+        SELECT a.path, b.path, o.shared_refs, o.shared_rows
+        FROM file_overlaps o
+        JOIN files a ON a.id = o.file_id
+        JOIN files b ON b.id = o.other_file_id
+        WHERE o.file_id > o.other_file_id
+        ORDER BY o.shared_rows DESC
+        LIMIT 5
+    """).fetchall()
+    if overlaps:
+        print("\nOVERLAPPING FILES (shared reference numbers):")
+        for path, other, refs, rows in overlaps:
+            print(f"  {path} ∩ {other}: {refs:,} refs, {rows:,} rows")
+
+    drift = conn.execute("""
+        SELECT path, notes FROM files
+        WHERE notes LIKE '%schema drift%'
+        ORDER BY path
+        LIMIT 10
+    """).fetchall()
+    if drift:
+        print("\nSCHEMA DRIFT (against known header layouts):")
+        for path, notes in drift:
+            reasons = [n for n in notes.split("; ") if n.startswith("schema drift")]
+            print(f"  {path}: {'; '.join(reasons)}")
 
     # Top canonical fields
     print("\nTOP CANONICAL FIELDS (by file coverage):")
@@ -666,21 +2009,570 @@ def print_summary(conn: sqlite3.Connection):
     """):
         print(f"  {canonical}: {fc} files")
 
+    if conn.execute("SELECT 1 FROM field_sketches LIMIT 1").fetchone():
+        print("\nMERGED DISTINCT COUNTS (from per-file sketches):")
+        for (canonical,) in conn.execute("""
+            SELECT canonical_name FROM field_aliases
+            GROUP BY canonical_name ORDER BY SUM(file_count) DESC LIMIT 10
+        """).fetchall():
+            merged = merge_field_sketches(conn, canonical_name=canonical)
+            if merged:
+                err = merged["distinct_error"]
+                bound = f" ±{err:.1%}" if err else ""
+                print(f"  {canonical}: ~{merged['distinct_count']:,}{bound}")
+
+    if timing:
+        serial_seconds, wall_seconds, jobs = timing
+        # Estimated from per-file times; bench_registry.py measures a real
+        # serial build
+        speedup = serial_seconds / wall_seconds if wall_seconds else 0.0
+        print(
+            f"\nProfiling: {serial_seconds:.1f}s of per-file work in "
+            f"{wall_seconds:.1f}s wall with {jobs} job(s) "
+            f"(estimated speedup {speedup:.2f}x over serial)"
+        )
+
+    build_id = conn.execute("SELECT MAX(id) FROM builds").fetchone()[0]
+    slowest = conn.execute(
+        """
+        SELECT path, wall_seconds, row_count, bytes_read FROM build_stats
+        WHERE build_id = ? AND stage = 'total'
+        ORDER BY wall_seconds DESC LIMIT 5
+    """,
+        (build_id,),
+    ).fetchall()
+    if slowest:
+        print("\nSLOWEST FILES (this build):")
+        for path, wall, rows, size in slowest:
+            rate = f"{rows / wall:,.0f} rows/s" if rows and wall else "-"
+            mb = f"{size / 2**20 / wall:.1f} MB/s" if size and wall else "-"
+            print(f"  {path}: {wall:.2f}s ({rate}, {mb})")
+
     print(f"\nDatabase: {DB_PATH}")
     print(f"Size: {DB_PATH.stat().st_size / 1024:.0f} KB")
 
 
-def main():
+BUILD_COLUMNS = (
+    "id, started_at, mode, jobs, backend, file_count, row_count, bytes_read, "
+    "wall_seconds, cpu_seconds"
+)
+BUILD_STATS_COLUMNS = (
+    "build_id, path, stage, wall_seconds, cpu_seconds, row_count, bytes_read, "
+    "peak_memory"
+)
+
+
+def read_build_history(db_path: Path) -> tuple[list[tuple], list[tuple]]:
+    """Return the (builds, build_stats) rows of an existing registry.
+
+    A full rebuild starts from an empty database; main() carries these rows
+    over so throughput can be compared across builds.
+    """
+    conn = sqlite3.connect(str(db_path))
+    try:
+        builds = conn.execute(f"SELECT {BUILD_COLUMNS} FROM builds").fetchall()
+        stats = conn.execute(f"SELECT {BUILD_STATS_COLUMNS} FROM build_stats").fetchall()
+    except sqlite3.OperationalError:  # registry predates build stats
+        builds, stats = [], []
+    conn.close()
+    return builds, stats
+
+
+def restore_build_history(conn: sqlite3.Connection, history: tuple[list, list]):
+    builds, stats = history
+    conn.executemany(
+        f"INSERT INTO builds ({BUILD_COLUMNS}) VALUES ({', '.join('?' * 10)})", builds
+    )
+    conn.executemany(
+        f"INSERT INTO build_stats ({BUILD_STATS_COLUMNS}) VALUES ({', '.join('?' * 8)})",
+        stats,
+    )
+
+
+LAYOUT_COLUMNS = (
+    "fingerprint, col_count, headers, column_types, canonical_names, file_count, "
+    "first_build"
+)
+
+
+def read_layouts(db_path: Path) -> list[tuple]:
+    """Return the layouts rows of an existing registry.
+
+    Like the build history, known header layouts survive a full rebuild,
+    so files are still checked for drift against the earlier builds.
+    """
+    conn = sqlite3.connect(str(db_path))
+    try:
+        rows = conn.execute(f"SELECT {LAYOUT_COLUMNS} FROM layouts").fetchall()
+    except sqlite3.OperationalError:  # registry predates layouts
+        rows = []
+    conn.close()
+    return rows
+
+
+def restore_layouts(conn: sqlite3.Connection, rows: list[tuple]):
+    conn.executemany(
+        f"INSERT INTO layouts ({LAYOUT_COLUMNS}) VALUES ({', '.join('?' * 7)})", rows
+    )
+
+
+def known_layouts(conn: sqlite3.Connection) -> dict[str, list]:
+    """Header fingerprint → column types (None = not yet seen with values)."""
+    return {
+        fingerprint: json.loads(types)
+        for fingerprint, types in conn.execute(
+            "SELECT fingerprint, column_types FROM layouts"
+        )
+    }
+
+
+def update_layouts(conn: sqlite3.Connection, build_id: int) -> int:
+    """Register the header layouts of new files and refresh file counts.
+
+    A layout's headers and canonical names come from its first file; each
+    column's type from the first file that has values in it. Stored types
+    are never overwritten, so later files are validated against the
+    layout as first seen. Returns the number of new layouts.
+    """
+    stored = known_layouts(conn)
+    first_file: dict[str, int] = {}
+    names: dict[str, list[tuple]] = {}
+    types: dict[str, list] = {}
+    for file_id, layout, ordinal, name, canonical, data_type, has_values in conn.execute("""
+        SELECT fi.id, fi.layout, f.ordinal, f.name_ar, f.canonical_name, f.data_type,
+               f.null_count < fi.row_count
+        FROM fields f JOIN files fi ON fi.id = f.file_id
+        WHERE fi.layout IS NOT NULL
+        ORDER BY fi.id, f.ordinal
+    """):
+        if first_file.setdefault(layout, file_id) == file_id:
+            names.setdefault(layout, []).append((name, canonical))
+        col_types = types.setdefault(layout, stored.get(layout, []))
+        col_types.extend([None] * (ordinal + 1 - len(col_types)))
+        if col_types[ordinal] is None and has_values:
+            col_types[ordinal] = data_type
+
+    new = 0
+    for layout, cols in names.items():
+        if layout in stored:
+            conn.execute(
+                "UPDATE layouts SET column_types = ? WHERE fingerprint = ?",
+                (json.dumps(types[layout]), layout),
+            )
+            continue
+        conn.execute(
+            f"INSERT INTO layouts ({LAYOUT_COLUMNS}) VALUES (?, ?, ?, ?, ?, 0, ?)",
+            (
+                layout,
+                len(cols),
+                json.dumps([name for name, _ in cols], ensure_ascii=False),
+                json.dumps(types[layout]),
+                json.dumps([canonical for _, canonical in cols]),
+                build_id,
+            ),
+        )
+        new += 1
+    conn.execute("""
+        UPDATE layouts SET file_count =
+            (SELECT COUNT(*) FROM files WHERE files.layout = layouts.fingerprint)
+    """)
+    return new
+
+
+def start_build(conn: sqlite3.Connection, mode: str, jobs: int, backend: str) -> int:
+    cur = conn.execute(
+        """
+        INSERT INTO builds (started_at, mode, jobs, backend)
+        VALUES (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'), ?, ?, ?)
+    """,
+        (mode, jobs, backend),
+    )
+    return cur.lastrowid
+
+
+def record_file_stats(
+    conn: sqlite3.Connection, build_id: int, rel_path: str, stats: dict
+):
+    """Store one file's per-stage times plus a "total" row."""
+    rows = stats.get("rows")
+    size = stats.get("bytes")
+    conn.executemany(
+        f"INSERT INTO build_stats ({BUILD_STATS_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (build_id, rel_path, stage, wall, cpu, rows, size, None)
+            for stage, (wall, cpu) in stats["stages"].items()
+        ]
+        + [
+            (
+                build_id,
+                rel_path,
+                "total",
+                stats["wall"],
+                stats["cpu"],
+                rows,
+                size,
+                stats.get("peak_memory"),
+            )
+        ],
+    )
+
+
+def finish_build(
+    conn: sqlite3.Connection, build_id: int, timer: StageTimer, wall_seconds: float
+):
+    """Store the build-wide stage times and the build's totals.
+
+    The build's CPU time is the per-file work (wherever it ran) plus the
+    writer's build-wide stages other than "profile", which with one job
+    would count the per-file work twice.
+    """
+    conn.executemany(
+        f"INSERT INTO build_stats ({BUILD_STATS_COLUMNS}) VALUES (?, NULL, ?, ?, ?, NULL, NULL, NULL)",
+        [(build_id, stage, wall, cpu) for stage, (wall, cpu) in timer.stages().items()],
+    )
+    file_count, row_count, bytes_read, file_cpu = conn.execute(
+        """
+        SELECT SUM(stage = 'total'),
+            SUM(CASE WHEN stage = 'total' THEN row_count END),
+            SUM(CASE WHEN stage = 'total' THEN bytes_read END),
+            SUM(CASE WHEN stage IN ('total', 'insert') THEN cpu_seconds END)
+        FROM build_stats
+        WHERE build_id = ? AND path IS NOT NULL
+    """,
+        (build_id,),
+    ).fetchone()
+    other_cpu = sum(cpu for stage, cpu in timer.cpu.items() if stage != "profile")
+    conn.execute(
+        """
+        UPDATE builds SET file_count = ?, row_count = ?, bytes_read = ?,
+            wall_seconds = ?, cpu_seconds = ?
+        WHERE id = ?
+    """,
+        (
+            file_count or 0,
+            row_count or 0,
+            bytes_read or 0,
+            wall_seconds,
+            (file_cpu or 0.0) + other_cpu,
+            build_id,
+        ),
+    )
+
+
+def _rates(wall: float, rows: int | None, size: int | None) -> dict:
+    return {
+        "rows_per_sec": round(rows / wall, 1) if rows and wall else None,
+        "mb_per_sec": round(size / 2**20 / wall, 3) if size and wall else None,
+    }
+
+
+def build_stats_report(conn: sqlite3.Connection, build_id: int) -> dict:
+    """JSON-ready report of one build.
+
+    Holds the build totals, the build-wide stage times, the per-file stage
+    times summed over all files and every file's own stages, slowest first.
+    """
+    build = dict(
+        zip(
+            BUILD_COLUMNS.split(", "),
+            conn.execute(
+                f"SELECT {BUILD_COLUMNS} FROM builds WHERE id = ?", (build_id,)
+            ).fetchone(),
+        )
+    )
+    build.update(_rates(build["wall_seconds"], build["row_count"], build["bytes_read"]))
+
+    # Build-wide stages (path NULL) and per-file stages summed over files
+    stages = {}
+    file_stages = {}
+    for per_file, stage, wall, cpu in conn.execute(
+        """
+        SELECT path IS NOT NULL, stage, SUM(wall_seconds), SUM(cpu_seconds)
+        FROM build_stats
+        WHERE build_id = ? AND stage != 'total'
+        GROUP BY path IS NOT NULL, stage ORDER BY MIN(rowid)
+    """,
+        (build_id,),
+    ):
+        target = file_stages if per_file else stages
+        target[stage] = {"wall_seconds": wall, "cpu_seconds": cpu}
+
+    files: dict[str, dict] = {}
+    for path, stage, wall, cpu, rows, size, peak in conn.execute(
+        """
+        SELECT path, stage, wall_seconds, cpu_seconds, row_count, bytes_read,
+            peak_memory
+        FROM build_stats WHERE build_id = ? AND path IS NOT NULL
+        ORDER BY path
+    """,
+        (build_id,),
+    ):
+        rec = files.setdefault(path, {"path": path, "stages": {}})
+        if stage == "total":
+            rec.update(
+                {
+                    "row_count": rows,
+                    "bytes_read": size,
+                    "wall_seconds": wall,
+                    "cpu_seconds": cpu,
+                    "peak_memory": peak,
+                    **_rates(wall, rows, size),
+                }
+            )
+        else:
+            rec["stages"][stage] = {"wall_seconds": wall, "cpu_seconds": cpu}
+
+    return {
+        "build": build,
+        "stages": stages,
+        "file_stages": file_stages,
+        "files": sorted(
+            files.values(), key=lambda f: f.get("wall_seconds") or 0.0, reverse=True
+        ),
+    }
+
+
+def _profile_worker(
+    csv_path: Path,
+    sketch: bool = False,
+    use_accel: bool | None = None,
+    cprofile_dir: Path | None = None,
+    trace_memory: bool = False,
+    layouts: dict[str, list] | None = None,
+) -> tuple[Path, dict | None, str | None, dict]:
+    """Profile one file in a worker. Returns (path, profile, error, stats).
+
+    `stats` holds the file's total wall/CPU seconds, per-stage times and,
+    with `trace_memory`, the peak traced allocation. With `cprofile_dir`
+    the file's cProfile stats are dumped to ``<cprofile_dir>/<path>.prof``.
+    """
+    timer = StageTimer()
+    stats: dict = {}
+    cprofile_path = None
+    if cprofile_dir:
+        cprofile_path = cprofile_dir / (str(csv_path.relative_to(BASE_DIR)) + ".prof")
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    try:
+        with file_hooks(stats, cprofile_path, trace_memory):
+            profile = profile_file(
+                csv_path, sketch=sketch, use_accel=use_accel, timer=timer, layouts=layouts
+            )
+        error = None
+    except Exception:
+        profile = None
+        error = traceback.format_exc()
+    stats["wall"] = time.perf_counter() - wall0
+    stats["cpu"] = time.process_time() - cpu0
+    stats["stages"] = timer.stages()
+    if profile:
+        stats["rows"] = profile["file"]["row_count"]
+        stats["bytes"] = profile["file"]["file_size"]
+    return csv_path, profile, error, stats
+
+
+def _profile_split_worker(
+    csv_path: Path,
+    pool: multiprocessing.pool.Pool,
+    parts: int,
+    sketch: bool = False,
+    use_accel: bool | None = None,
+    layouts: dict[str, list] | None = None,
+) -> tuple[Path, dict | None, str | None, dict]:
+    """``_profile_worker`` for a file split across the pool (runs in the parent).
+
+    The cProfile / tracemalloc hooks don't apply: the work is in the pool.
+    """
+    timer = StageTimer()
+    stats: dict = {}
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    worker_cpu = 0.0
+    try:
+        profile, worker_cpu = profile_file_split(
+            csv_path,
+            pool,
+            parts,
+            sketch=sketch,
+            use_accel=use_accel,
+            timer=timer,
+            layouts=layouts,
+        )
+        error = None
+    except Exception:
+        profile = None
+        error = traceback.format_exc()
+    stats["wall"] = time.perf_counter() - wall0
+    stats["cpu"] = time.process_time() - cpu0 + worker_cpu
+    stats["stages"] = timer.stages()
+    if profile:
+        stats["rows"] = profile["file"]["row_count"]
+        stats["bytes"] = profile["file"]["file_size"]
+    return csv_path, profile, error, stats
+
+
+def profile_results(
+    csvs: list[Path], worker, pool=None, split_worker=None, split_bytes: int = 0
+):
+    """Yield worker results for `csvs` in file order.
+
+    Without a pool files are profiled one by one. With one, files are spread
+    across it, except that files larger than `split_bytes` go to
+    `split_worker` (when given), which splits them across the whole pool.
+    Compressed files are never split: a stream can't be read from the middle.
+    """
+    if pool is None:
+        yield from map(worker, csvs)
+        return
+    run: list[Path] = []
+    for csv_path in csvs:
+        if (
+            split_worker
+            and not compressed.compression(csv_path)
+            and csv_path.stat().st_size > split_bytes
+        ):
+            yield from pool.imap(worker, run)
+            run = []
+            yield split_worker(csv_path)
+        else:
+            run.append(csv_path)
+    yield from pool.imap(worker, run)
+
+
+def write_profiles(
+    conn: sqlite3.Connection, results, build_id: int | None = None
+) -> float:
+    """Insert worker results in file order, committing every WRITE_BATCH_FILES.
+
+    With `build_id`, each file's stage times (plus its "insert" time) are
+    recorded in build_stats. Returns an estimate of the serial profiling
+    time: each file's profiling CPU time plus its insert time. (Worker wall
+    times would overstate it whenever jobs outnumber cores, and a split
+    file's wall time is already parallel.)
+    """
+    serial_seconds = 0.0
+    pending = 0
+    for csv_path, profile, error, stats in results:
+        serial_seconds += stats["cpu"]
+        rel_path = str(csv_path.relative_to(BASE_DIR))
+        source, category = classify_file(csv_path.name)
+        print(f"  {rel_path} [{source}/{category}]", end="")
+        if error:
+            print(f"  ERROR: {error.strip().splitlines()[-1]}")
+            print(error, end="", file=sys.stderr)
+        elif profile is None:
+            print(" (empty)")
+        else:
+            timer = StageTimer()
+            with timer("insert"):
+                insert_profile(conn, profile)
+            stats["stages"].update(timer.stages())
+            serial_seconds += stats["stages"]["insert"][0]
+            fr = profile["file"]
+            print(f"  ({fr['row_count']} rows, {fr['col_count']} cols)", flush=True)
+        if build_id is not None:
+            record_file_stats(conn, build_id, rel_path, stats)
+        pending += 1
+        if pending >= WRITE_BATCH_FILES:
+            conn.commit()
+            pending = 0
+    conn.commit()
+    return serial_seconds
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the REGA/MOJ data registry.")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="worker processes for profiling (0 = one per CPU; default 1)",
+    )
+    parser.add_argument(
+        "--split-mb",
+        type=float,
+        default=0,
+        metavar="MB",
+        help="with --jobs > 1, profile files larger than MB megabytes as "
+        "byte-range chunks across all workers (default: off)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-profile new or changed files, keeping the existing registry",
+    )
+    parser.add_argument(
+        "--sketch",
+        action="store_true",
+        help="use fixed-memory HyperLogLog / Misra-Gries sketches for distinct "
+        "counts and enum candidates instead of exact sets",
+    )
+    parser.add_argument(
+        "--no-accel",
+        action="store_true",
+        help="don't use the pyarrow fast path even if pyarrow is installed",
+    )
+    parser.add_argument(
+        "--load-data",
+        action="store_true",
+        help="also load every file into typed fact tables in data.db",
+    )
+    parser.add_argument(
+        "--export-parquet",
+        action="store_true",
+        help="export the fact tables in data.db to partitioned Parquet "
+        "(needs pyarrow)",
+    )
+    parser.add_argument(
+        "--stats-json",
+        type=Path,
+        metavar="PATH",
+        help="also write this build's per-stage timings as a JSON report",
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        metavar="DIR",
+        help="run cProfile on every file and dump DIR/<path>.prof",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="record each file's peak traced memory in build_stats (slow)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    jobs = args.jobs or os.cpu_count() or 1
+    build_timer = StageTimer()
+    build_start = time.perf_counter()
+
     print("REGA/MOJ Data Registry Builder")
     print(f"Scanning: {BASE_DIR}")
     print()
 
     # Discover CSVs
-    csvs = discover_csvs()
+    with build_timer("discover"):
+        csvs = discover_csvs()
     print(f"Found {len(csvs)} CSV files\n")
 
-    # Remove old DB
-    if DB_PATH.exists():
+    incremental = False
+    if args.incremental and DB_PATH.exists():
+        conn = sqlite3.connect(str(DB_PATH))
+        incremental = schema_is_current(conn)
+        conn.close()
+        if not incremental:
+            print("Existing registry predates the current schema — doing a full rebuild\n")
+
+    # Remove old DB, keeping its build history and known header layouts
+    history = None
+    layout_rows: list[tuple] = []
+    if not incremental and DB_PATH.exists():
+        history = read_build_history(DB_PATH)
+        layout_rows = read_layouts(DB_PATH)
         DB_PATH.unlink()
 
     conn = sqlite3.connect(str(DB_PATH))
@@ -688,37 +2580,151 @@ def main():
     conn.execute("PRAGMA synchronous=NORMAL")
 
     create_schema(conn)
+    if history:
+        restore_build_history(conn, history)
+    restore_layouts(conn, layout_rows)
+    layouts = known_layouts(conn)
+
+    use_accel = accel.available() and not args.no_accel
+    backend = "pyarrow" if use_accel else "stdlib"
+    build_id = start_build(
+        conn, "incremental" if incremental else "full", jobs, backend
+    )
 
-    # Process each file
-    print("Processing files:")
-    for csv_path in csvs:
-        try:
-            process_file(csv_path, conn)
-            conn.commit()
-        except Exception as e:
-            print(f"  ERROR: {e}")
-            import traceback
-
-            traceback.print_exc()
+    removed = 0
+    if incremental:
+        with build_timer("plan"):
+            csvs, stale_ids, unchanged, removed = plan_incremental(conn, csvs)
+        print(
+            f"Incremental: {unchanged} unchanged, {len(csvs)} new/changed, "
+            f"{removed} removed\n"
+        )
+        delete_file_entries(conn, stale_ids)
+        conn.commit()
+
+    # Process each file — workers profile, this process is the only writer
+    print(f"Processing files ({jobs} job{'s' if jobs != 1 else ''}, {backend}):")
+    worker = functools.partial(
+        _profile_worker,
+        sketch=args.sketch,
+        use_accel=use_accel,
+        cprofile_dir=args.cprofile,
+        trace_memory=args.tracemalloc,
+        layouts=layouts,
+    )
+    split_bytes = int(args.split_mb * 2**20)
+    wall_start = time.perf_counter()
+    with build_timer("profile"):
+        if jobs > 1 and (len(csvs) > 1 or split_bytes):
+            with multiprocessing.Pool(jobs) as pool:
+                split_worker = None
+                if split_bytes:
+                    split_worker = functools.partial(
+                        _profile_split_worker,
+                        pool=pool,
+                        parts=jobs,
+                        sketch=args.sketch,
+                        use_accel=use_accel,
+                        layouts=layouts,
+                    )
+                results = profile_results(
+                    csvs, worker, pool, split_worker, split_bytes
+                )
+                serial_seconds = write_profiles(conn, results, build_id)
+        else:
+            serial_seconds = write_profiles(
+                conn, profile_results(csvs, worker), build_id
+            )
+    wall_seconds = time.perf_counter() - wall_start
+
+    # Header layouts: register new ones, count files that drifted
+    with build_timer("layouts"):
+        new_layouts = update_layouts(conn, build_id)
+        conn.commit()
+    drifted = conn.execute(
+        "SELECT COUNT(*) FROM files WHERE notes LIKE '%schema drift%'"
+    ).fetchone()[0]
+    print(
+        f"\nHeader layouts: {len(layouts)} known, {new_layouts} new; "
+        f"{drifted} file(s) with schema drift"
+    )
 
     # Build cross-file aliases
     print("\nBuilding field aliases...")
-    build_field_aliases(conn)
-    conn.commit()
+    with build_timer("aliases"):
+        build_field_aliases(conn)
+        conn.commit()
+
+    # Unpivot the MOJ-RE-Index exports
+    from pivot_index import load_index_values
+
+    with build_timer("pivots"):
+        decoded = load_index_values(conn)
+    if decoded:
+        print("Decoding pivot tables...")
+        for rel_path, n in decoded.items():
+            print(f"  {rel_path}: {n:,} index values")
+
+    # Reference numbers counted in more than one file (unchanged if no file changed)
+    if not incremental or csvs or removed:
+        print("Checking reference numbers across files...")
+        with build_timer("dedup"):
+            dups = find_duplicates(conn, BASE_DIR)
+        print(
+            f"  {dups['refs']:,} references in {dups['files']} files: "
+            f"{dups['duplicated_refs']:,} in more than one file, "
+            f"{dups['duplicate_rows']:,} repeated rows"
+        )
+
+    # Full-text index over headers, names, values and places
+    from search_index import build_search_index
+
+    with build_timer("search"):
+        terms = build_search_index(conn)
+    print(f"Indexed {terms:,} search terms")
 
     # Create indexes
     print("Creating indexes...")
-    conn.executescript("""
-        CREATE INDEX IF NOT EXISTS idx_fields_file_id ON fields(file_id);
-        CREATE INDEX IF NOT EXISTS idx_fields_canonical ON fields(canonical_name);
-        CREATE INDEX IF NOT EXISTS idx_enum_field_id ON enum_values(field_id);
-        CREATE INDEX IF NOT EXISTS idx_samples_file_id ON samples(file_id);
-        CREATE INDEX IF NOT EXISTS idx_aliases_canonical ON field_aliases(canonical_name);
-        CREATE INDEX IF NOT EXISTS idx_files_source_cat ON files(source, category);
-    """)
+    with build_timer("indexes"):
+        create_indexes(conn)
+        conn.execute("PRAGMA optimize")
+        conn.commit()
+
+    if args.load_data:
+        from fact_store import DATA_DB_PATH, load_fact_tables, unparsed_values
+
+        print(f"Loading fact tables into {DATA_DB_PATH.name}...")
+        with build_timer("load_data"):
+            loaded = load_fact_tables(conn, full=not incremental)
+        for category, n in sorted(loaded.items()):
+            print(f"  fact_{category}: {n:,} rows")
+        unparsed = unparsed_values()
+        if unparsed:
+            total = sum(n for _, n in unparsed)
+            print(f"  {total:,} unparseable values stored as NULL, in {len(unparsed)} file(s):")
+            for path, n in unparsed[:10]:
+                print(f"    {path}: {n:,}")
+
+    if args.export_parquet:
+        from parquet_export import PARQUET_DIR, export_parquet, have_pyarrow
+
+        if have_pyarrow():
+            print(f"Exporting Parquet to {PARQUET_DIR}...")
+            with build_timer("export_parquet"):
+                export_parquet()
+        else:
+            print("pyarrow not installed — skipping Parquet export")
+
+    finish_build(conn, build_id, build_timer, time.perf_counter() - build_start)
     conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    if args.stats_json:
+        report = build_stats_report(conn, build_id)
+        args.stats_json.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"Build stats written to {args.stats_json}")
 
-    print_summary(conn)
+    print_summary(conn, timing=(serial_seconds, wall_seconds, jobs))
     conn.close()
 
 
@@ -0,0 +1,183 @@
+"""
+Byte-level line scanning for memory-mapped CSV files.
+
+``LineScanner`` walks a UTF-8 CSV in raw bytes: it finds line boundaries,
+drops comma/whitespace-only lines with one regex pass per chunk, and only
+decodes the lines that carry data. Files bloated by the open-data platform
+export (a million ``,,,,,,`` rows) cost about as much as their real rows.
+
+Line offsets are tracked per line for the header and the first lines (the
+registry samples, see ``track_offsets``), and at chunk granularity after
+that — enough for ``data_offset``/``data_end`` in the registry, so readers
+can seek straight to the data.
+
+Lines are split on ``\\n`` before blank lines are dropped, so a quoted field
+spanning lines must not contain a blank-looking line; the corpus has no
+multi-line fields at all.
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import io
+import mmap
+import re
+from typing import Iterator
+
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# Bytes scanned per regex/decode pass once offsets are no longer tracked
+CHUNK_BYTES = 256 * 1024
+
+# A run of lines holding only commas and whitespace, matched together with
+# the newline before each of them (plus a non-empty such tail at EOF).
+# Anchoring on the literal "\n" lets the regex engine skip ahead quickly.
+_BLANK_RUN = re.compile(
+    rb"\n[ \t\r,]*(?:\n[ \t\r,]*)*(?=\n)|\n[ \t\r,]+\Z"
+)
+_BLANK_BYTES = b" \t\r\n,"
+
+
+def is_blank(line: bytes) -> bool:
+    return not line.strip(_BLANK_BYTES)
+
+
+def drop_blank_lines(raw: bytes) -> tuple[bytes, int]:
+    """Remove the blank lines from whole lines of bytes.
+
+    Returns (remaining bytes, number of lines removed).
+    """
+    # Lead with the newline that ended the previous line, so a blank first
+    # line is matched like any other
+    lines = b"\n" + raw
+    kept = _BLANK_RUN.sub(b"", lines)
+    return kept[1:], lines.count(b"\n") - kept.count(b"\n")
+
+
+def record_boundaries(
+    buf: mmap.mmap | bytes, start: int, end: int, parts: int
+) -> list[int]:
+    """Split buf[start:end] into about `parts` ranges of whole CSV records.
+
+    Returns the offsets [start, ..., end]. Each inner boundary is just past
+    a newline with an even number of quote characters before it (counted
+    from `start`, which must itself be a record boundary), so a quoted
+    field such as ``"27,037,742"`` is never split between two ranges.
+    """
+    bounds = [start]
+    quotes = 0
+    pos = start
+    step = max(1, (end - start) // max(1, parts))
+    for target in range(start + step, end, step):
+        if target <= pos:
+            continue
+        quotes += buf[pos:target].count(b'"')
+        pos = target
+        # Advance to the end of the line, then on until outside quotes
+        while pos < end:
+            nl = buf.find(b"\n", pos, end)
+            if nl == -1:
+                pos = end
+                break
+            quotes += buf[pos : nl + 1].count(b'"')
+            pos = nl + 1
+            if quotes % 2 == 0:
+                break
+        if pos >= end:
+            break
+        bounds.append(pos)
+    bounds.append(end)
+    return bounds
+
+
+class LineScanner:
+    """Iterate the lines of a CSV held in an mmap (or any bytes buffer).
+
+    ``header()`` returns the first line; ``lines()`` then yields the decoded
+    non-blank lines after it, in order, with their line endings (the shape
+    ``csv.reader`` expects). While ``track_offsets`` is set, ``line_offset``
+    and ``raw_line`` describe the line last yielded; the caller clears it
+    once it has what it needs and the scanner switches to chunked mode.
+
+    The buffer may also be a ``compressed.StreamBuffer``, whose length is
+    only an upper bound until its stream has been read to the end.
+    """
+
+    def __init__(self, buf: mmap.mmap | bytes, encoding: str = "utf-8"):
+        self.buf = buf
+        # utf-8-sig only differs from utf-8 by the BOM, which we skip here
+        self.encoding = "utf-8" if encoding == "utf-8-sig" else encoding
+        self.start = len(UTF8_BOM) if buf[: len(UTF8_BOM)] == UTF8_BOM else 0
+        self.blank_lines = 0
+        self.track_offsets = True
+        self.line_offset: int | None = None
+        self.raw_line: str | None = None
+        # Offset of the first data line / just past the last non-blank line
+        self.data_offset: int | None = None
+        self.data_end = self.start
+
+    def _line_end(self, pos: int, end: int) -> int:
+        nl = self.buf.find(b"\n", pos, end)
+        return end if nl == -1 else nl + 1
+
+    def header(self) -> tuple[str | None, int]:
+        """Return (decoded header line or None if empty, offset after it)."""
+        end = len(self.buf)
+        if self.start >= end:
+            return None, end
+        line = self.buf[self.start : self._line_end(self.start, end)]
+        if not line:
+            return None, end
+        self.data_end = self.start + len(line)
+        return line.decode(self.encoding), self.data_end
+
+    def lines(self, pos: int, end: int | None = None) -> Iterator[str]:
+        """Yield the non-blank lines in buf[pos:end] (end defaults to EOF)."""
+        buf = self.buf
+        if end is None:
+            end = len(buf)
+        encoding = self.encoding
+
+        while pos < end and self.track_offsets:
+            line = buf[pos : self._line_end(pos, end)]
+            if not line:
+                break  # end of a stream shorter than `end`
+            stop = pos + len(line)
+            if is_blank(line):
+                self.blank_lines += 1
+            else:
+                if self.data_offset is None:
+                    self.data_offset = pos
+                self.data_end = stop
+                self.line_offset = pos
+                self.raw_line = line.decode(encoding)
+                yield self.raw_line
+            pos = stop
+
+        released = 0
+        while pos < end:
+            stop = self._line_end(min(pos + CHUNK_BYTES, end) - 1, end)
+            raw = buf[pos:stop]
+            chunk, blanks = drop_blank_lines(raw)
+            self.blank_lines += blanks
+            if chunk:
+                if self.data_offset is None:
+                    self.data_offset = pos + len(raw) - len(raw.lstrip(_BLANK_BYTES))
+                    self.data_offset = buf.rfind(b"\n", pos, self.data_offset) + 1 or pos
+                last = len(raw.rstrip(_BLANK_BYTES))
+                nl = raw.find(b"\n", last)
+                self.data_end = pos + (len(raw) if nl == -1 else nl + 1)
+            del raw
+            pos = stop
+            yield from io.StringIO(chunk.decode(encoding), newline="")
+            released = self._release(released, pos)
+
+    def _release(self, released: int, pos: int) -> int:
+        """Drop already-scanned pages from this process's resident set."""
+        upto = pos - pos % mmap.PAGESIZE
+        if upto > released and isinstance(self.buf, mmap.mmap):
+            if hasattr(mmap, "MADV_DONTNEED"):
+                self.buf.madvise(mmap.MADV_DONTNEED, released, upto - released)
+            return upto
+        return released
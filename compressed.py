@@ -0,0 +1,228 @@
+"""
+Streaming reads of compressed CSVs: ``.csv.gz``, ``.csv.zst`` and the CSV
+members of ``.zip`` archives.
+
+The corpus compresses about 10x, so it can be stored and shipped that way.
+Every reader in the builder goes through ``open_stream`` (a decompressing
+file object) or ``open_buffer`` (what ``bytescan.LineScanner`` scans): a
+plain CSV is memory-mapped as before, a compressed one is wrapped in a
+``StreamBuffer``, which decompresses on demand into a sliding window. Files
+are never extracted to disk and only a few MB of each is held in memory.
+
+A zip member is addressed as a path below its archive,
+``MOJ-Sales/corpus.zip/MOJ-Sales-2024-Q1.csv``, so registry paths, file
+names and classification work unchanged. Offsets stored in the registry
+(``data_offset``, ``data_end``, sample ``byte_offset``) are positions in the
+decompressed data; readers of a compressed file skip forward to them.
+
+``.csv.zst`` needs the optional ``zstandard`` package; without it those
+files are left out of discovery. Everything else is stdlib only.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import mmap
+import sys
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Decompressed bytes read per refill of a StreamBuffer window
+READ_BYTES = 1024 * 1024
+# Consumed bytes a StreamBuffer keeps before trimming its window
+KEEP_BYTES = 4 * 1024 * 1024
+
+
+def zstd_available() -> bool:
+    return zstandard is not None
+
+
+def archive_member(path: Path) -> tuple[Path, str] | None:
+    """(archive, member name) if `path` lies inside a .zip archive."""
+    for parent in path.parents:
+        if parent.suffix.lower() == ".zip" and parent.is_file():
+            return parent, path.relative_to(parent).as_posix()
+    return None
+
+
+def compression(path: Path) -> str | None:
+    """'gzip', 'zstd', 'zip' or None for a plain CSV."""
+    name = path.name.lower()
+    if name.endswith(".gz"):
+        return "gzip"
+    if name.endswith(".zst"):
+        return "zstd"
+    if archive_member(path):
+        return "zip"
+    return None
+
+
+def csv_sources(path: Path) -> list[Path]:
+    """The CSVs a file on disk provides: itself, or an archive's CSV members."""
+    name = path.name.lower()
+    if name.endswith((".csv", ".csv.gz")):
+        return [path]
+    if name.endswith(".csv.zst"):
+        return [path] if zstd_available() else []
+    if name.endswith(".zip"):
+        try:
+            with zipfile.ZipFile(path) as zf:
+                members = [
+                    info.filename
+                    for info in zf.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith(".csv")
+                ]
+        except zipfile.BadZipFile:
+            return []
+        return [path / member for member in members]
+    return []
+
+
+def zip_info(path: Path) -> zipfile.ZipInfo:
+    archive, member = archive_member(path)
+    with zipfile.ZipFile(archive) as zf:
+        return zf.getinfo(member)
+
+
+def source_stat(path: Path) -> tuple[int, float]:
+    """(bytes on disk, mtime) — a zip member's compressed size and its
+    archive's mtime."""
+    member = archive_member(path)
+    if member is None:
+        stat = path.stat()
+        return stat.st_size, stat.st_mtime
+    archive, _ = member
+    return zip_info(path).compress_size, archive.stat().st_mtime
+
+
+def open_stream(path: Path) -> BinaryIO:
+    """A binary file object over the decompressed contents of `path`."""
+    kind = compression(path)
+    if kind == "gzip":
+        return gzip.open(path, "rb")
+    if kind == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"{path.name}: reading .zst files needs zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_across_frames=True, closefd=True
+        )
+    if kind == "zip":
+        archive, member = archive_member(path)
+        # The member keeps the archive's file handle open until it is closed
+        with zipfile.ZipFile(archive) as zf:
+            return zf.open(member)
+    return open(path, "rb")
+
+
+def detect_encoding(path: Path) -> tuple[str, bool]:
+    """Check for UTF-8 BOM. Returns (encoding, has_bom)."""
+    with open_stream(path) as f:
+        head = f.read(3)
+    if head == b"\xef\xbb\xbf":
+        return "utf-8-sig", True
+    return "utf-8", False
+
+
+class StreamBuffer:
+    """The slice/find view of a byte buffer that ``LineScanner`` needs, over
+    a forward-only decompressing stream.
+
+    Bytes are decompressed as slices and searches reach them, and dropped
+    once a slice starts ``KEEP_BYTES`` past them; asking for an already
+    dropped position is an error. ``len()`` is the decompressed size
+    when it is known up front (zip members) or once the stream has been read
+    to its end, and ``sys.maxsize`` until then — ``LineScanner`` only uses
+    it as an upper bound.
+    """
+
+    def __init__(self, stream: BinaryIO, size: int | None = None):
+        self._stream = stream
+        self._size = size
+        self._base = 0  # stream offset of _data[0]
+        self._data = bytearray()
+
+    def __len__(self) -> int:
+        return sys.maxsize if self._size is None else self._size
+
+    def _more(self) -> bool:
+        block = self._stream.read(READ_BYTES)
+        if not block:
+            self._size = self._base + len(self._data)
+            return False
+        self._data += block
+        return True
+
+    def _fill(self, stop: int):
+        while self._base + len(self._data) < stop and self._more():
+            pass
+
+    def _check(self, start: int):
+        if start < self._base:
+            raise ValueError(f"offset {start} was already released")
+
+    def _advance(self, start: int):
+        """Drop the bytes before `start` once enough have piled up."""
+        self._check(start)
+        if start - self._base < KEEP_BYTES:
+            return
+        while self._base + len(self._data) < start:
+            self._base += len(self._data)
+            self._data.clear()
+            if not self._more():
+                break
+        drop = min(start - self._base, len(self._data))
+        del self._data[:drop]
+        self._base += drop
+
+    def __getitem__(self, key: slice) -> bytes:
+        start, stop, _ = key.indices(len(self))
+        self._advance(start)
+        self._fill(stop)
+        return bytes(self._data[start - self._base : stop - self._base])
+
+    def find(self, sub: bytes, start: int = 0, end: int | None = None) -> int:
+        end = len(self) if end is None else end
+        self._check(start)
+        self._fill(start)
+        pos = start
+        while True:
+            loaded = self._base + len(self._data)
+            i = self._data.find(sub, pos - self._base, min(end, loaded) - self._base)
+            if i != -1:
+                return self._base + i
+            if loaded >= end or not self._more():
+                return -1
+            pos = max(start, loaded - len(sub) + 1)
+
+    def rfind(self, sub: bytes, start: int = 0, end: int | None = None) -> int:
+        end = len(self) if end is None else end
+        self._check(start)
+        self._fill(end)
+        loaded = self._base + len(self._data)
+        i = self._data.rfind(sub, start - self._base, min(end, loaded) - self._base)
+        return -1 if i == -1 else self._base + i
+
+
+@contextlib.contextmanager
+def open_buffer(path: Path) -> Iterator[mmap.mmap | StreamBuffer | bytes]:
+    """A scannable buffer over `path`: an mmap for a plain CSV, a
+    ``StreamBuffer`` for a compressed one."""
+    kind = compression(path)
+    if kind is None:
+        with open(path, "rb") as f:
+            if f.seek(0, 2) == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+        return
+    size = zip_info(path).file_size if kind == "zip" else None
+    with open_stream(path) as stream:
+        yield StreamBuffer(stream, size)
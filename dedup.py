@@ -0,0 +1,188 @@
+"""
+Cross-file duplicate detection on transaction reference numbers.
+
+The corpus has overlapping exports (same-quarter variants of the REGA sales
+indicators, MOJ quarterly files next to monthly drops), so a deal can be
+counted in more than one file. Every file with a ``transaction_ref`` or
+``reference_number`` column is streamed twice, in bounded memory:
+
+1. Each reference goes through a partitioned Bloom filter of everything
+   seen so far; references the filter has (probably) seen before go into a
+   second filter of candidates.
+2. References the candidate filter holds are written as (ref, file) pairs
+   to sorted runs on disk (``RUN_ROWS`` at a time), and the runs are merged.
+   A reference counts as duplicated only if the merge finds it in two or
+   more files, which drops the Bloom filters' false positives and repeats
+   within one file.
+
+Results go to the registry:
+
+    duplicate_refs   (ref, file_id, row_count) for each duplicated reference
+    file_overlaps    (file_id, other_file_id, shared_refs, shared_rows): how
+                     many references, and rows of file_id, each pair shares
+
+The first file (lowest id) holding a reference counts as its original;
+``duplicate_row_count`` is the rows of all later files that repeat one, so
+summaries can subtract them. Both tables are rebuilt on every build.
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import csv
+import heapq
+import itertools
+import sqlite3
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from bytescan import LineScanner
+from compressed import detect_encoding, open_buffer
+from sketches import BloomFilter
+
+# Columns holding a transaction's reference number, first present wins
+REF_FIELDS = ("transaction_ref", "reference_number")
+
+# (ref, file) pairs held in memory before a sorted run is spilled to disk
+RUN_ROWS = 200_000
+
+# Bloom filter false-positive rate (only costs extra candidates)
+BLOOM_ERROR = 0.01
+
+# (file_id, row_count) of each reference a later file repeats
+REPEATED_ROWS_SQL = """
+    SELECT d.file_id, d.row_count
+    FROM duplicate_refs d
+    WHERE d.file_id > (SELECT MIN(e.file_id) FROM duplicate_refs e WHERE e.ref = d.ref)
+"""
+
+
+def ref_columns(conn: sqlite3.Connection, base_dir: Path) -> list[tuple]:
+    """(file_id, path, ordinal, data_offset, data_end) of every file with refs.
+
+    Registry paths are relative to the corpus root `base_dir`.
+    """
+    columns = {}
+    for file_id, path, canonical, ordinal, data_offset, data_end in conn.execute(
+        f"""
+        SELECT fi.id, fi.path, f.canonical_name, f.ordinal, fi.data_offset, fi.data_end
+        FROM fields f JOIN files fi ON fi.id = f.file_id
+        WHERE f.canonical_name IN ({", ".join("?" * len(REF_FIELDS))})
+        ORDER BY fi.id, f.ordinal
+    """,
+        REF_FIELDS,
+    ):
+        rank = REF_FIELDS.index(canonical)
+        if file_id not in columns or rank < columns[file_id][0]:
+            columns[file_id] = (rank, base_dir / path, ordinal, data_offset, data_end)
+    return [(file_id, *rest) for file_id, (_, *rest) in columns.items()]
+
+
+def read_refs(filepath: Path, ordinal: int, data_offset: int | None, data_end: int | None):
+    """Yield the file's normalized reference numbers ("27,042,270" → "27042270")."""
+    encoding, _ = detect_encoding(filepath)
+    with open_buffer(filepath) as mm:
+        scanner = LineScanner(mm, encoding)
+        if data_offset is None:
+            _, data_offset = scanner.header()
+        scanner.track_offsets = False
+        for row in csv.reader(scanner.lines(data_offset, data_end)):
+            if ordinal >= len(row):
+                continue
+            ref = row[ordinal].strip().strip('"').replace(",", "")
+            if ref and ref.upper() != "NULL":
+                yield ref
+
+
+def _spill(pairs: list[tuple[str, int]], tmp: Path, n: int) -> Path:
+    pairs.sort()
+    path = tmp / f"run-{n:04d}.tsv"
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"{ref}\t{file_id}\n" for ref, file_id in pairs)
+    return path
+
+
+def _read_run(path: Path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            ref, file_id = line.rstrip("\n").split("\t")
+            yield ref, int(file_id)
+
+
+def find_duplicates(conn: sqlite3.Connection, base_dir: Path) -> dict[str, int]:
+    """Rebuild duplicate_refs and file_overlaps. Returns summary counts."""
+    sources = ref_columns(conn, base_dir)
+    capacity = conn.execute(
+        f"""
+        SELECT COALESCE(SUM(row_count), 0) FROM files
+        WHERE id IN (SELECT file_id FROM fields
+                     WHERE canonical_name IN ({", ".join("?" * len(REF_FIELDS))}))
+    """,
+        REF_FIELDS,
+    ).fetchone()[0]
+    seen = BloomFilter(max(capacity, 1), BLOOM_ERROR)
+    candidates = BloomFilter(max(capacity // 10, 1), BLOOM_ERROR)
+
+    # Pass 1: references that (probably) occur more than once
+    scanned = 0
+    for _, path, ordinal, data_offset, data_end in sources:
+        for ref in read_refs(path, ordinal, data_offset, data_end):
+            scanned += 1
+            if seen.add(ref):
+                candidates.add(ref)
+
+    conn.execute("DELETE FROM duplicate_refs")
+    conn.execute("DELETE FROM file_overlaps")
+    shared_refs: Counter = Counter()
+    shared_rows: Counter = Counter()
+    duplicated = 0
+
+    # Pass 2: candidate (ref, file) pairs into sorted runs, then merge
+    with tempfile.TemporaryDirectory(prefix="dedup-") as tmp:
+        runs = []
+        pairs: list[tuple[str, int]] = []
+        for file_id, path, ordinal, data_offset, data_end in sources:
+            for ref in read_refs(path, ordinal, data_offset, data_end):
+                if ref in candidates:
+                    pairs.append((ref, file_id))
+                    if len(pairs) >= RUN_ROWS:
+                        runs.append(_spill(pairs, Path(tmp), len(runs)))
+                        pairs = []
+        pairs.sort()
+        merged = heapq.merge(pairs, *(_read_run(run) for run in runs))
+
+        batch = []
+        for ref, group in itertools.groupby(merged, key=lambda pair: pair[0]):
+            rows = Counter(file_id for _, file_id in group)
+            if len(rows) < 2:
+                continue
+            duplicated += 1
+            batch.extend((ref, file_id, n) for file_id, n in rows.items())
+            for a, b in itertools.permutations(rows, 2):
+                shared_refs[a, b] += 1
+                shared_rows[a, b] += rows[a]
+            if len(batch) >= RUN_ROWS:
+                conn.executemany("INSERT INTO duplicate_refs VALUES (?, ?, ?)", batch)
+                batch = []
+        conn.executemany("INSERT INTO duplicate_refs VALUES (?, ?, ?)", batch)
+
+    conn.executemany(
+        "INSERT INTO file_overlaps VALUES (?, ?, ?, ?)",
+        [(a, b, n, shared_rows[a, b]) for (a, b), n in shared_refs.items()],
+    )
+    conn.commit()
+    return {
+        "files": len(sources),
+        "refs": scanned,
+        "duplicated_refs": duplicated,
+        "duplicate_rows": duplicate_row_count(conn),
+    }
+
+
+def duplicate_row_count(conn: sqlite3.Connection) -> int:
+    """Rows that repeat a reference already held by an earlier file."""
+    return conn.execute(
+        f"SELECT COALESCE(SUM(row_count), 0) FROM ({REPEATED_ROWS_SQL})"
+    ).fetchone()[0]
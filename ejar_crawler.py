@@ -0,0 +1,761 @@
+#!/usr/bin/env python3
+"""
+Asyncio crawler for the REGA Ejar rental indicators API.
+
+Implements the scraping plan in complementary/rental/REGA-EJAR-API.md:
+
+    GetAllRegions → GetCitisByRegionId → GetDistrictsByCityId
+        → GetDetailsV2 per district (and per whole city) per year,
+          once per RENTAL_UNIT_USAGE (0 = residential, 1 = commercial)
+
+Calls go through a small HTTP/1.1 keep-alive client on asyncio streams
+(connections are reused), at most ``--concurrency`` at a time, paced by an
+adaptive token bucket: the rate creeps up while calls succeed and halves
+when the API throttles (429/503, timeouts, empty bodies), honouring
+Retry-After. Failed calls are retried with jittered exponential backoff.
+
+Everything lands in complementary/rental/ejar.db. ``ejar_calls`` is the
+checkpoint: each finished call is committed together with the rows it
+produced, so an interrupted crawl resumes without repeating a call. The
+normalized tables are ``ejar_regions``, ``ejar_cities``, ``ejar_districts``
+and ``ejar_rent``. At the end ``ejar_rent`` is exported to
+complementary/rental/Ejar-Rental-Details.csv, which build_registry catalogs
+as REGA/ejar_rental.
+
+The field names of the reference responses are not documented; they are
+read case- and underscore-insensitively from the likely spellings
+(``regionId``/``id``, ``nameAr``/``name_ar``…). GetDetailsV2 dates follow
+the one captured frontend request (UTC instants at Riyadh midnight plus the
+browser's date strings).
+
+Develop and test against ejar_stub.py, which replays recorded responses
+(``--record``) or synthesizes a deterministic API:
+
+    python ejar_stub.py --port 8780 &
+    python ejar_crawler.py --base-url http://127.0.0.1:8780 --db /tmp/ejar.db
+
+Usage:
+
+    python ejar_crawler.py [--concurrency 4] [--rate 1] [--max-rate 10]
+                           [--years 2019 2025] [--usage 0 1] [--regions 1 5]
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import sqlite3
+import ssl
+import sys
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from build_registry import BASE_DIR
+
+BASE_URL = "https://rentalrei.rega.gov.sa"
+API_PATH = "/RegaIndicatorsAPIs/api/IndicatorEjar/"
+
+EJAR_DIR = BASE_DIR / "complementary" / "rental"
+EJAR_DB_PATH = EJAR_DIR / "ejar.db"
+EJAR_CSV_PATH = EJAR_DIR / "Ejar-Rental-Details.csv"
+
+FIRST_YEAR = 2019
+LAST_YEAR = 2025
+
+DEFAULT_CONCURRENCY = 4
+# Requests/s to start at and never exceed; the API doc says start slow
+DEFAULT_RATE = 1.0
+DEFAULT_MAX_RATE = 10.0
+MIN_RATE = 0.2
+# Rate added per successful call; halved (at most once a second) on throttling
+RATE_STEP = 0.05
+
+REQUEST_TIMEOUT = 30.0
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+PROGRESS_EVERY = 5.0
+
+USER_AGENT = "REGA-Data-crawler/1.0"
+
+RENT_FIELDS = [
+    "sum_deals",
+    "sum_rent",
+    "avg_rent",
+    "avg_min_range_1",
+    "avg_max_range_1",
+    "avg_min_range_2",
+    "avg_max_range_2",
+    "avg_min_range_3",
+    "avg_max_range_3",
+    "total_deals_range_1",
+    "total_deals_range_2",
+    "total_deals_range_3",
+    "total_rent_sum_range_1",
+    "total_rent_sum_range_2",
+    "total_rent_sum_range_3",
+    "change_percent",
+]
+
+# ejar_rent column → response key(s), in the API's spelling
+RENT_KEYS = {
+    "sum_deals": ("sumDeals",),
+    "sum_rent": ("sumRent",),
+    "avg_rent": ("avg",),
+    **{
+        f"avg_{bound}_range_{n}": (f"avg{bound.title()}_range_{n}",)
+        for bound in ("min", "max")
+        for n in (1, 2, 3)
+    },
+    **{f"total_deals_range_{n}": (f"total_deals_range_{n}",) for n in (1, 2, 3)},
+    **{f"total_rent_sum_range_{n}": (f"total_rent_sum_range_{n}",) for n in (1, 2, 3)},
+    "change_percent": ("change_percent", "changePercent"),
+}
+
+
+# ── Schema ──
+
+
+def create_ejar_schema(conn: sqlite3.Connection):
+    rent_cols = ",\n            ".join(f"{name} REAL" for name in RENT_FIELDS)
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS ejar_calls (
+            key TEXT PRIMARY KEY,
+            endpoint TEXT NOT NULL,
+            params TEXT NOT NULL,
+            response TEXT,
+            attempts INTEGER,
+            fetched_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS ejar_regions (
+            region_id INTEGER PRIMARY KEY,
+            name_ar TEXT,
+            name_en TEXT,
+            lat REAL,
+            lng REAL
+        );
+
+        CREATE TABLE IF NOT EXISTS ejar_cities (
+            city_id INTEGER PRIMARY KEY,
+            region_id INTEGER NOT NULL,
+            name_ar TEXT,
+            name_en TEXT,
+            lat REAL,
+            lng REAL,
+            district_count INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS ejar_districts (
+            district_id INTEGER PRIMARY KEY,
+            city_id INTEGER NOT NULL,
+            name_ar TEXT,
+            name_en TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS ejar_rent (
+            city_id INTEGER NOT NULL,
+            district_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            rental_unit_usage INTEGER NOT NULL,
+            unit_name TEXT NOT NULL,
+            {rent_cols},
+            PRIMARY KEY (city_id, district_id, year, rental_unit_usage, unit_name)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_ejar_cities_region ON ejar_cities(region_id);
+        CREATE INDEX IF NOT EXISTS idx_ejar_districts_city ON ejar_districts(city_id);
+    """)
+
+
+# ── Response parsing ──
+
+
+def _norm_key(key: str) -> str:
+    return key.replace("_", "").lower()
+
+
+def pick(obj: dict, *names: str):
+    """First present value among `names`, matched ignoring case and '_'."""
+    lookup = {_norm_key(k): v for k, v in obj.items()}
+    for name in names:
+        val = lookup.get(_norm_key(name))
+        if val is not None:
+            return val
+    return None
+
+
+def records(payload) -> list[dict]:
+    """The list of objects in a response, unwrapping {"data": [...]} etc."""
+    if isinstance(payload, list):
+        return [r for r in payload if isinstance(r, dict)]
+    if isinstance(payload, dict):
+        for val in payload.values():
+            if isinstance(val, list):
+                return [r for r in val if isinstance(r, dict)]
+        return [payload]
+    return []
+
+
+def _number(val) -> float | None:
+    if val is None or val == "":
+        return None
+    try:
+        return float(str(val).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _int(val) -> int | None:
+    n = _number(val)
+    return None if n is None else int(n)
+
+
+# ── Calls ──
+
+
+def call_key(endpoint: str, params: dict) -> str:
+    return f"{endpoint}?{json.dumps(params, sort_keys=True, ensure_ascii=False)}"
+
+
+def _js_date(d: date) -> str:
+    """The browser's Date.toString() for local midnight in Riyadh."""
+    return d.strftime("%a %b %d %Y 00:00:00 GMT+0300 (Arabian Standard Time)")
+
+
+def details_params(city_id: int, district_id: int, year: int, usage: int) -> dict:
+    """GetDetailsV2 body for one calendar year of a district (0 = whole city)."""
+    return {
+        "trigger_Points": str(district_id),
+        # Riyadh midnight (UTC+3) on Jan 1 of `year` and of the next year
+        "strt_date": f"{year - 1}-12-31T21:00:00.000Z",
+        "end_date": f"{year}-12-31T21:00:00.000Z",
+        "cityId": city_id,
+        "strt_date2": _js_date(date(year, 1, 1)),
+        "end_date2": _js_date(date(year, 12, 1)),
+        "totalRooms": 0,
+        "RentalUnitUsage": usage,
+    }
+
+
+# ── HTTP ──
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, retry_after: float | None = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 client that keeps connections open for reuse."""
+
+    def __init__(self, base_url: str, max_connections: int, timeout: float = REQUEST_TIMEOUT):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.tls = url.scheme == "https"
+        self.port = url.port or (443 if self.tls else 80)
+        self.host_header = url.netloc
+        # Request paths are relative to the base URL's path
+        self.prefix = url.path.rstrip("/") + "/"
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._ssl = ssl.create_default_context() if self.tls else None
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def _open(self):
+        self.connections_opened += 1
+        return await asyncio.open_connection(
+            self.host, self.port, ssl=self._ssl, limit=1 << 20
+        )
+
+    async def request(
+        self, method: str, path: str, payload: dict | None = None
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Send one request; return (status, lower-cased headers, body)."""
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode()
+        head = [
+            f"{method} {self.prefix}{path} HTTP/1.1",
+            f"Host: {self.host_header}",
+            f"User-Agent: {USER_AGENT}",
+            "Accept: application/json",
+            "Authorization: Bearer null",
+            f"Content-Length: {len(body)}",
+        ]
+        if payload is not None:
+            head.append("Content-Type: application/json")
+        message = ("\r\n".join(head) + "\r\n\r\n").encode() + body
+
+        reused = bool(self._idle)
+        conn = self._idle.pop() if reused else await self._open()
+        try:
+            status, headers, data, keep = await self._send(conn, message)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            if not reused:
+                raise
+            # The server closed an idle keep-alive connection: one fresh try
+            conn = await self._open()
+            status, headers, data, keep = await self._send(conn, message)
+        if keep and len(self._idle) < self.max_connections:
+            self._idle.append(conn)
+        else:
+            conn[1].close()
+        return status, headers, data
+
+    async def _send(self, conn, message: bytes):
+        try:
+            return await asyncio.wait_for(self._exchange(conn, message), self.timeout)
+        except BaseException:
+            conn[1].close()
+            raise
+
+    async def _exchange(self, conn, message: bytes):
+        reader, writer = conn
+        writer.write(message)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        version, status = status_line.decode("latin-1").split(None, 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                parts.append(await reader.readexactly(size + 2))
+            data = b"".join(p[:-2] for p in parts)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            data = await reader.read()
+            keep = False
+        return int(status), headers, data, keep
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate grows additively and halves on throttling."""
+
+    def __init__(self, rate: float, max_rate: float, min_rate: float = MIN_RATE):
+        self.rate = min(rate, max_rate)
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, self.rate)
+        self.tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_cut = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                # Burst capacity: one second's worth of calls
+                self.tokens = min(
+                    max(1.0, self.rate), self.tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+    def success(self):
+        self.rate = min(self.max_rate, self.rate + RATE_STEP)
+
+    def throttled(self, retry_after: float | None = None):
+        now = time.monotonic()
+        if now - self._last_cut >= 1.0:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self._last_cut = now
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+
+def _retry_after(headers: dict[str, str]) -> float | None:
+    try:
+        return float(headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+# ── Crawler ──
+
+
+class EjarCrawler:
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        base_url: str = BASE_URL,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate: float = DEFAULT_RATE,
+        max_rate: float = DEFAULT_MAX_RATE,
+        years: tuple[int, int] = (FIRST_YEAR, LAST_YEAR),
+        usages: tuple[int, ...] = (0, 1),
+        regions: list[int] | None = None,
+        record: Path | None = None,
+        progress: bool = True,
+    ):
+        self.conn = conn
+        self.client = HttpClient(base_url.rstrip("/") + API_PATH, concurrency)
+        self.limiter = AdaptiveRateLimiter(rate, max_rate)
+        self.concurrency = concurrency
+        self.years = range(years[0], years[1] + 1)
+        self.usages = usages
+        self.regions = set(regions) if regions else None
+        self.record = record.open("a", encoding="utf-8") if record else None
+        self.progress = progress
+        self.stats = {"calls": 0, "resumed": 0, "retries": 0, "throttled": 0, "failed": 0}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # Finished calls: key → stored response (reference calls) or None
+        self._done: dict[str, str | None] = {
+            key: response
+            for key, response in conn.execute("SELECT key, response FROM ejar_calls")
+        }
+
+    # ── Scheduling ──
+
+    def _schedule(self, endpoint: str, params: dict, method: str = "GET"):
+        key = call_key(endpoint, params)
+        if key in self._done:
+            self.stats["resumed"] += 1
+            response = self._done[key]
+            if response is not None:
+                self._expand(endpoint, params, json.loads(response))
+            return
+        self._queue.put_nowait((endpoint, method, params, key))
+
+    def _expand(self, endpoint: str, params: dict, payload):
+        """Schedule the calls a reference response leads to."""
+        if endpoint == "GetAllRegions":
+            for rec in records(payload):
+                region_id = _int(pick(rec, "regionId", "id"))
+                if region_id is not None and (self.regions is None or region_id in self.regions):
+                    self._schedule("GetCitisByRegionId", {"regionId": region_id})
+        elif endpoint == "GetCitisByRegionId":
+            for rec in records(payload):
+                city_id = _int(pick(rec, "cityId", "id"))
+                if city_id is None:
+                    continue
+                self._schedule("GetDistrictsByCityId", {"cityId": city_id})
+                self._schedule_details(city_id, 0)
+        elif endpoint == "GetDistrictsByCityId":
+            for rec in records(payload):
+                district_id = _int(pick(rec, "districtId", "id"))
+                if district_id is not None:
+                    self._schedule_details(params["cityId"], district_id)
+
+    def _schedule_details(self, city_id: int, district_id: int):
+        for usage in self.usages:
+            for year in self.years:
+                self._schedule(
+                    "GetDetailsV2", details_params(city_id, district_id, year, usage), "POST"
+                )
+
+    # ── Storage ──
+
+    def _store(self, endpoint: str, params: dict, key: str, payload, attempts: int):
+        """Write a response's rows and mark the call done, atomically."""
+        conn = self.conn
+        response = None
+        if endpoint == "GetAllRegions":
+            conn.executemany(
+                "INSERT OR REPLACE INTO ejar_regions VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        _int(pick(r, "regionId", "id")),
+                        pick(r, "nameAr", "regionNameAr", "name_ar", "name"),
+                        pick(r, "nameEn", "regionNameEn", "name_en"),
+                        _number(pick(r, "lat", "latitude")),
+                        _number(pick(r, "lng", "lon", "longitude")),
+                    )
+                    for r in records(payload)
+                    if _int(pick(r, "regionId", "id")) is not None
+                ],
+            )
+            response = payload
+        elif endpoint == "GetCitisByRegionId":
+            conn.executemany(
+                "INSERT OR REPLACE INTO ejar_cities VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        _int(pick(r, "cityId", "id")),
+                        params["regionId"],
+                        pick(r, "nameAr", "cityNameAr", "name_ar", "name"),
+                        pick(r, "nameEn", "cityNameEn", "name_en"),
+                        _number(pick(r, "lat", "latitude")),
+                        _number(pick(r, "lng", "lon", "longitude")),
+                        _int(pick(r, "districtsCount", "districtCount", "district_count")),
+                    )
+                    for r in records(payload)
+                    if _int(pick(r, "cityId", "id")) is not None
+                ],
+            )
+            response = payload
+        elif endpoint == "GetDistrictsByCityId":
+            conn.executemany(
+                "INSERT OR REPLACE INTO ejar_districts VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        _int(pick(r, "districtId", "id")),
+                        params["cityId"],
+                        pick(r, "nameAr", "districtNameAr", "name_ar", "name"),
+                        pick(r, "nameEn", "districtNameEn", "name_en"),
+                    )
+                    for r in records(payload)
+                    if _int(pick(r, "districtId", "id")) is not None
+                ],
+            )
+            response = payload
+        elif endpoint == "GetDetailsV2":
+            year = int(params["end_date"][:4])
+            ident = (params["cityId"], int(params["trigger_Points"]), year, params["RentalUnitUsage"])
+            rows = []
+            for r in records(payload):
+                unit = pick(r, "unitName")
+                if unit:
+                    rows.append(
+                        ident + (unit,) + tuple(_number(pick(r, *RENT_KEYS[f])) for f in RENT_FIELDS)
+                    )
+            marks = ", ".join("?" * (5 + len(RENT_FIELDS)))
+            conn.executemany(f"INSERT OR REPLACE INTO ejar_rent VALUES ({marks})", rows)
+
+        stored = None if response is None else json.dumps(response, ensure_ascii=False)
+        conn.execute(
+            "INSERT OR REPLACE INTO ejar_calls VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                endpoint,
+                json.dumps(params, ensure_ascii=False),
+                stored,
+                attempts,
+                datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            ),
+        )
+        conn.commit()
+        self._done[key] = stored
+        if self.record:
+            self.record.write(
+                json.dumps({"endpoint": endpoint, "params": params, "body": payload}, ensure_ascii=False)
+                + "\n"
+            )
+
+    # ── Fetching ──
+
+    async def _fetch(self, endpoint: str, method: str, params: dict):
+        """Call the API with rate limiting and retries; return (payload, attempts)."""
+        path = endpoint if method == "POST" or not params else f"{endpoint}?{urlencode(params)}"
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            await self.limiter.acquire()
+            self.stats["calls"] += 1
+            try:
+                status, headers, body = await self.client.request(
+                    method, path, params if method == "POST" else None
+                )
+                if status in (429, 503):
+                    raise HttpError(status, _retry_after(headers))
+                if status >= 500:
+                    raise HttpError(status)
+                if status != 200:
+                    # Other client errors won't change on retry
+                    raise RuntimeError(f"{endpoint}: HTTP {status}")
+                if not body.strip():
+                    # Empty bodies are how throttling often shows up
+                    raise HttpError(429)
+                payload = json.loads(body)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    HttpError, ValueError) as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                self.stats["retries"] += 1
+                retry_after = getattr(e, "retry_after", None)
+                # Slow down on throttling and timeouts; plain errors just back off
+                if isinstance(e, asyncio.TimeoutError) or getattr(e, "status", 0) in (429, 503):
+                    self.stats["throttled"] += 1
+                    self.limiter.throttled(retry_after)
+                delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
+                await asyncio.sleep(max(delay, retry_after or 0))
+                continue
+            self.limiter.success()
+            return payload, attempt
+
+    async def _worker(self):
+        while True:
+            endpoint, method, params, key = await self._queue.get()
+            try:
+                payload, attempts = await self._fetch(endpoint, method, params)
+                self._store(endpoint, params, key, payload, attempts)
+                self._expand(endpoint, params, payload)
+            except Exception as e:
+                # Left out of the checkpoint, so the next run retries it
+                self.stats["failed"] += 1
+                print(f"  FAILED {key}: {e}", file=sys.stderr)
+            finally:
+                self._queue.task_done()
+
+    async def _report(self, started: float):
+        while True:
+            await asyncio.sleep(PROGRESS_EVERY)
+            elapsed = time.perf_counter() - started
+            s = self.stats
+            print(
+                f"  {s['calls']:,} calls ({s['calls'] / elapsed:.1f}/s), "
+                f"{self._queue.qsize():,} queued, rate {self.limiter.rate:.1f}/s, "
+                f"{s['retries']} retries, {s['throttled']} throttled"
+            )
+
+    async def run(self) -> dict:
+        started = time.perf_counter()
+        self._schedule("GetAllRegions", {})
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        reporter = asyncio.create_task(self._report(started)) if self.progress else None
+        try:
+            await self._queue.join()
+        finally:
+            for task in workers + ([reporter] if reporter else []):
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.client.close()
+            if self.record:
+                self.record.close()
+        self.stats["wall_seconds"] = time.perf_counter() - started
+        self.stats["connections"] = self.client.connections_opened
+        return self.stats
+
+
+def open_ejar_db(db_path: Path = EJAR_DB_PATH) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    create_ejar_schema(conn)
+    return conn
+
+
+def export_csv(conn: sqlite3.Connection, out_path: Path = EJAR_CSV_PATH) -> int:
+    """Write ejar_rent with region/city/district names as a corpus CSV."""
+    cur = conn.execute(f"""
+        SELECT c.region_id, r.name_ar, e.city_id, c.name_ar,
+               e.district_id, d.name_ar, e.year, e.rental_unit_usage, e.unit_name,
+               {", ".join("e." + f for f in RENT_FIELDS)}
+        FROM ejar_rent e
+        LEFT JOIN ejar_cities c ON c.city_id = e.city_id
+        LEFT JOIN ejar_regions r ON r.region_id = c.region_id
+        LEFT JOIN ejar_districts d ON d.district_id = e.district_id
+        ORDER BY c.region_id, e.city_id, e.district_id, e.year, e.rental_unit_usage, e.unit_name
+    """)
+    header = [
+        "region_id", "region_ar", "city_id", "city_ar", "district_id", "district_ar",
+        "year", "rental_unit_usage", "unit_name",
+    ] + RENT_FIELDS
+    rows = 0
+    tmp_path = out_path.with_suffix(".csv.tmp")
+    # UTF-8 with BOM, like the rest of the corpus
+    with open(tmp_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in cur:
+            writer.writerow(
+                ["" if v is None else int(v) if isinstance(v, float) and v.is_integer() else v
+                 for v in row]
+            )
+            rows += 1
+    tmp_path.replace(out_path)
+    return rows
+
+
+def crawl(
+    db_path: Path = EJAR_DB_PATH,
+    csv_path: Path | None = EJAR_CSV_PATH,
+    **options,
+) -> dict:
+    """Run (or resume) a crawl into `db_path`; export to `csv_path` if given."""
+    conn = open_ejar_db(db_path)
+    try:
+        stats = asyncio.run(EjarCrawler(conn, **options).run())
+        if csv_path is not None:
+            stats["exported_rows"] = export_csv(conn, csv_path)
+    finally:
+        conn.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl the REGA Ejar rental indicators API")
+    parser.add_argument("--base-url", default=BASE_URL, help="API host (e.g. a local ejar_stub)")
+    parser.add_argument("--db", type=Path, default=EJAR_DB_PATH, help="crawl database / checkpoint")
+    parser.add_argument("--csv", type=Path, default=EJAR_CSV_PATH, help="export path")
+    parser.add_argument("--no-export", action="store_true", help="skip the CSV export")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="starting requests/s")
+    parser.add_argument("--max-rate", type=float, default=DEFAULT_MAX_RATE, help="requests/s cap")
+    parser.add_argument(
+        "--years", type=int, nargs=2, default=[FIRST_YEAR, LAST_YEAR], metavar=("FIRST", "LAST")
+    )
+    parser.add_argument("--usage", type=int, nargs="+", choices=[0, 1], default=[0, 1],
+                        help="RENTAL_UNIT_USAGE passes (0 residential, 1 commercial)")
+    parser.add_argument("--regions", type=int, nargs="+", help="only these region ids (1-13)")
+    parser.add_argument("--record", type=Path, help="append raw responses as JSONL (for ejar_stub)")
+    args = parser.parse_args()
+
+    print(f"Crawling {args.base_url} into {args.db}...")
+    try:
+        stats = crawl(
+            args.db,
+            None if args.no_export else args.csv,
+            base_url=args.base_url,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            max_rate=args.max_rate,
+            years=tuple(args.years),
+            usages=tuple(args.usage),
+            regions=args.regions,
+            record=args.record,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted — finished calls are checkpointed; rerun to resume")
+        sys.exit(130)
+    print(
+        f"Done: {stats['calls']:,} calls in {stats['wall_seconds']:.1f}s "
+        f"({stats['resumed']:,} already done), {stats['retries']} retries, "
+        f"{stats['throttled']} throttled, {stats['failed']} failed, "
+        f"{stats['connections']} connections"
+    )
+    if "exported_rows" in stats:
+        print(f"Exported {stats['exported_rows']:,} rows to {args.csv}")
+    if stats["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Ejar rental indicators API, for ejar_crawler.
+
+Serves the endpoints the crawler uses under the real API path, over
+HTTP/1.1 keep-alive:
+
+- ``--replay FILE`` answers from responses recorded with
+  ``ejar_crawler.py --record FILE``; unrecorded calls get 404.
+- Otherwise it synthesizes a deterministic API: the 13 regions of the API
+  doc, ``--cities`` cities per region and ``--districts`` districts per
+  city, and GetDetailsV2 figures derived from a hash of the request.
+
+``--latency-ms``/``--jitter-ms`` add response time, ``--rate-limit``
+answers 429 (Retry-After: 1) past N requests/s and ``--error-rate`` makes
+that share of requests fail with 500, to exercise the crawler's limiter
+and retries.
+
+Usage:
+
+    python ejar_stub.py [--port 8780] [--latency-ms 20] [--rate-limit 50]
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from ejar_crawler import API_PATH
+
+DEFAULT_PORT = 8780
+
+# Region ids and names from complementary/rental/REGA-EJAR-API.md
+REGIONS = [
+    (1, "الرياض", "Riyadh"),
+    (2, "مكة المكرمة", "Makkah"),
+    (3, "المدينة المنورة", "Madinah"),
+    (4, "القصيم", "Al Qassim"),
+    (5, "المنطقة الشرقية", "Eastern"),
+    (6, "عسير", "Asir"),
+    (7, "تبوك", "Tabuk"),
+    (8, "حائل", "Hail"),
+    (9, "الحدود الشماليه", "Northern Borders"),
+    (10, "جازان", "Jazan"),
+    (11, "نجران", "Najran"),
+    (12, "الباحة", "Al Bahah"),
+    (13, "الجوف", "Al Jawf"),
+]
+
+UNIT_NAMES = [
+    "appartment", "duplex", "floor", "office_space",
+    "shop", "studio", "trade_exhibition", "villa",
+]
+
+
+def replay_key(endpoint: str, params: dict) -> str:
+    """Match key for a call; query-string values arrive as strings."""
+    return endpoint + json.dumps({k: str(v) for k, v in params.items()}, sort_keys=True)
+
+
+def load_recording(path: Path) -> dict[str, object]:
+    responses = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                responses[replay_key(rec["endpoint"], rec["params"])] = rec["body"]
+    return responses
+
+
+class SyntheticApi:
+    """Deterministic fake responses shaped like the documented API."""
+
+    def __init__(self, cities: int, districts: int, seed: int = 1):
+        self.cities = cities
+        self.districts = districts
+        self.seed = seed
+
+    def respond(self, endpoint: str, params: dict):
+        if endpoint == "GetAllRegions":
+            return [
+                {"regionId": rid, "nameAr": ar, "nameEn": en, "lat": 20 + rid, "lng": 40 + rid}
+                for rid, ar, en in REGIONS
+            ]
+        if endpoint == "GetCitisByRegionId":
+            rid = int(params["regionId"])
+            return [
+                {
+                    "cityId": rid * 1000 + i,
+                    "nameAr": f"مدينة {rid}-{i}",
+                    "nameEn": f"City {rid}-{i}",
+                    "lat": 20 + rid + i / 100,
+                    "lng": 40 + rid + i / 100,
+                    "districtsCount": self.districts,
+                }
+                for i in range(1, self.cities + 1)
+            ]
+        if endpoint == "GetDistrictsByCityId":
+            cid = int(params["cityId"])
+            return [
+                {"districtId": cid * 100 + j, "nameAr": f"حي {cid}-{j}", "nameEn": f"District {cid}-{j}"}
+                for j in range(1, self.districts + 1)
+            ]
+        if endpoint == "GetDetailsV2":
+            digest = hashlib.sha256(
+                f"{self.seed}:{json.dumps(params, sort_keys=True)}".encode()
+            ).digest()
+            rng = random.Random(digest)
+            units = []
+            for name in UNIT_NAMES:
+                deals = rng.randint(0, 3000)
+                avg = rng.randint(8000, 60000)
+                unit = {"unitName": name, "sumDeals": deals, "sumRent": deals * avg, "avg": avg}
+                for n in (1, 2, 3):
+                    lo = int(avg * (0.4 + 0.4 * n))
+                    unit[f"avgMin_range_{n}"] = lo
+                    unit[f"avgMax_range_{n}"] = int(lo * 1.3)
+                    unit[f"total_deals_range_{n}"] = deals // 3
+                    unit[f"total_rent_sum_range_{n}"] = deals // 3 * lo
+                unit["change_percent"] = round(rng.uniform(-10, 10), 2)
+                units.append(unit)
+            return units
+        return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "EjarStub/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self._answer(url.path, dict(parse_qsl(url.query)))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            params = json.loads(raw) if raw else {}
+        except ValueError:
+            self._send(400, b'{"error": "bad json"}')
+            return
+        self._answer(urlsplit(self.path).path, params)
+
+    def _answer(self, path: str, params: dict):
+        stub: StubServer = self.server
+        stub.count("requests")
+        if stub.latency:
+            time.sleep(max(0.0, stub.latency + random.uniform(-stub.jitter, stub.jitter)))
+        if not path.startswith(API_PATH):
+            self._send(404, b'{"error": "not found"}')
+            return
+        if not stub.admit():
+            stub.count("throttled")
+            self._send(429, b"", {"Retry-After": "1"})
+            return
+        if stub.error_rate and random.random() < stub.error_rate:
+            stub.count("errors")
+            self._send(500, b'{"error": "injected"}')
+            return
+
+        endpoint = path[len(API_PATH) :]
+        if stub.recording is not None:
+            body = stub.recording.get(replay_key(endpoint, params))
+        else:
+            body = stub.api.respond(endpoint, params)
+        if body is None:
+            self._send(404, b'{"error": "no such call"}')
+            return
+        stub.count(endpoint)
+        self._send(200, json.dumps(body, ensure_ascii=False).encode())
+
+    def _send(self, status: int, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(
+        self,
+        address,
+        api: SyntheticApi | None = None,
+        recording: dict | None = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_limit: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        super().__init__(address, StubHandler)
+        self.api = api or SyntheticApi(cities=3, districts=5)
+        self.recording = recording
+        self.latency = latency_ms / 1000
+        self.jitter = min(jitter_ms, latency_ms) / 1000
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._window = (0, 0)  # (second, requests admitted in it)
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def admit(self) -> bool:
+        """Fixed one-second window limiter."""
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            second = int(time.monotonic())
+            window, used = self._window
+            if window != second:
+                window, used = second, 0
+            if used >= self.rate_limit:
+                return False
+            self._window = (window, used + 1)
+            return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Ejar API for testing the crawler")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--replay", type=Path, help="JSONL written by ejar_crawler.py --record")
+    parser.add_argument("--cities", type=int, default=3, help="synthetic cities per region")
+    parser.add_argument("--districts", type=int, default=5, help="synthetic districts per city")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/s before 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500 responses")
+    args = parser.parse_args()
+
+    server = StubServer(
+        (args.host, args.port),
+        api=SyntheticApi(args.cities, args.districts, args.seed),
+        recording=load_recording(args.replay) if args.replay else None,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+    )
+    host, port = server.server_address[:2]
+    print(f"Stub serving on http://{host}:{port}{API_PATH}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served: {dict(server.counts)}")
+
+
+if __name__ == "__main__":
+    main()
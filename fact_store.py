@@ -0,0 +1,413 @@
+"""
+Normalized fact tables for the REGA/MOJ corpus.
+
+Loads every cataloged CSV into typed SQLite tables in data.db, one table per
+category from CLASSIFICATION_RULES (``fact_<category>``). Columns are named
+by ARABIC_TO_CANONICAL, numbers are parsed with parse_numeric, and dates are
+stored as ISO ``YYYY-MM-DD``. Hijri date columns (``fields.calendar``) keep
+their calendar as Hijri ``YYYY-MM-DD``, validated against the Umm al-Qura
+table (hijri.py); dates that are not days of the table are stored as NULL
+(the registry's date_checks counts them). Both normalizations are memoized
+per distinct date string. Column types come from the registry's fields table, so
+the registry must be built first.
+
+Region, city and district names are not stored as text: they become integer
+``region_id``/``city_id``/``district_id`` keys into the geography dimension
+(geography.py), whose ``geo_*`` tables data.db carries alongside the facts.
+
+Files are tracked by their registry fingerprint: only new or changed files
+are (re)loaded and rows of deleted files are dropped. Each load and drop also
+adds or subtracts that file's cells in the rollup cube (rollup.py).
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import csv
+import functools
+import sqlite3
+from collections import Counter
+from pathlib import Path
+
+from build_registry import (
+    BASE_DIR,
+    BATCH_ROWS,
+    detect_encoding,
+    normalize_date,
+    parse_numeric,
+)
+from bytescan import LineScanner
+from compressed import open_buffer
+from ejar_crawler import EJAR_DB_PATH
+from geography import Geography, create_geo_schema
+from hijri import hijri_iso
+from rollup import add_file, create_cube_schema, cube_file_ids, subtract_file
+
+DATA_DB_PATH = BASE_DIR / "data.db"
+
+# Categories that are not tidy row-per-record tables
+SKIP_CATEGORIES = {"index", "unknown"}
+
+SQL_TYPES = {
+    "integer": "INTEGER",
+    "decimal": "REAL",
+    "date": "TEXT",
+    "hijri_date": "TEXT",
+    "text": "TEXT",
+}
+
+# Columns indexed once loading is done, when a table has them
+INDEXED_COLUMNS = (
+    "file_id",
+    "region_id",
+    "city_id",
+    "date_gregorian",
+    "decision_date_gregorian",
+    "year",
+)
+
+
+# Converters return None for a value they can't parse, which is stored as
+# NULL (and counted in loaded_files.unparsed_values) so typed columns hold
+# one type only
+
+
+def to_integer(val: str):
+    n = parse_numeric(val)
+    if n is None:
+        return None
+    return int(n) if n.is_integer() else n
+
+
+def to_decimal(val: str):
+    return parse_numeric(val)
+
+
+@functools.lru_cache(maxsize=65536)
+def to_iso_date(val: str):
+    norm = normalize_date(val.strip('"'))
+    return None if norm is None else norm.replace("/", "-")
+
+
+CONVERTERS = {
+    "integer": to_integer,
+    "decimal": to_decimal,
+    "date": to_iso_date,
+    "hijri_date": hijri_iso,
+    "text": None,
+}
+
+
+def fact_table_name(category: str) -> str:
+    return f"fact_{category}"
+
+
+def fact_columns(fields: list[tuple[int, str | None, str]]) -> list[tuple[int, str, str]]:
+    """Map a file's (ordinal, canonical_name, data_type) to fact columns.
+
+    Unmapped headers become ``col_<ordinal>``; a canonical name repeated
+    within one file gets a numeric suffix (``quarter``, ``quarter_2``).
+    """
+    seen: Counter = Counter()
+    columns = []
+    for ordinal, canonical, data_type in fields:
+        base = canonical or f"col_{ordinal}"
+        seen[base] += 1
+        name = base if seen[base] == 1 else f"{base}_{seen[base]}"
+        columns.append((ordinal, name, data_type))
+    return columns
+
+
+# Geography columns replaced by their dimension IDs, parent first
+GEO_LEVELS = ("region", "city", "district")
+
+
+def geo_columns(
+    columns: list[tuple[int, str, str]],
+) -> tuple[list[tuple[int | None, str, str]], dict[str, int]]:
+    """Swap a file's region/city/district name columns for ID columns.
+
+    Returns the stored columns and the name ordinals by level. A level the
+    file already has an ID column for (Ejar exports carry ``city_id``) keeps
+    that column; otherwise ``<level>_id`` is appended, filled from the name.
+    """
+    names = {name for _, name, _ in columns}
+    text = {name: ordinal for ordinal, name, _ in columns if name in GEO_LEVELS}
+    stored = [col for col in columns if col[1] not in GEO_LEVELS]
+    stored += [
+        (None, f"{level}_id", "integer")
+        for level in GEO_LEVELS
+        if level in text and f"{level}_id" not in names
+    ]
+    return stored, text
+
+
+def create_data_schema(data_conn: sqlite3.Connection):
+    data_conn.executescript("""
+        CREATE TABLE IF NOT EXISTS loaded_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT NOT NULL UNIQUE,
+            category TEXT NOT NULL,
+            fingerprint TEXT,
+            row_count INTEGER,
+            unparsed_values INTEGER
+        );
+    """)
+    create_geo_schema(data_conn, places=True)
+    create_cube_schema(data_conn)
+
+
+def ensure_fact_table(
+    data_conn: sqlite3.Connection, category: str, columns: list[tuple[int, str, str]]
+):
+    """Create the category table, or add any columns it doesn't have yet."""
+    table = fact_table_name(category)
+    existing = {row[1] for row in data_conn.execute(f"PRAGMA table_info({table})")}
+    if not existing:
+        col_defs = ", ".join(f'"{name}" {SQL_TYPES[dt]}' for _, name, dt in columns)
+        data_conn.execute(
+            f"CREATE TABLE {table} (file_id INTEGER NOT NULL, {col_defs})"
+        )
+        return
+    for _, name, data_type in columns:
+        if name not in existing:
+            data_conn.execute(
+                f'ALTER TABLE {table} ADD COLUMN "{name}" {SQL_TYPES[data_type]}'
+            )
+
+
+def delete_loaded_file(data_conn: sqlite3.Connection, loaded_id: int, category: str):
+    subtract_file(data_conn, loaded_id)
+    table = fact_table_name(category)
+    if data_conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone():
+        data_conn.execute(f"DELETE FROM {table} WHERE file_id = ?", (loaded_id,))
+    data_conn.execute("DELETE FROM loaded_files WHERE id = ?", (loaded_id,))
+
+
+def load_file(
+    data_conn: sqlite3.Connection,
+    filepath: Path,
+    category: str,
+    fingerprint: str | None,
+    columns: list[tuple[int, str, str]],
+    data_range: tuple[int | None, int | None] = (None, None),
+    geo: Geography | None = None,
+) -> int:
+    """Stream one CSV into its fact table. Returns the number of rows loaded.
+
+    `data_range` is the registry's (data_offset, data_end) for the file;
+    reading starts and stops there instead of re-scanning header and blanks.
+    Place names are interned through `geo` (see geo_columns).
+    """
+    geo = geo or Geography()
+    columns, geo_text = geo_columns(columns)
+    ensure_fact_table(data_conn, category, columns)
+    rel_path = str(filepath.relative_to(BASE_DIR))
+    cur = data_conn.execute(
+        "INSERT INTO loaded_files (path, category, fingerprint) VALUES (?, ?, ?)",
+        (rel_path, category, fingerprint),
+    )
+    loaded_id = cur.lastrowid
+
+    table = fact_table_name(category)
+    names = ", ".join(f'"{name}"' for _, name, _ in columns)
+    placeholders = ", ".join("?" * (len(columns) + 1))
+    insert_sql = f"INSERT INTO {table} (file_id, {names}) VALUES ({placeholders})"
+    converters = [
+        (ordinal, CONVERTERS[dt]) for ordinal, _, dt in columns if ordinal is not None
+    ]
+    # (ID interner, name ordinal, position of the ID in the record), parent first
+    positions = {name: i + 1 for i, (_, name, _) in enumerate(columns)}
+    interners = {"region": None, "city": geo.city_id, "district": geo.district_id}
+    geo_slots = [
+        (interners[level], geo_text.get(level), positions[f"{level}_id"])
+        for level in GEO_LEVELS
+        if f"{level}_id" in positions
+    ]
+    rec_len = len(columns) + 1
+
+    encoding, _ = detect_encoding(filepath)
+    data_offset, data_end = data_range
+    row_count = 0
+    unparsed = 0
+    batch: list[list] = []
+    with open_buffer(filepath) as mm:
+        scanner = LineScanner(mm, encoding)
+        if data_offset is None:
+            _, data_offset = scanner.header()
+        scanner.track_offsets = False
+        reader = csv.reader(scanner.lines(data_offset, data_end))
+        for row in reader:
+            if not row or not any(c.strip() for c in row):  # skip blank rows
+                continue
+            row_len = len(row)
+            rec: list = [loaded_id]
+            for ordinal, convert in converters:
+                v = row[ordinal].strip() if ordinal < row_len else ""
+                if not v or v.upper() == "NULL":
+                    rec.append(None)
+                elif convert is None:
+                    rec.append(v)
+                else:
+                    converted = convert(v)
+                    if converted is None:
+                        unparsed += 1
+                    rec.append(converted)
+            if geo_slots:
+                rec.extend([None] * (rec_len - len(rec)))
+                parent = None
+                for intern, ordinal, pos in geo_slots:
+                    name = None
+                    if ordinal is not None and ordinal < row_len:
+                        name = row[ordinal]
+                    given = rec[pos] if isinstance(rec[pos], int) else None
+                    if intern is None:  # region: fixed IDs, no interning
+                        parent = given if given is not None else geo.region_id(name)
+                    else:
+                        parent = intern(parent, name, given)
+                    rec[pos] = parent
+            batch.append(rec)
+            if len(batch) >= BATCH_ROWS:
+                data_conn.executemany(insert_sql, batch)
+                row_count += len(batch)
+                batch = []
+    if batch:
+        data_conn.executemany(insert_sql, batch)
+        row_count += len(batch)
+
+    data_conn.execute(
+        "UPDATE loaded_files SET row_count = ?, unparsed_values = ? WHERE id = ?",
+        (row_count, unparsed, loaded_id),
+    )
+    add_file(data_conn, loaded_id, category, table)
+    return row_count
+
+
+def unparsed_values(data_path: Path = DATA_DB_PATH) -> list[tuple[str, int]]:
+    """(path, values stored as NULL because they didn't parse) per file."""
+    conn = sqlite3.connect(str(data_path))
+    try:
+        return conn.execute("""
+            SELECT path, unparsed_values FROM loaded_files
+            WHERE unparsed_values > 0
+            ORDER BY unparsed_values DESC, path
+        """).fetchall()
+    finally:
+        conn.close()
+
+
+def create_fact_indexes(data_conn: sqlite3.Connection):
+    """Index the common filter columns — run after bulk loading."""
+    tables = [
+        row[0]
+        for row in data_conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'fact_%'"
+        )
+    ]
+    for table in tables:
+        columns = {row[1] for row in data_conn.execute(f"PRAGMA table_info({table})")}
+        for col in INDEXED_COLUMNS:
+            if col in columns:
+                data_conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS idx_{table}_{col} ON {table}("{col}")'
+                )
+
+
+def load_fact_tables(
+    conn: sqlite3.Connection, data_path: Path = DATA_DB_PATH, full: bool = True
+) -> dict[str, int]:
+    """Bring data.db in line with the registry in `conn`.
+
+    With `full`, data.db is recreated from scratch; otherwise only files whose
+    registry fingerprint differs from the loaded one are reloaded (a data.db
+    from before the geography dimension, or from before unparseable values
+    were stored as NULL, is rebuilt in full). Returns rows loaded per
+    category in this run.
+    """
+    if not full and data_path.exists():
+        probe = sqlite3.connect(str(data_path))
+        full = not probe.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'geo_cities'"
+        ).fetchone() or "unparsed_values" not in {
+            row[1] for row in probe.execute("PRAGMA table_info(loaded_files)")
+        }
+        probe.close()
+    if full and data_path.exists():
+        data_path.unlink()
+
+    data_conn = sqlite3.connect(str(data_path))
+    data_conn.execute("PRAGMA journal_mode=WAL")
+    data_conn.execute("PRAGMA synchronous=OFF")
+    create_data_schema(data_conn)
+
+    geo = Geography()
+    geo.load(data_conn)
+    if EJAR_DB_PATH.exists():
+        geo.load_ejar(EJAR_DB_PATH)
+
+    loaded = {
+        path: (loaded_id, category, fingerprint)
+        for loaded_id, path, category, fingerprint in data_conn.execute(
+            "SELECT id, path, category, fingerprint FROM loaded_files"
+        )
+    }
+
+    loaded_rows: Counter = Counter()
+    registry_files = conn.execute(
+        """
+        SELECT id, path, category, fingerprint, data_offset, data_end
+        FROM files ORDER BY id
+    """
+    ).fetchall()
+    for file_id, path, category, fingerprint, *data_range in registry_files:
+        if category in SKIP_CATEGORIES:
+            continue
+        previous = loaded.pop(path, None)
+        if previous is not None:
+            if previous[2] == fingerprint:
+                continue
+            delete_loaded_file(data_conn, previous[0], previous[1])
+
+        fields = conn.execute(
+            """
+            SELECT ordinal, canonical_name,
+                   CASE WHEN calendar = 'hijri' THEN 'hijri_date' ELSE data_type END
+            FROM fields
+            WHERE file_id = ? ORDER BY ordinal
+        """,
+            (file_id,),
+        ).fetchall()
+        columns = fact_columns(fields)
+        loaded_rows[category] += load_file(
+            data_conn,
+            BASE_DIR / path,
+            category,
+            fingerprint,
+            columns,
+            tuple(data_range),
+            geo,
+        )
+        geo.save(data_conn)
+        data_conn.commit()
+
+    # Files that left the registry
+    for loaded_id, category, _ in loaded.values():
+        delete_loaded_file(data_conn, loaded_id, category)
+
+    # Files loaded before data.db had a cube
+    in_cube = cube_file_ids(data_conn)
+    for loaded_id, category in data_conn.execute(
+        "SELECT id, category FROM loaded_files ORDER BY id"
+    ).fetchall():
+        if loaded_id not in in_cube:
+            add_file(data_conn, loaded_id, category, fact_table_name(category))
+
+    geo.save(data_conn)
+    create_fact_indexes(data_conn)
+    data_conn.commit()
+    data_conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    data_conn.close()
+    return dict(loaded_rows)
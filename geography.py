@@ -0,0 +1,259 @@
+"""
+Geography dimension: canonical integer IDs for regions, cities and districts.
+
+Region names come in many spellings across the corpus — "منطقة مكة المكرمه"
+and "مكة المكرمة", " الرياض" with a leading space, REGA's "منطقة الرياض"
+against MOJ's "الرياض", "المنطقة الشرقية" against "الشرقية" — while the
+Ejar API numbers the 13 regions 1–13. ``normalize_name`` folds the spelling
+variants (alef/hamza forms, ta marbuta, alef maqsura, tashkeel and tatweel,
+the "منطقة" prefix, spacing) and region IDs are the Ejar ones. Three
+non-geographic "regions" in the MOJ files (digital services, the virtual
+notary, abroad) get IDs 90–92.
+
+Cities and districts are interned: the first spelling seen gets an ID and
+every variant that normalizes the same way (within the same region / city)
+maps to it. A name seen without its parent (MOJ files carry a city but no
+region) matches the same name under any parent, and vice versa. Places the Ejar API knows keep their Ejar IDs (from KNOWN_CITIES,
+ejar.db or an Ejar export's id columns); others are numbered from
+LOCAL_ID_BASE up. Lookups go through a dict keyed by the raw string, so a
+value repeated across a file costs one dict probe.
+
+``Geography.load``/``save`` keep the interned IDs in a database's
+``geo_cities``/``geo_districts`` tables, so they stay stable across
+incremental loads.
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+import sqlite3
+from pathlib import Path
+
+# (Ejar region id, Arabic name, English name, extra spellings)
+REGIONS = [
+    (1, "الرياض", "Riyadh", ()),
+    (2, "مكة المكرمة", "Makkah", ("مكة", "Mecca")),
+    (3, "المدينة المنورة", "Madinah", ("المدينة", "Medina")),
+    (4, "القصيم", "Al Qassim", ("Qassim",)),
+    (5, "الشرقية", "Eastern", ("المنطقة الشرقية", "Eastern Province", "EP")),
+    (6, "عسير", "Asir", ()),
+    (7, "تبوك", "Tabuk", ()),
+    (8, "حائل", "Hail", ()),
+    (9, "الحدود الشمالية", "Northern Borders", ("N-B", "NB")),
+    (10, "جازان", "Jazan", ("جيزان", "Jizan")),
+    (11, "نجران", "Najran", ()),
+    (12, "الباحة", "Al Bahah", ("Al Baha", "Baha")),
+    (13, "الجوف", "Al Jawf", ("Al Jouf", "Jouf")),
+]
+
+# Channels MOJ reports in its region column
+PSEUDO_REGIONS = [
+    (90, "الخدمات الرقمية", "Digital services", ()),
+    (91, "كتابة العدل الإفتراضية", "Virtual notary", ("كتابة العدل الإفتراضية - الرياض",)),
+    (92, "خارجية", "Abroad", ()),
+]
+
+# City IDs documented in complementary/rental/REGA-EJAR-API.md
+KNOWN_CITIES = [
+    (21282, 1, "الرياض", "Riyadh"),
+    (18394, 2, "جدة", "Jeddah"),
+    (15423, 2, "مكة المكرمة", "Makkah"),
+    (14001, 3, "المدينة المنورة", "Madinah"),
+    (11048, 5, "الدمام", "Dammam"),
+]
+
+# Interned IDs for places without an Ejar ID start here
+LOCAL_ID_BASE = 1_000_000
+
+_DIACRITICS = re.compile(r"[\u064b-\u0652\u0670\u0640\u200b-\u200f\ufeff]")
+_REGION_PREFIX = re.compile(r"^(?:ال)?منطقه\s+")
+_ENGLISH_SUFFIX = re.compile(r"\s+(?:region|province)$")
+
+
+def fold_arabic(text: str) -> str:
+    """Fold Arabic spelling variants: hamza/alef forms, ta marbuta, alef
+    maqsura, tashkeel and tatweel; lowercase; collapse spaces, _ and -."""
+    s = _DIACRITICS.sub("", text).strip().lower()
+    s = re.sub(r"[إأآٱ]", "ا", s)
+    s = s.replace("ى", "ي").replace("ة", "ه").replace("ؤ", "و").replace("ئ", "ي")
+    return re.sub(r"[\s_\-]+", " ", s)
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize_name(name: str) -> str:
+    """Spelling-insensitive key for a place name."""
+    s = _REGION_PREFIX.sub("", fold_arabic(name))
+    return _ENGLISH_SUFFIX.sub("", s)
+
+
+def _region_keys() -> dict[str, int]:
+    keys = {}
+    for region_id, ar, en, aliases in REGIONS + PSEUDO_REGIONS:
+        for name in (ar, en, *aliases):
+            keys[normalize_name(name)] = region_id
+    return keys
+
+
+REGION_KEYS = _region_keys()
+
+
+def create_geo_schema(conn: sqlite3.Connection, places: bool = False):
+    """The region table (filled in), plus with `places` the city/district tables."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS geo_regions (
+            id INTEGER PRIMARY KEY,
+            name_ar TEXT NOT NULL,
+            name_en TEXT NOT NULL,
+            kind TEXT NOT NULL
+        )
+    """)
+    conn.executemany(
+        "INSERT OR IGNORE INTO geo_regions VALUES (?, ?, ?, ?)",
+        [(rid, ar, en, "region") for rid, ar, en, _ in REGIONS]
+        + [(rid, ar, en, "channel") for rid, ar, en, _ in PSEUDO_REGIONS],
+    )
+    if not places:
+        return
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS geo_cities (
+            id INTEGER PRIMARY KEY,
+            region_id INTEGER,
+            name_ar TEXT NOT NULL,
+            name_key TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS geo_districts (
+            id INTEGER PRIMARY KEY,
+            city_id INTEGER,
+            name_ar TEXT NOT NULL,
+            name_key TEXT NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_geo_cities_key ON geo_cities(name_key, region_id);
+        CREATE INDEX IF NOT EXISTS idx_geo_districts_key ON geo_districts(name_key, city_id);
+    """)
+
+
+def region_id(name: str | None) -> int | None:
+    """Region ID for any spelling of a region name, or None."""
+    if not name:
+        return None
+    return REGION_KEYS.get(normalize_name(name))
+
+
+class Geography:
+    """Interning lookup from raw place strings to integer IDs."""
+
+    def __init__(self):
+        self._regions: dict[str, int | None] = {}
+        # (parent id, name key) → id, and id → (parent id, first spelling)
+        self._city_keys: dict[tuple, int] = {}
+        self._district_keys: dict[tuple, int] = {}
+        self._cities: dict[int, tuple] = {}
+        self._districts: dict[int, tuple] = {}
+        # Raw-string caches in front of normalize_name
+        self._city_cache: dict[tuple, int] = {}
+        self._district_cache: dict[tuple, int] = {}
+        self._next_id = LOCAL_ID_BASE
+        for city_id, rid, ar, _ in KNOWN_CITIES:
+            self._add(self._city_keys, self._cities, city_id, rid, ar)
+
+    def _add(self, keys: dict, names: dict, place_id: int, parent: int | None, name: str):
+        key = normalize_name(name)
+        keys.setdefault((parent, key), place_id)
+        # Parent-less lookups take the first place of that name
+        keys.setdefault((None, key), place_id)
+        names.setdefault(place_id, (parent, name.strip()))
+        if place_id >= self._next_id:
+            self._next_id = place_id + 1
+
+    def region_id(self, name: str | None) -> int | None:
+        try:
+            return self._regions[name]
+        except KeyError:
+            rid = self._regions[name] = region_id(name)
+            return rid
+
+    def _intern(self, keys, names, cache, parent, name, ejar_id) -> int | None:
+        if not name:
+            return None
+        cached = cache.get((parent, name))
+        if cached is not None:
+            return cached
+        if not name.strip():
+            return None
+        key = normalize_name(name)
+        place_id = keys.get((parent, key))
+        if place_id is None and parent is not None:
+            # Adopt a place first seen without a parent
+            orphan = keys.get((None, key))
+            if orphan is not None and names[orphan][0] is None:
+                place_id = keys[(parent, key)] = orphan
+                names[orphan] = (parent, names[orphan][1])
+        if place_id is None:
+            place_id = ejar_id if ejar_id is not None else self._next_id
+            self._add(keys, names, place_id, parent, name)
+        cache[(parent, name)] = place_id
+        return place_id
+
+    def city_id(
+        self, region: int | None, name: str | None, ejar_id: int | None = None
+    ) -> int | None:
+        return self._intern(
+            self._city_keys, self._cities, self._city_cache, region, name, ejar_id
+        )
+
+    def district_id(
+        self, city: int | None, name: str | None, ejar_id: int | None = None
+    ) -> int | None:
+        return self._intern(
+            self._district_keys, self._districts, self._district_cache, city, name, ejar_id
+        )
+
+    # ── Persistence ──
+
+    def load(self, conn: sqlite3.Connection):
+        """Adopt the IDs already stored in `conn`'s geo tables."""
+        for place_id, parent, name in conn.execute(
+            "SELECT id, region_id, name_ar FROM geo_cities ORDER BY id"
+        ):
+            self._add(self._city_keys, self._cities, place_id, parent, name)
+        for place_id, parent, name in conn.execute(
+            "SELECT id, city_id, name_ar FROM geo_districts ORDER BY id"
+        ):
+            self._add(self._district_keys, self._districts, place_id, parent, name)
+
+    def load_ejar(self, ejar_db: Path):
+        """Adopt city and district IDs from an Ejar crawl (ejar_crawler.py)."""
+        conn = sqlite3.connect(f"file:{ejar_db}?mode=ro", uri=True)
+        try:
+            for place_id, parent, name in conn.execute(
+                "SELECT city_id, region_id, name_ar FROM ejar_cities WHERE name_ar != ''"
+            ):
+                self._add(self._city_keys, self._cities, place_id, parent, name)
+            for place_id, parent, name in conn.execute(
+                "SELECT district_id, city_id, name_ar FROM ejar_districts WHERE name_ar != ''"
+            ):
+                self._add(self._district_keys, self._districts, place_id, parent, name)
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+
+    def save(self, conn: sqlite3.Connection):
+        """Write the dimension tables (regions plus every interned place)."""
+        create_geo_schema(conn, places=True)
+        conn.executemany(
+            "INSERT OR REPLACE INTO geo_cities VALUES (?, ?, ?, ?)",
+            [(cid, rid, name, normalize_name(name)) for cid, (rid, name) in self._cities.items()],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO geo_districts VALUES (?, ?, ?, ?)",
+            [
+                (did, cid, name, normalize_name(name))
+                for did, (cid, name) in self._districts.items()
+            ],
+        )
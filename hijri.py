@@ -0,0 +1,111 @@
+"""
+Umm al-Qura (Hijri) calendar lookups for the corpus' Hijri date columns.
+
+MOJ files carry a Hijri date next to the Gregorian one ("التاريخ هجري" /
+"تاريخ الصفقة هجري", and "تاريخ القرارهجري" in enforcement sales), written
+like ``1446/07/01``. The Umm al-Qura calendar is tabular, not arithmetic:
+each month's length comes from the official table, so conversion is a
+lookup. ``UMM_AL_QURA`` holds the years the corpus spans; every day of them
+is expanded once into a day table in both directions.
+
+A column has only a few hundred distinct dates across hundreds of
+thousands of rows, so string parsing and conversion are memoized per
+distinct value (``hijri_iso``, ``hijri_to_iso``).
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import datetime
+import functools
+import re
+
+# (AH year, Gregorian date of 1 Muharram, month lengths Muharram…Dhu
+# al-Hijjah: 1 = 30 days, 0 = 29), from the Umm al-Qura table
+UMM_AL_QURA = (
+    (1440, "2018-09-11", "010111010100"),
+    (1441, "2019-08-31", "101011011010"),
+    (1442, "2020-08-20", "010101011010"),
+    (1443, "2021-08-09", "101010101011"),
+    (1444, "2022-07-30", "010110010101"),
+    (1445, "2023-07-19", "011101001001"),
+    (1446, "2024-07-07", "011101100100"),
+    (1447, "2025-06-26", "101110101010"),
+    (1448, "2026-06-16", "010110110101"),
+    (1449, "2027-06-06", "001010110110"),
+    (1450, "2028-05-25", "101001010110"),
+)
+
+FIRST_YEAR = UMM_AL_QURA[0][0]
+LAST_YEAR = UMM_AL_QURA[-1][0]
+
+# Years below this in a YYYY/MM/DD value are Hijri (AH 1700 is AD 2262)
+HIJRI_YEAR_LIMIT = 1700
+
+_YMD = re.compile(r"^(\d{4})[/-](\d{1,2})[/-](\d{1,2})$")
+_DMY = re.compile(r"^(\d{1,2})[/-](\d{1,2})[/-](\d{4})$")
+
+
+def _day_tables() -> tuple[dict[tuple[int, int, int], int], dict[int, tuple[int, int, int]]]:
+    """(AH year, month, day) → Gregorian ordinal, and back, for every day."""
+    to_ordinal = {}
+    for year, start, lengths in UMM_AL_QURA:
+        ordinal = datetime.date.fromisoformat(start).toordinal()
+        for month, bit in enumerate(lengths, start=1):
+            for day in range(1, 30 + int(bit)):
+                to_ordinal[year, month, day] = ordinal
+                ordinal += 1
+    return to_ordinal, {ordinal: ymd for ymd, ordinal in to_ordinal.items()}
+
+
+_TO_ORDINAL, _FROM_ORDINAL = _day_tables()
+
+
+def to_gregorian(year: int, month: int, day: int) -> datetime.date | None:
+    """The Gregorian date of a Hijri date, or None outside the table."""
+    ordinal = _TO_ORDINAL.get((year, month, day))
+    return None if ordinal is None else datetime.date.fromordinal(ordinal)
+
+
+def from_gregorian(date: datetime.date) -> tuple[int, int, int] | None:
+    """(AH year, month, day) of a Gregorian date, or None outside the table."""
+    return _FROM_ORDINAL.get(date.toordinal())
+
+
+def is_hijri_year(year: int) -> bool:
+    return year < HIJRI_YEAR_LIMIT
+
+
+def parse(val: str) -> tuple[int, int, int] | None:
+    """(year, month, day) of a "1446/07/01" or "01/07/1446" string."""
+    val = val.strip().strip('"')
+    m = _YMD.match(val)
+    if m:
+        return int(m.group(1)), int(m.group(2)), int(m.group(3))
+    m = _DMY.match(val)
+    if m:
+        return int(m.group(3)), int(m.group(2)), int(m.group(1))
+    return None
+
+
+@functools.lru_cache(maxsize=65536)
+def hijri_to_iso(val: str) -> str | None:
+    """Gregorian ``YYYY-MM-DD`` of a Hijri date string; None if it does not
+    parse or is not a day of the table (e.g. 1446/12/30 — that month has 29 days)."""
+    ymd = parse(val)
+    if ymd is None:
+        return None
+    date = to_gregorian(*ymd)
+    return None if date is None else date.isoformat()
+
+
+@functools.lru_cache(maxsize=65536)
+def hijri_iso(val: str) -> str | None:
+    """A Hijri date string as Hijri ``YYYY-MM-DD`` ("1446/7/1" →
+    "1446-07-01"); None unless it is a day of the table."""
+    ymd = parse(val)
+    if ymd is None or ymd not in _TO_ORDINAL:
+        return None
+    year, month, day = ymd
+    return f"{year:04d}-{month:02d}-{day:02d}"
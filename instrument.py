@@ -0,0 +1,84 @@
+"""
+Build instrumentation for the registry builder.
+
+``StageTimer`` accumulates wall and CPU seconds per named stage. Stages can
+nest; a stage's time excludes the time spent in stages opened inside it, so
+the per-stage figures of one file add up to its total.
+
+``file_hooks`` is the opt-in per-file cProfile / tracemalloc hook.
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class StageTimer:
+    """Exclusive wall/CPU seconds per stage name."""
+
+    def __init__(self):
+        self.wall: dict[str, float] = {}
+        self.cpu: dict[str, float] = {}
+        # [wall, cpu] already charged to stages nested in each open stage
+        self._open: list[list[float]] = []
+
+    @contextmanager
+    def __call__(self, stage: str):
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        self._open.append([0.0, 0.0])
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            nested_wall, nested_cpu = self._open.pop()
+            self.add(stage, wall - nested_wall, cpu - nested_cpu)
+            if self._open:
+                self._open[-1][0] += wall
+                self._open[-1][1] += cpu
+
+    def add(self, stage: str, wall: float, cpu: float):
+        self.wall[stage] = self.wall.get(stage, 0.0) + wall
+        self.cpu[stage] = self.cpu.get(stage, 0.0) + cpu
+
+    def merge(self, other: StageTimer):
+        for stage in other.wall:
+            self.add(stage, other.wall[stage], other.cpu[stage])
+
+    def stages(self) -> dict[str, tuple[float, float]]:
+        """{stage: (wall_seconds, cpu_seconds)} in first-seen order."""
+        return {stage: (self.wall[stage], self.cpu[stage]) for stage in self.wall}
+
+
+@contextmanager
+def file_hooks(
+    result: dict, cprofile_path: Path | None = None, trace_memory: bool = False
+):
+    """Run the enclosed block under cProfile and/or tracemalloc.
+
+    Writes cProfile stats to `cprofile_path` (if given) and stores the peak
+    traced allocation in ``result["peak_memory"]`` (bytes) when
+    `trace_memory` is set.
+    """
+    profiler = cProfile.Profile() if cprofile_path else None
+    if trace_memory:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            cprofile_path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(cprofile_path))
+        if trace_memory:
+            result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+Resumable bulk downloader for MOJ/REGA resources on open.data.gov.sa.
+
+Automates the manual process in MOJ-DATA.md:
+
+    python odp_download.py discover [--org moj rega]   # dataset → resource URLs
+    python odp_download.py download [--jobs 4]         # fetch what changed
+    python odp_download.py refresh                     # both, for quarterly runs
+    python odp_download.py status
+
+``discover`` lists each organization's datasets through the official API
+(``/data/api/organizations`` then ``/data/api/datasets/resources``), falls
+back to the internal SPA API (``/api/datasets/{id}``) when the resources
+call comes back empty, and when both are empty recovers the download URL
+from a sibling dataset's ``odp-public/{ORG_ID}/{DATASET_ID}/v{N}/...``
+pattern (same title but another quarter), checked with a HEAD request.
+
+``download`` fetches the CSV resources concurrently. Files already on disk
+are revalidated with If-None-Match / If-Modified-Since, so unchanged files
+cost one 304. Interrupted transfers resume from ``<file>.part`` with a Range
+request (If-Range guards against the file changing meanwhile). A download is
+only moved into place once its size matches the server's length, any
+checksum the API publishes matches, and it looks like a CSV rather than an
+HTML error page. A body identical to the file on disk (same SHA-256) leaves
+the file untouched, so an incremental registry build skips it.
+
+New files land where discover_csvs() scans them: MOJ resources under
+MOJ-RealEstate/, REGA resources in the top-level directory. Targets are named
+after the resource and kept in downloads.db (``odp_resources.target_path``);
+edit a row there to point a resource at an existing file name.
+
+Direct API calls need a browser User-Agent and a pause between requests
+(the platform returns empty bodies when hit too fast); both are built in.
+``--base-url`` points everything at a stand-in such as odp_stub.py.
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote, urlencode, urljoin, urlsplit
+
+from build_registry import BASE_DIR
+
+ODP_BASE_URL = "https://open.data.gov.sa"
+MANIFEST_PATH = BASE_DIR / "downloads.db"
+
+# The platform's WAF lets browser User-Agents through
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.0 Safari/605.1.15"
+)
+
+ORGANIZATIONS = {
+    "moj": {
+        "name": "وزارة العدل",
+        "id": "35c63412-c4ae-4303-8fef-56cfd71303cf",
+        "dir": "MOJ-RealEstate",
+        # Real-estate datasets among MOJ's ~1,000 (see MOJ-DATA.md)
+        "keywords": ("عقار", "صك", "رهن", "إفراغ"),
+    },
+    "rega": {
+        "name": "الهيئة العامة للعقار",
+        "id": None,
+        "dir": ".",
+        "keywords": None,
+    },
+}
+
+DEFAULT_JOBS = 4
+# Seconds between request starts, across threads (MOJ-DATA.md: 0.3-1 s)
+REQUEST_INTERVAL = 0.5
+REQUEST_TIMEOUT = 60
+MAX_ATTEMPTS = 4
+DOWNLOAD_CHUNK = 1024 * 1024
+
+_QUARTER = re.compile(r"Q\s*([1-4])", re.I)
+_QUARTER_AR = {"الأول": 1, "الاول": 1, "الثاني": 2, "الثالث": 3, "الرابع": 4}
+
+
+# ── Manifest ──
+
+
+def create_manifest_schema(conn: sqlite3.Connection):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS odp_datasets (
+            dataset_id TEXT PRIMARY KEY,
+            org TEXT NOT NULL,
+            title_ar TEXT,
+            title_en TEXT,
+            resource_source TEXT,
+            discovered_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS odp_resources (
+            resource_id TEXT PRIMARY KEY,
+            dataset_id TEXT NOT NULL REFERENCES odp_datasets(dataset_id),
+            name TEXT,
+            format TEXT,
+            url TEXT NOT NULL,
+            declared_checksum TEXT,
+            target_path TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            size INTEGER,
+            sha256 TEXT,
+            status TEXT,
+            checked_at TEXT,
+            downloaded_at TEXT
+        );
+    """)
+
+
+def open_manifest(path: Path = MANIFEST_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    create_manifest_schema(conn)
+    return conn
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+# ── HTTP ──
+
+
+class OdpClient:
+    """urllib with the platform's User-Agent, pacing and retries."""
+
+    def __init__(self, base_url: str = ODP_BASE_URL, interval: float = REQUEST_INTERVAL):
+        self.base_url = base_url.rstrip("/")
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def _pace(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def url(self, path_or_url: str) -> str:
+        """Absolute, percent-encoded URL (resource names contain spaces)."""
+        url = urljoin(self.base_url + "/", path_or_url)
+        parts = urlsplit(url)
+        if parts.netloc == urlsplit(ODP_BASE_URL).netloc and self.base_url != ODP_BASE_URL:
+            # Resource URLs from the API point at the real host
+            parts = parts._replace(scheme=urlsplit(self.base_url).scheme,
+                                   netloc=urlsplit(self.base_url).netloc)
+        return parts._replace(path=quote(parts.path, safe="/%:@")).geturl()
+
+    def open(self, url: str, headers: dict | None = None, method: str = "GET"):
+        self._pace()
+        req = urllib.request.Request(
+            self.url(url), headers={"User-Agent": USER_AGENT, **(headers or {})}, method=method
+        )
+        return urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT)
+
+    def get_json(self, path: str, params: dict | None = None):
+        """GET a JSON API path; None if it stays empty after retries."""
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                with self.open(path, {"Accept": "application/json"}) as resp:
+                    body = resp.read()
+                if body.strip():
+                    return json.loads(body)
+            except urllib.error.HTTPError as e:
+                if e.code < 500 and e.code != 429:
+                    return None
+            except (OSError, ValueError):
+                pass
+            # Empty bodies are the platform's way of saying "too fast"
+            time.sleep(min(30, self.interval * 2**attempt) * random.uniform(0.5, 1.5))
+        return None
+
+
+# ── Discovery ──
+
+
+def _field(obj: dict, *names: str):
+    """First non-empty value among `names` (case-insensitive keys)."""
+    lookup = {k.lower(): v for k, v in obj.items()}
+    for name in names:
+        val = lookup.get(name.lower())
+        if val not in (None, ""):
+            return val
+    return None
+
+
+def _list(payload, key: str) -> list[dict]:
+    if isinstance(payload, dict):
+        payload = _field(payload, key, "data", "result") or []
+    return [item for item in payload if isinstance(item, dict)] if isinstance(payload, list) else []
+
+
+def _quarter(text: str) -> int | None:
+    m = _QUARTER.search(text)
+    if m:
+        return int(m.group(1))
+    for word, q in _QUARTER_AR.items():
+        if word in text:
+            return q
+    return None
+
+
+def _title_family(title: str) -> str:
+    """A title with its quarter removed, to find same-series siblings."""
+    text = _QUARTER.sub("", title)
+    for word in _QUARTER_AR:
+        text = text.replace(word, "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def target_for(org: str, name: str) -> str:
+    """Relative target path for a resource, under the org's directory."""
+    stem = re.sub(r"[\\/:*?\"<>|\s]+", "-", name.strip()).strip("-.") or "resource"
+    if not stem.lower().endswith(".csv"):
+        stem += ".csv"
+    directory = ORGANIZATIONS[org]["dir"]
+    return stem if directory == "." else f"{directory}/{stem}"
+
+
+def _csv_resources(items: list[dict]) -> list[dict]:
+    resources = []
+    for item in items:
+        url = _field(item, "downloadUrl", "url", "download_url")
+        fmt = str(_field(item, "format", "fileFormat") or "").lower()
+        if not url or not (fmt == "csv" or urlsplit(str(url)).path.lower().endswith(".csv")):
+            continue
+        resources.append(
+            {
+                "resource_id": str(_field(item, "id", "resourceId") or url),
+                "name": _field(item, "titleEn", "name", "titleAr", "title")
+                or Path(urlsplit(str(url)).path).stem,
+                "format": "csv",
+                "url": str(url),
+                "declared_checksum": _field(item, "checksum", "sha256", "hash"),
+            }
+        )
+    return resources
+
+
+def _recover_from_sibling(client: OdpClient, dataset: dict, siblings: list[dict]) -> list[dict]:
+    """Guess a dataset's CSV URL from a same-series sibling's URL.
+
+    ``.../odp-public/{ORG}/{SIBLING_ID}/v{N}/...-Q3.csv`` becomes
+    ``.../odp-public/{ORG}/{DATASET_ID}/v{M}/...-Q1.csv``, tried for a few
+    versions and kept if a HEAD request finds a non-empty file.
+    """
+    quarter = _quarter(dataset["title"])
+    family = _title_family(dataset["title"])
+    for sibling in siblings:
+        if _title_family(sibling["title"]) != family or not sibling["resources"]:
+            continue
+        sib_quarter = _quarter(sibling["title"])
+        for res in sibling["resources"]:
+            url = res["url"].replace(sibling["id"], dataset["id"])
+            if quarter and sib_quarter and quarter != sib_quarter:
+                url = re.sub(rf"(?i)Q{sib_quarter}(?!\d)", f"Q{quarter}", url)
+            for version in range(1, 4):
+                candidate = re.sub(r"/v\d+/", f"/v{version}/", url)
+                try:
+                    with client.open(candidate, method="HEAD") as resp:
+                        if int(resp.headers.get("Content-Length") or 0) > 0:
+                            name = Path(urlsplit(candidate).path).stem
+                            return [
+                                {
+                                    "resource_id": f"recovered:{dataset['id']}",
+                                    "name": name,
+                                    "format": "csv",
+                                    "url": candidate,
+                                    "declared_checksum": None,
+                                }
+                            ]
+                except (urllib.error.HTTPError, OSError):
+                    continue
+    return []
+
+
+def discover(conn: sqlite3.Connection, client: OdpClient, orgs: list[str]) -> dict:
+    """Refresh the manifest's datasets and resources. Returns counts."""
+    counts = {"datasets": 0, "resources": 0, "fallback": 0, "recovered": 0, "missing": 0}
+    for org in orgs:
+        info = ORGANIZATIONS[org]
+        payload = client.get_json(
+            "/data/api/organizations", {"version": -1, "organization": info["name"]}
+        )
+        if payload is None:
+            print(f"  {org}: organization listing came back empty", file=sys.stderr)
+            continue
+        datasets = []
+        for item in _list(payload, "datasets"):
+            title = str(_field(item, "titleAr", "title", "name") or "")
+            if info["keywords"] and not any(k in title for k in info["keywords"]):
+                continue
+            datasets.append(
+                {
+                    "id": str(_field(item, "id", "datasetId")),
+                    "title": title,
+                    "title_en": _field(item, "titleEn", "name_en"),
+                }
+            )
+        print(f"  {org}: {len(datasets)} datasets")
+
+        for ds in datasets:
+            source = "resources"
+            items = _list(
+                client.get_json(
+                    "/data/api/datasets/resources", {"version": -1, "dataset": ds["id"]}
+                ),
+                "resources",
+            )
+            if not _csv_resources(items):
+                source = "dataset"
+                items = _list(client.get_json(f"/api/datasets/{ds['id']}"), "resources")
+            ds["resources"] = _csv_resources(items)
+            ds["source"] = source
+            if source == "dataset" and ds["resources"]:
+                counts["fallback"] += 1
+
+        for ds in datasets:
+            if not ds["resources"]:
+                ds["resources"] = _recover_from_sibling(client, ds, datasets)
+                if ds["resources"]:
+                    ds["source"] = "sibling"
+                    counts["recovered"] += 1
+                else:
+                    counts["missing"] += 1
+                    print(f"    no CSV resource: {ds['title']}", file=sys.stderr)
+
+            conn.execute(
+                """
+                INSERT INTO odp_datasets VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(dataset_id) DO UPDATE SET
+                    title_ar = excluded.title_ar, title_en = excluded.title_en,
+                    resource_source = excluded.resource_source,
+                    discovered_at = excluded.discovered_at
+            """,
+                (ds["id"], org, ds["title"], ds["title_en"], ds["source"], _now()),
+            )
+            for res in ds["resources"]:
+                # An existing target_path is kept: it may have been edited
+                conn.execute(
+                    """
+                    INSERT INTO odp_resources
+                        (resource_id, dataset_id, name, format, url,
+                         declared_checksum, target_path)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(resource_id) DO UPDATE SET
+                        name = excluded.name, url = excluded.url,
+                        declared_checksum = excluded.declared_checksum
+                """,
+                    (
+                        res["resource_id"],
+                        ds["id"],
+                        res["name"],
+                        res["format"],
+                        res["url"],
+                        res["declared_checksum"],
+                        target_for(org, res["name"]),
+                    ),
+                )
+                counts["resources"] += 1
+            counts["datasets"] += 1
+        conn.commit()
+    return counts
+
+
+# ── Download ──
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(DOWNLOAD_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _checksum_matches(path: Path, declared: str | None, sha256: str) -> bool:
+    if not declared:
+        return True
+    declared = declared.lower().split(":")[-1].strip()
+    if len(declared) == 32:
+        h = hashlib.md5()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(DOWNLOAD_CHUNK), b""):
+                h.update(block)
+        return h.hexdigest() == declared
+    return declared == sha256
+
+
+def _looks_like_csv(path: Path) -> bool:
+    with open(path, "rb") as f:
+        head = f.read(4096)
+    if not head.strip() or head.lstrip().startswith(b"<"):
+        return False
+    try:
+        head.split(b"\n", 1)[0].decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _transfer(client: OdpClient, row: dict, target: Path, progress: dict) -> dict:
+    """One attempt at bringing `target` up to date. Raises on I/O errors.
+
+    Bytes received are added to ``progress["bytes"]`` as they arrive, so
+    failed attempts still count towards the transfer total.
+    """
+    part = target.with_name(target.name + ".part")
+    meta_path = target.with_name(target.name + ".part.json")
+    headers = {}
+    offset = 0
+    meta = json.loads(meta_path.read_text()) if part.exists() and meta_path.exists() else None
+    if meta and (meta.get("etag") or meta.get("last_modified")):
+        offset = part.stat().st_size
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = meta.get("etag") or meta["last_modified"]
+    elif target.exists() and (row["etag"] or row["last_modified"]):
+        if row["etag"]:
+            headers["If-None-Match"] = row["etag"]
+        if row["last_modified"]:
+            headers["If-Modified-Since"] = row["last_modified"]
+
+    try:
+        resp = client.open(row["url"], headers)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return {"status": "not_modified"}
+        if e.code == 416 and offset:
+            # Our partial file is no prefix of the current one: start over
+            part.unlink()
+            meta_path.unlink()
+            raise ConnectionError("range not satisfiable; restarting")
+        raise
+
+    with resp:
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if resp.status == 206:
+            match = re.match(r"bytes (\d+)-\d+/(\d+|\*)", resp.headers.get("Content-Range", ""))
+            if not match:
+                raise ConnectionError("206 response without a usable Content-Range")
+            start, total = match.groups()
+            if int(start) != offset:
+                raise ConnectionError("server resumed at the wrong offset")
+            expected = None if total == "*" else int(total)
+            mode = "ab"
+        else:
+            offset = 0
+            length = resp.headers.get("Content-Length")
+            expected = int(length) if length is not None else None
+            mode = "wb"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        meta_path.write_text(
+            json.dumps({"etag": etag, "last_modified": last_modified, "size": expected})
+        )
+        with open(part, mode) as f:
+            for block in iter(lambda: resp.read(DOWNLOAD_CHUNK), b""):
+                f.write(block)
+                progress["bytes"] += len(block)
+
+    size = part.stat().st_size
+    if expected is not None and size != expected:
+        raise ConnectionError(f"incomplete download: {size:,} of {expected:,} bytes")
+    result = {
+        "etag": etag,
+        "last_modified": last_modified,
+        "size": size,
+        "resumed": resp.status == 206,
+    }
+    if size == 0:
+        part.unlink()
+        meta_path.unlink()
+        return {**result, "status": "failed", "error": "empty file on server"}
+
+    sha256 = _file_sha256(part)
+    if not _checksum_matches(part, row["declared_checksum"], sha256):
+        part.unlink()
+        meta_path.unlink()
+        return {**result, "status": "failed", "error": "checksum mismatch"}
+    if not _looks_like_csv(part):
+        part.unlink()
+        meta_path.unlink()
+        return {**result, "status": "failed", "error": "not a CSV (error page?)"}
+
+    result["sha256"] = sha256
+    if target.exists() and row["sha256"] == sha256:
+        # Same bytes: keep the existing file (and its mtime)
+        part.unlink()
+        result["status"] = "unchanged"
+    else:
+        os.replace(part, target)
+        result["status"] = "downloaded"
+    meta_path.unlink()
+    return result
+
+
+def download_resource(client: OdpClient, row: dict, base_dir: Path = BASE_DIR) -> dict:
+    """Bring one resource's file up to date, retrying (and resuming) on errors."""
+    target = base_dir / row["target_path"]
+    progress = {"bytes": 0}
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return {**_transfer(client, row, target, progress), **progress}
+        except (OSError, ValueError) as e:
+            if attempt == MAX_ATTEMPTS or (
+                isinstance(e, urllib.error.HTTPError) and e.code < 500 and e.code != 429
+            ):
+                return {"status": "failed", "error": str(e), **progress}
+            time.sleep(min(30, client.interval * 2**attempt) * random.uniform(0.5, 1.5))
+
+
+def download(
+    conn: sqlite3.Connection,
+    client: OdpClient,
+    jobs: int = DEFAULT_JOBS,
+    base_dir: Path = BASE_DIR,
+) -> dict:
+    """Download every resource in the manifest that changed. Returns totals."""
+    rows = [dict(r) for r in conn.execute("SELECT * FROM odp_resources ORDER BY target_path")]
+    totals = {"resources": len(rows), "bytes": 0}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(download_resource, client, row, base_dir): row for row in rows}
+        for future in as_completed(futures):
+            row = futures[future]
+            result = future.result()
+            status = result["status"]
+            totals[status] = totals.get(status, 0) + 1
+            totals["bytes"] += result["bytes"]
+            if result.get("resumed"):
+                totals["resumed"] = totals.get("resumed", 0) + 1
+            if status == "failed":
+                print(f"  FAILED {row['target_path']}: {result['error']}", file=sys.stderr)
+                conn.execute(
+                    "UPDATE odp_resources SET status = ?, checked_at = ? WHERE resource_id = ?",
+                    (status, _now(), row["resource_id"]),
+                )
+            elif status == "not_modified":
+                conn.execute(
+                    "UPDATE odp_resources SET status = ?, checked_at = ? WHERE resource_id = ?",
+                    (status, _now(), row["resource_id"]),
+                )
+            else:
+                if status == "downloaded":
+                    print(f"  {row['target_path']} ({result['size']:,} bytes)")
+                conn.execute(
+                    """
+                    UPDATE odp_resources SET etag = ?, last_modified = ?, size = ?,
+                        sha256 = ?, status = ?, checked_at = ?,
+                        downloaded_at = COALESCE(?, downloaded_at)
+                    WHERE resource_id = ?
+                """,
+                    (
+                        result["etag"],
+                        result["last_modified"],
+                        result["size"],
+                        result["sha256"],
+                        status,
+                        _now(),
+                        _now() if status == "downloaded" else None,
+                        row["resource_id"],
+                    ),
+                )
+            conn.commit()
+    return totals
+
+
+def print_status(conn: sqlite3.Connection):
+    print("=" * 60)
+    print("DOWNLOAD MANIFEST")
+    print("=" * 60)
+    for org, datasets, resources in conn.execute("""
+        SELECT d.org, COUNT(DISTINCT d.dataset_id), COUNT(r.resource_id)
+        FROM odp_datasets d LEFT JOIN odp_resources r ON r.dataset_id = d.dataset_id
+        GROUP BY d.org ORDER BY d.org
+    """):
+        print(f"  {org}: {datasets} datasets, {resources} CSV resources")
+    for status, count, size in conn.execute("""
+        SELECT COALESCE(status, 'pending'), COUNT(*), SUM(size)
+        FROM odp_resources GROUP BY 1 ORDER BY 1
+    """):
+        print(f"  {status:<14} {count:>5} files  {(size or 0) / 1024 / 1024:>9.1f} MB")
+
+
+def print_totals(totals: dict, seconds: float):
+    parts = [
+        f"{totals.get(k, 0)} {k.replace('_', ' ')}"
+        for k in ("downloaded", "resumed", "unchanged", "not_modified", "failed")
+    ]
+    print(
+        f"Checked {totals['resources']} resources in {seconds:.1f}s: {', '.join(parts)}; "
+        f"{totals['bytes'] / 1024 / 1024:.1f} MB transferred"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download MOJ/REGA resources from open.data.gov.sa")
+    parser.add_argument("--base-url", default=ODP_BASE_URL, help="platform (or stand-in) URL")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH)
+    parser.add_argument("--dest", type=Path, default=BASE_DIR, help="tree to download into")
+    parser.add_argument(
+        "--interval", type=float, default=REQUEST_INTERVAL, help="seconds between requests"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (
+        ("discover", "list datasets and resource URLs"),
+        ("download", "download new and changed resources"),
+        ("refresh", "discover, then download"),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        if name != "download":
+            p.add_argument("--org", nargs="+", choices=list(ORGANIZATIONS), default=["moj", "rega"])
+        if name != "discover":
+            p.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="parallel downloads")
+    sub.add_parser("status", help="summarize the manifest")
+    args = parser.parse_args()
+
+    conn = open_manifest(args.manifest)
+    client = OdpClient(args.base_url, args.interval)
+    try:
+        if args.command in ("discover", "refresh"):
+            print(f"Discovering resources on {args.base_url}...")
+            counts = discover(conn, client, args.org)
+            print(
+                f"  {counts['datasets']} datasets, {counts['resources']} CSV resources "
+                f"({counts['fallback']} via the dataset API, {counts['recovered']} recovered "
+                f"from siblings, {counts['missing']} missing)"
+            )
+        if args.command in ("download", "refresh"):
+            print(f"Downloading into {args.dest} ({args.jobs} parallel)...")
+            t0 = time.perf_counter()
+            totals = download(conn, client, args.jobs, args.dest)
+            print_totals(totals, time.perf_counter() - t0)
+            if totals.get("failed"):
+                sys.exit(1)
+        if args.command == "status":
+            print_status(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for open.data.gov.sa, for odp_download.
+
+Publishes every CSV under ``--root`` as a one-resource dataset: files in a
+``MOJ-*`` directory belong to the Ministry of Justice, the rest to REGA.
+Serves the API calls the downloader makes (organization listing, dataset
+resources, the SPA dataset endpoint) and the files themselves under
+``/odp-public/{ORG_ID}/{DATASET_ID}/v1/{FILE}`` with ETag, Last-Modified,
+conditional GETs (304), HEAD and single byte ranges (206, If-Range).
+
+Editing, adding or touching files under ``--root`` between runs simulates a
+quarterly update. ``--hide NAME`` makes a dataset's resource APIs come back
+empty (its file is still served) to exercise sibling-URL recovery, and
+``--drop-after BYTES`` cuts each file's first full transfer short to
+exercise resume. ``/_stats`` reports requests and bytes served.
+
+Usage:
+
+    python odp_stub.py --root ./snapshot [--port 8790] [--drop-after 100000]
+    python odp_download.py --base-url http://127.0.0.1:8790 --interval 0 refresh
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import uuid
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from odp_download import ODP_BASE_URL, ORGANIZATIONS
+
+DEFAULT_PORT = 8790
+REGA_STUB_ID = "00000000-0000-4000-8000-000000000001"
+SEND_CHUNK = 256 * 1024
+
+
+class Catalog:
+    """Datasets derived from the CSV files under a directory."""
+
+    def __init__(self, root: Path, hidden: set[str]):
+        self.root = root
+        self.hidden = hidden
+        self._etags: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def datasets(self) -> list[dict]:
+        datasets = []
+        for path in sorted(self.root.rglob("*.csv")):
+            rel = path.relative_to(self.root).as_posix()
+            org = "moj" if rel.split("/")[0].startswith("MOJ-") else "rega"
+            org_id = ORGANIZATIONS[org]["id"] or REGA_STUB_ID
+            dataset_id = str(uuid.uuid5(uuid.NAMESPACE_URL, rel))
+            datasets.append(
+                {
+                    "id": dataset_id,
+                    "org": org,
+                    # MOJ titles carry a keyword the downloader filters on
+                    "titleAr": f"بيانات الصكوك العقارية {path.stem}" if org == "moj" else path.stem,
+                    "titleEn": path.stem,
+                    "path": path,
+                    "url": f"{ODP_BASE_URL}/odp-public/{org_id}/{dataset_id}/v1/{path.name}",
+                    "hidden": path.stem in self.hidden,
+                }
+            )
+        return datasets
+
+    def find(self, dataset_id: str) -> dict | None:
+        return next((d for d in self.datasets() if d["id"] == dataset_id), None)
+
+    def resources(self, dataset: dict) -> list[dict]:
+        if dataset["hidden"]:
+            return []
+        return [
+            {
+                "id": str(uuid.uuid5(uuid.NAMESPACE_URL, dataset["url"])),
+                "titleAr": dataset["titleEn"],
+                "titleEn": dataset["titleEn"],
+                "format": "CSV",
+                "downloadUrl": dataset["url"],
+            }
+        ]
+
+    def etag(self, path: Path) -> str:
+        st = path.stat()
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if key not in self._etags:
+                self._etags[key] = '"' + hashlib.sha256(path.read_bytes()).hexdigest()[:32] + '"'
+            return self._etags[key]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "OdpStub/1.0"
+
+    def do_HEAD(self):
+        self._route(head=True)
+
+    def do_GET(self):
+        self._route(head=False)
+
+    def _route(self, head: bool):
+        stub: StubServer = self.server
+        stub.count("requests")
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        path = unquote(url.path)
+        catalog = stub.catalog
+
+        if path == "/_stats":
+            self._json(dict(stub.counts))
+        elif path == "/data/api/organizations":
+            org = next(
+                (k for k, v in ORGANIZATIONS.items() if v["name"] == params.get("organization")),
+                None,
+            )
+            datasets = [d for d in catalog.datasets() if d["org"] == org]
+            self._json(
+                {"datasets": [{k: d[k] for k in ("id", "titleAr", "titleEn")} for d in datasets]}
+            )
+        elif path == "/data/api/datasets/resources":
+            dataset = catalog.find(params.get("dataset", ""))
+            self._json(catalog.resources(dataset) if dataset else [])
+        elif path.startswith("/api/datasets/"):
+            dataset = catalog.find(path.rsplit("/", 1)[-1])
+            if dataset is None:
+                self._json({"error": "not found"}, 404)
+            else:
+                self._json({"id": dataset["id"], "resources": catalog.resources(dataset)})
+        elif path.startswith("/odp-public/"):
+            self._file(path, head)
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def _file(self, path: str, head: bool):
+        stub: StubServer = self.server
+        parts = path.split("/")
+        dataset = stub.catalog.find(parts[3]) if len(parts) == 6 else None
+        if dataset is None or dataset["path"].name != parts[5] or parts[4] != "v1":
+            self._json({"error": "not found"}, 404)
+            return
+        file_path = dataset["path"]
+        size = file_path.stat().st_size
+        etag = stub.catalog.etag(file_path)
+        mtime = int(file_path.stat().st_mtime)
+        last_modified = formatdate(mtime, usegmt=True)
+        headers = {"ETag": etag, "Last-Modified": last_modified, "Accept-Ranges": "bytes"}
+
+        if self._not_modified(etag, mtime):
+            stub.count("not_modified")
+            self._send(304, b"", headers)
+            return
+
+        start, end = 0, size - 1
+        status = 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and (if_range is None or if_range in (etag, last_modified)):
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)), size - 1)
+            if start >= size:
+                self._send(416, b"", {**headers, "Content-Range": f"bytes */{size}"})
+                return
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            stub.count("ranges")
+
+        length = end - start + 1
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+        if head:
+            return
+
+        limit = length
+        if status == 200 and stub.drop_after and stub.first_transfer(file_path):
+            limit = min(length, stub.drop_after)
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            sent = 0
+            while sent < limit:
+                block = f.read(min(SEND_CHUNK, limit - sent))
+                if not block:
+                    break
+                self.wfile.write(block)
+                sent += len(block)
+        stub.count("files")
+        stub.count("bytes", sent)
+        if sent < length:
+            stub.count("dropped")
+            self.close_connection = True
+
+    def _not_modified(self, etag: str, mtime: int) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        since = self.headers.get("If-Modified-Since")
+        if since:
+            try:
+                return mtime <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _json(self, body, status: int = 200):
+        self._send(status, json.dumps(body, ensure_ascii=False).encode(),
+                   {"Content-Type": "application/json; charset=utf-8"})
+
+    def _send(self, status: int, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, catalog: Catalog, drop_after: int = 0):
+        super().__init__(address, StubHandler)
+        self.catalog = catalog
+        self.drop_after = drop_after
+        self.counts: Counter = Counter()
+        self._dropped: set[str] = set()
+        self._lock = threading.Lock()
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counts[name] += n
+
+    def first_transfer(self, path: Path) -> bool:
+        with self._lock:
+            if str(path) in self._dropped:
+                return False
+            self._dropped.add(str(path))
+            return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in open.data.gov.sa for odp_download")
+    parser.add_argument("--root", type=Path, required=True, help="directory of CSVs to publish")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--hide", nargs="*", default=[], help="file stems with empty resource APIs")
+    parser.add_argument(
+        "--drop-after", type=int, default=0, help="cut each file's first transfer after N bytes"
+    )
+    args = parser.parse_args()
+
+    server = StubServer(
+        (args.host, args.port), Catalog(args.root, set(args.hide)), drop_after=args.drop_after
+    )
+    host, port = server.server_address[:2]
+    print(f"Stub serving on http://{host}:{port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served: {dict(server.counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Partitioned Parquet export of the fact tables.
+
+Writes each ``fact_<category>`` table from data.db to a hive-partitioned
+Parquet dataset under
+``<out_dir>/<category>/region=.../period_year=.../period_quarter=...``.
+Column names and types are the ones fact_store derived from the registry;
+the region partition is named from the geography dimension (``region_id``
+→ ``geo_regions``), and ``city_id``/``district_id`` are joined to their
+``city``/``district`` names, written next to the IDs. Low-cardinality strings
+are dictionary-encoded. The period comes from the Gregorian date column when
+the category has one, otherwise from its year/quarter columns, derived as in
+the rollup cube. Rows are streamed from SQLite in row groups, so no table is
+ever held in memory whole.
+
+Needs pyarrow (optional dependency). Usage:
+
+    python parquet_export.py [OUT_DIR] [--category CATEGORY ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+from build_registry import BASE_DIR
+from fact_store import DATA_DB_PATH
+from rollup import period_sql
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # optional dependency
+    pa = None
+    ds = None
+
+PARQUET_DIR = BASE_DIR / "parquet"
+
+# Rows pulled from SQLite per record batch / Parquet row group
+EXPORT_BATCH_ROWS = 64 * 1024
+
+# Low-cardinality strings stored as dictionary<int32, string>
+DICTIONARY_COLUMNS = {
+    "source_file",
+    "region",
+    "city",
+    "district",
+    "city_district",
+    "sector_type",
+    "service_type",
+    "operation_type",
+    "property_type",
+    "property_classification",
+    "main_document_type",
+    "quarter_name_ar",
+}
+
+# Geography IDs written out with their names: (ID column, name column, table)
+PLACE_NAMES = (
+    ("city_id", "city", "geo_cities"),
+    ("district_id", "district", "geo_districts"),
+)
+
+
+def have_pyarrow() -> bool:
+    return pa is not None
+
+
+def _arrow_type(name: str, decl_type: str):
+    if decl_type == "INTEGER":
+        return pa.int64()
+    if decl_type == "REAL":
+        return pa.float64()
+    if name in DICTIONARY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+
+def _coerce(decl_type: str):
+    """Per-type cleanup for SQLite's dynamic typing (unparsed raw strings)."""
+    if decl_type == "INTEGER":
+
+        def coerce(v):
+            if isinstance(v, int):
+                return v
+            if isinstance(v, float) and v.is_integer():
+                return int(v)
+            return None
+
+    elif decl_type == "REAL":
+
+        def coerce(v):
+            return float(v) if isinstance(v, (int, float)) else None
+
+    else:
+
+        def coerce(v):
+            return None if v is None else str(v)
+
+    return coerce
+
+
+def export_category(
+    data_conn: sqlite3.Connection, category: str, out_dir: Path
+) -> int:
+    """Export one fact table as a partitioned dataset. Returns rows written."""
+    table = f"fact_{category}"
+    columns = [
+        (row[1], row[2])
+        for row in data_conn.execute(f"PRAGMA table_info({table})")
+        if row[1] != "file_id"
+    ]
+    names = [name for name, _ in columns]
+    _, quarter_expr, year_expr = period_sql(names) or ("NULL", "NULL", "NULL")
+    region_idx = names.index("region_id") if "region_id" in names else None
+    region_names = dict(data_conn.execute("SELECT id, name_ar FROM geo_regions"))
+    places = [
+        (names.index(id_col), name, dict(data_conn.execute(f"SELECT id, name_ar FROM {geo}")))
+        for id_col, name, geo in PLACE_NAMES
+        if id_col in names and name not in names
+    ]
+
+    # region moves into the partition path; everything else stays in the data
+    keep = [i for i, name in enumerate(names) if name != "region_id"]
+    data_fields = [pa.field("source_file", _arrow_type("source_file", "TEXT"))]
+    data_fields += [pa.field(names[i], _arrow_type(*columns[i])) for i in keep]
+    data_fields += [pa.field(name, _arrow_type(name, "TEXT")) for _, name, _ in places]
+    partition_schema = pa.schema(
+        [
+            ("region", pa.string()),
+            ("period_year", pa.int32()),
+            ("period_quarter", pa.int8()),
+        ]
+    )
+    schema = pa.schema(data_fields + list(partition_schema))
+
+    coercers = [_coerce(decl) for _, decl in columns]
+    select = ", ".join(f't."{name}"' for name in names)
+    cur = data_conn.execute(
+        f"""
+        SELECT lf.path, CAST({year_expr} AS INTEGER), CAST({quarter_expr} AS INTEGER),
+               {select}
+        FROM {table} t JOIN loaded_files lf ON lf.id = t.file_id
+        ORDER BY t.file_id
+    """
+    )
+
+    written = 0
+
+    def batches():
+        nonlocal written
+        while True:
+            rows = cur.fetchmany(EXPORT_BATCH_ROWS)
+            if not rows:
+                return
+            arrays: list[list] = [[] for _ in schema]
+            for row in rows:
+                path, year, quarter = row[:3]
+                vals = [coerce(v) for coerce, v in zip(coercers, row[3:])]
+                arrays[0].append(path)
+                for out, i in enumerate(keep, start=1):
+                    arrays[out].append(vals[i])
+                for out, (i, _, place_names) in enumerate(places, start=len(keep) + 1):
+                    arrays[out].append(place_names.get(vals[i]))
+                arrays[-3].append(
+                    region_names.get(vals[region_idx]) if region_idx is not None else None
+                )
+                arrays[-2].append(year)
+                arrays[-1].append(quarter)
+            written += len(rows)
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(a, type=f.type) for a, f in zip(arrays, schema)],
+                schema=schema,
+            )
+
+    parquet_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        batches(),
+        out_dir / category,
+        schema=schema,
+        format=parquet_format,
+        file_options=parquet_format.make_write_options(
+            compression="zstd", use_dictionary=True
+        ),
+        partitioning=ds.partitioning(partition_schema, flavor="hive"),
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=EXPORT_BATCH_ROWS,
+        min_rows_per_group=0,
+    )
+    return written
+
+
+def export_parquet(
+    data_path: Path = DATA_DB_PATH,
+    out_dir: Path = PARQUET_DIR,
+    categories: list[str] | None = None,
+) -> dict[str, int]:
+    """Export every (or the selected) fact table. Returns rows per category."""
+    if not have_pyarrow():
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+    if not data_path.exists():
+        raise FileNotFoundError(f"{data_path} not found — build with --load-data first")
+
+    # pyarrow pulls the batches from its own writer thread
+    data_conn = sqlite3.connect(
+        f"file:{data_path}?mode=ro", uri=True, check_same_thread=False
+    )
+    available = [
+        row[0][len("fact_") :]
+        for row in data_conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'fact_%' "
+            "ORDER BY name"
+        )
+    ]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    exported = {}
+    for category in categories or available:
+        if category not in available:
+            print(f"  {category}: no fact table, skipped")
+            continue
+        exported[category] = export_category(data_conn, category, out_dir)
+        print(f"  {category}: {exported[category]:,} rows")
+    data_conn.close()
+    return exported
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Export fact tables to Parquet.")
+    parser.add_argument("out_dir", nargs="?", type=Path, default=PARQUET_DIR)
+    parser.add_argument(
+        "--category", action="append", help="category to export (repeatable)"
+    )
+    args = parser.parse_args(argv)
+
+    if not have_pyarrow():
+        print("pyarrow is not installed — pip install pyarrow", file=sys.stderr)
+        sys.exit(1)
+    print(f"Exporting {DATA_DB_PATH.name} to {args.out_dir}")
+    export_parquet(out_dir=args.out_dir, categories=args.category)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Decoder for the MOJ-RE-Index pivot-table exports.
+
+The three ``MOJ-RE-Index-*-2018-2021.csv`` files are spreadsheet pivots, not
+tables: a title row, ``Unnamed: N`` headers, metadata rows such as
+``المدينة,جده`` and ``حالة العملية(...),معتمدة``, then a year header row
+(merged cells, so a year may span blank cells) over a metric header row
+(price / area / deals), then the body. Row dimensions differ per file:
+
+    Regions    المنطقة, الشهر, تصنيف العقار         one row per region/month/class
+    Cities     الشهر, تصنيف العقار, نوع العقار      blank class/type = subtotal
+    Districts  الأحياء                              a حي/... row (year total)
+                                                    followed by its month rows
+
+``decode_pivot`` finds each block by its year-over-metric header pair and
+unpivots it into long-format rows; ``load_index_values`` stores them in the
+registry's ``index_values`` table, one row per
+(level, region/city/district, period, classification, type, metric):
+
+    period                    "2019" (whole year) or "2019-03"
+    property_classification   "all" for cross-class totals
+    property_type             "all" for cross-type totals
+    metric                    total_price | area_m2 | total_transactions
+
+Files that already have rows are skipped, so incremental builds only decode
+new or changed files (delete_file_entries drops a stale file's rows).
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import re
+import sqlite3
+from pathlib import Path
+
+from build_registry import BASE_DIR, clean_header, detect_encoding, parse_numeric
+from compressed import open_stream
+
+# Metric header → canonical name (ARABIC_TO_CANONICAL vocabulary)
+METRICS = {
+    "السعر بالريال السعودي": "total_price",
+    "المساحة بالمتر المربع": "area_m2",
+    "عدد الصفقات": "total_transactions",
+}
+
+# Row-dimension header → index_values column
+DIMENSIONS = {
+    "المنطقة": "region",
+    "الشهر": "month",
+    "تصنيف العقار": "property_classification",
+    "نوع العقار": "property_type",
+    "الأحياء": "district",
+}
+
+# Metadata rows above the headers: label prefix → column
+METADATA = {
+    "المدينة": "city",
+    "المنطقة": "region",
+    "حالة العملية": "status",
+}
+
+MONTHS = {
+    "يناير": 1,
+    "فبراير": 2,
+    "مارس": 3,
+    "ابريل": 4,
+    "أبريل": 4,
+    "مايو": 5,
+    "يونيو": 6,
+    "يوليو": 7,
+    "اوغسطس": 8,
+    "أغسطس": 8,
+    "اغسطس": 8,
+    "سبتمبر": 9,
+    "اكتوبر": 10,
+    "أكتوبر": 10,
+    "نوفمبر": 11,
+    "ديسمبر": 12,
+}
+
+# Cells that mean "every value of this dimension"
+TOTAL_LABELS = {"", "جميع الشهور", "جميع التصانيف", "جميع الأنواع", "الإجمالي", "المجموع"}
+ALL = "all"
+
+_YEAR = re.compile(r"^(19|20)\d\d$")
+
+INDEX_COLUMNS = (
+    "level",
+    "region",
+    "city",
+    "district",
+    "period",
+    "property_classification",
+    "property_type",
+    "status",
+    "metric",
+    "value",
+)
+
+
+# ── Decoding ──
+
+
+def _header_pair(rows: list[list[str]], i: int) -> tuple[dict[int, str], dict[int, str]] | None:
+    """Year and metric columns if rows i, i+1 are a year-over-metric header."""
+    if i + 1 >= len(rows):
+        return None
+    year_row, metric_row = rows[i], rows[i + 1]
+    if sum(1 for c in year_row if _YEAR.match(c)) < 2:
+        return None
+    metrics = {j: METRICS[c] for j, c in enumerate(metric_row) if c in METRICS}
+    if not metrics:
+        return None
+    years = {}
+    year = None
+    for j, cell in enumerate(year_row):
+        if _YEAR.match(cell):
+            year = cell
+        if j in metrics and year:
+            years[j] = year
+    return years, metrics
+
+
+def decode_pivot(filepath: Path) -> list[dict]:
+    """Unpivot every block of an index export into long-format rows."""
+    encoding, _ = detect_encoding(filepath)
+    with io.TextIOWrapper(open_stream(filepath), encoding=encoding, newline="") as f:
+        rows = [[clean_header(c) for c in row] for row in csv.reader(f)]
+
+    out = []
+    meta: dict[str, str] = {}
+    i = 0
+    while i < len(rows):
+        pair = _header_pair(rows, i)
+        if pair is None:
+            cells = [c for c in rows[i] if c]
+            if len(cells) == 2:
+                for prefix, column in METADATA.items():
+                    if cells[0].startswith(prefix):
+                        meta[column] = cells[1]
+            i += 1
+            continue
+
+        years, metrics = pair
+        first_value_col = min(metrics)
+        dims = {
+            j: DIMENSIONS[c]
+            for j, c in enumerate(rows[i + 1][:first_value_col])
+            if c in DIMENSIONS
+        }
+        level = (
+            "district"
+            if "district" in dims.values()
+            else "region"
+            if "region" in dims.values()
+            else "city"
+        )
+        district = None
+        i += 2
+        while i < len(rows) and _header_pair(rows, i) is None:
+            row = rows[i]
+            i += 1
+            if not any(row):
+                continue
+            if (
+                len([c for c in row if c]) == 2
+                and any(row[0].startswith(prefix) for prefix in METADATA)
+                and not any(row[j] for j in metrics if j < len(row))
+            ):
+                # Metadata for a following block
+                i -= 1
+                break
+            values = {col: row[j] if j < len(row) else "" for j, col in dims.items()}
+            month_cell = values.get("month", "")
+            if "district" in values:
+                cell = values.pop("district")
+                if cell in MONTHS:
+                    month_cell = cell
+                else:
+                    district, month_cell = cell, ""
+            if month_cell not in MONTHS and month_cell not in TOTAL_LABELS:
+                continue
+            month = MONTHS.get(month_cell)
+            base = {
+                "level": level,
+                "region": values.get("region") or meta.get("region"),
+                "city": meta.get("city"),
+                "district": district,
+                "property_classification": _dimension(values.get("property_classification")),
+                "property_type": _dimension(values.get("property_type")),
+                "status": meta.get("status"),
+            }
+            for j, metric in metrics.items():
+                value = parse_numeric(row[j]) if j < len(row) else None
+                if value is None or j not in years:
+                    continue
+                period = years[j] if month is None else f"{years[j]}-{month:02d}"
+                out.append({**base, "period": period, "metric": metric, "value": value})
+        meta = {}
+    return out
+
+
+def _dimension(cell: str | None) -> str:
+    return ALL if cell is None or cell in TOTAL_LABELS else cell
+
+
+# ── Loading ──
+
+
+def load_index_values(conn: sqlite3.Connection) -> dict[str, int]:
+    """Decode index files that have no rows yet. Returns rows per file path."""
+    pending = conn.execute("""
+        SELECT id, path FROM files
+        WHERE category = 'index'
+          AND id NOT IN (SELECT DISTINCT file_id FROM index_values)
+        ORDER BY path
+    """).fetchall()
+    placeholders = ", ".join("?" * (len(INDEX_COLUMNS) + 1))
+    loaded = {}
+    for file_id, rel_path in pending:
+        rows = decode_pivot(BASE_DIR / rel_path)
+        conn.executemany(
+            f"INSERT INTO index_values (file_id, {', '.join(INDEX_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            [(file_id, *(r[c] for c in INDEX_COLUMNS)) for r in rows],
+        )
+        loaded[rel_path] = len(rows)
+    conn.commit()
+    return loaded
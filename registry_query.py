@@ -0,0 +1,699 @@
+#!/usr/bin/env python3
+"""
+Cached read-only query API over registry.db.
+
+``RegistryReader`` answers the catalog lookups the pipeline repeats
+thousands of times per run:
+
+    files_with_field("deed_count")
+    files_covering("الرياض", "2025/01/01", "2025/03/31")
+    files_with_rows(city="جدة", start="2025-03", end="2025-03")
+    enum_distribution("property_type", category="sales_indicators")
+    index_series("region", "الرياض", "total_price")
+    search("الشفا", kind="place")
+    percentiles("total_price", category="sales_indicators")
+
+Connections are opened read-only (``mode=ro``) and kept in a small pool, so
+a lookup costs neither a connect nor a schema parse. Every query is one
+constant parameterized SQL string, which sqlite3 keeps prepared in each
+connection's statement cache. Results are tuples of ``sqlite3.Row`` (read
+with ``row["path"]`` or ``dict(row)``), cached in an LRU keyed on the
+lookup and its arguments. The cache and the pool are dropped whenever the
+id of the last finished build changes or registry.db is replaced by a full
+rebuild. A build's row is written when it starts but only marked finished
+(``wall_seconds``) once all its changes are committed, so results read
+while an incremental build is running are dropped when it finishes.
+
+Safe to share between threads. Usage from the command line:
+
+    python registry_query.py field CANONICAL_NAME
+    python registry_query.py region REGION [--from DATE] [--to DATE]
+    python registry_query.py rows [--region REGION] [--city CITY] [--from MONTH] [--to MONTH]
+    python registry_query.py enum FIELD [--category CATEGORY]
+    python registry_query.py index LEVEL PLACE [--metric METRIC] [--class CLASS]
+    python registry_query.py search TEXT [--kind KIND] [--files]
+    python registry_query.py quantiles FIELD [--category CATEGORY]
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from build_registry import DB_PATH, PERCENTILES, merge_field_quantiles, normalize_date
+from geography import fold_arabic, normalize_name, region_id
+from search_index import KINDS, MIN_MATCH_CHARS, fts_query
+
+# Read-only connections kept open between lookups
+POOL_SIZE = 4
+# Cached lookup results (each a tuple of rows)
+CACHE_SIZE = 1024
+# Prepared statements sqlite3 keeps per connection
+STATEMENT_CACHE = 64
+
+# region_coverage: JSON array of canonical region names from file_regions
+FILE_COLUMNS = """
+    fi.id AS file_id, fi.source, fi.category, fi.filename, fi.path,
+    fi.row_count, fi.date_range_start, fi.date_range_end,
+    (SELECT NULLIF(json_group_array(g.name_ar), '[]')
+     FROM (SELECT g.name_ar FROM file_regions fr
+           JOIN geo_regions g ON g.id = fr.region_id
+           WHERE fr.file_id = fi.id ORDER BY g.id) g) AS region_coverage
+"""
+
+# Last finished build: finish_build sets wall_seconds in its final commit
+SQL_BUILD_ID = "SELECT MAX(id) FROM builds WHERE wall_seconds IS NOT NULL"
+# A build has started since the last finished one (or stopped short of it)
+SQL_BUILD_RUNNING = """
+    SELECT MAX(id) > COALESCE(MAX(CASE WHEN wall_seconds IS NOT NULL THEN id END), 0)
+    FROM builds
+"""
+
+SQL_FILES = f"""
+    SELECT {FILE_COLUMNS}, fi.col_count, fi.file_size, fi.encoding, fi.notes
+    FROM files fi
+    WHERE (?1 IS NULL OR fi.category = ?1) AND (?2 IS NULL OR fi.source = ?2)
+    ORDER BY fi.path
+"""
+
+SQL_FILE_FIELDS = """
+    SELECT f.id AS field_id, f.ordinal, f.name_ar, f.name_en, f.canonical_name,
+           f.data_type, f.nullable, f.null_count, f.distinct_count,
+           f.min_value, f.max_value, f.sample_values, f.formatting_notes
+    FROM fields f
+    WHERE f.file_id = ?
+    ORDER BY f.ordinal
+"""
+
+SQL_FILES_WITH_FIELD = f"""
+    SELECT {FILE_COLUMNS}, f.ordinal, f.name_ar, f.data_type
+    FROM fields f
+    JOIN files fi ON fi.id = f.file_id
+    WHERE f.canonical_name = ?
+    ORDER BY fi.path, f.ordinal
+"""
+
+# Any spelling of a region resolves to its ID (geography.py) first
+SQL_FILES_IN_REGION = f"""
+    SELECT {FILE_COLUMNS}
+    FROM file_regions r
+    JOIN files fi ON fi.id = r.file_id
+    WHERE r.region_id = ?
+    ORDER BY fi.path
+"""
+
+# Rows per file in (region, city, month) cells (file_coverage), one indexed
+# lookup per combination of given place parts. With a period, cells whose
+# months overlap it count in full and undated cells are left out.
+_SQL_FILES_WITH_ROWS = f"""
+    SELECT {FILE_COLUMNS}, SUM(c.row_count) AS rows,
+           MIN(c.first_month) AS first_month, MAX(c.last_month) AS last_month
+    FROM file_coverage c
+    JOIN files fi ON fi.id = c.file_id
+    WHERE {{place}} {{period}}
+    GROUP BY fi.id
+    ORDER BY rows DESC, fi.path
+"""
+_COVERAGE_PLACE = {
+    (True, True): "c.region_id = ?1 AND c.city_key = ?2",
+    (True, False): "c.region_id = ?1",
+    (False, True): "c.city_key = ?2",
+    (False, False): "1",
+}
+SQL_FILES_WITH_ROWS = {
+    (*key, dated): _SQL_FILES_WITH_ROWS.format(
+        place=place, period="AND c.first_month <= ?4 AND c.last_month >= ?3" if dated else ""
+    )
+    for key, place in _COVERAGE_PLACE.items()
+    for dated in (True, False)
+}
+
+# Per-file counts summed over every field with that canonical or Arabic name
+SQL_ENUM_DISTRIBUTION = """
+    SELECT e.value, SUM(e.count) AS count, COUNT(DISTINCT fi.id) AS file_count
+    FROM enum_values e
+    JOIN fields f ON f.id = e.field_id
+    JOIN files fi ON fi.id = f.file_id
+    WHERE (f.canonical_name = ?1 OR f.name_ar = ?1)
+      AND (?2 IS NULL OR fi.category = ?2)
+    GROUP BY e.value
+    ORDER BY count DESC, e.value
+"""
+
+# Stored percentiles of a numeric field per file (field_quantiles)
+SQL_PERCENTILES = f"""
+    SELECT {FILE_COLUMNS}, f.name_ar, q.value_count,
+           {", ".join(f"q.p{p}" for p in PERCENTILES)}
+    FROM field_quantiles q
+    JOIN fields f ON f.id = q.field_id
+    JOIN files fi ON fi.id = f.file_id
+    WHERE (f.canonical_name = ?1 OR f.name_ar = ?1)
+      AND (?2 IS NULL OR fi.category = ?2)
+    ORDER BY fi.path, f.ordinal
+"""
+
+# MOJ-RE-Index values (pivot_index.py), one indexed lookup per level. Names
+# match with or without the "منطقة " / "حي/" prefix the exports use.
+_SQL_INDEX_SERIES = """
+    SELECT period, value, region, city, district, property_classification,
+           property_type, status
+    FROM index_values
+    WHERE level = ?1 AND {column} IN (?2, ?3) AND metric = ?4
+      AND property_classification = ?5 AND property_type = ?6
+    ORDER BY period
+"""
+SQL_INDEX_SERIES = {
+    level: _SQL_INDEX_SERIES.format(column=level) for level in ("region", "city", "district")
+}
+INDEX_NAME_PREFIX = {"region": "منطقة ", "city": "", "district": "حي/"}
+
+
+# Full-text lookups (search_index.py), most widely used terms first. The
+# trigram index needs three characters; shorter queries scan search_terms.
+_SQL_SEARCH = """
+    SELECT t.id, t.kind, t.term, t.field, t.file_count
+    FROM {source}
+    WHERE {match} AND (?2 IS NULL OR t.kind = ?2)
+    ORDER BY t.file_count DESC, t.kind, t.term
+    LIMIT ?3
+"""
+SQL_SEARCH = _SQL_SEARCH.format(
+    source="search_fts JOIN search_terms t ON t.id = search_fts.rowid",
+    match="search_fts MATCH ?1",
+)
+SQL_SEARCH_SHORT = _SQL_SEARCH.format(source="search_terms t", match="instr(t.folded, ?1) > 0")
+
+# Files with any matching term, by the number of distinct terms they contain
+_SQL_SEARCH_FILES = """
+    SELECT {columns}, COUNT(*) AS hits
+    FROM ({terms}) m
+    JOIN search_postings p ON p.term_id = m.id
+    JOIN files fi ON fi.id = p.file_id
+    GROUP BY fi.id
+    ORDER BY hits DESC, fi.path
+"""
+SQL_SEARCH_FILES = _SQL_SEARCH_FILES.format(columns=FILE_COLUMNS, terms=SQL_SEARCH)
+SQL_SEARCH_FILES_SHORT = _SQL_SEARCH_FILES.format(columns=FILE_COLUMNS, terms=SQL_SEARCH_SHORT)
+
+# Every match feeds the file ranking
+SEARCH_FILES_TERMS = 10_000
+
+
+class OutdatedRegistryError(sqlite3.OperationalError):
+    """The registry predates a table or column a lookup needs."""
+
+
+def _date_bound(val: str | None, end: bool) -> str | None:
+    """Normalize a registry or ISO (YYYY-MM-DD) date, or a bare year, to
+    YYYY/MM/DD.
+
+    REGA indicator files only record years ("2019" / "2019.0"), which cover
+    the whole year: Jan 1 as a start bound, Dec 31 as an end bound.
+    """
+    if not val:
+        return None
+    val = val.strip().strip('"')
+    norm = normalize_date(val)
+    if norm:
+        return norm
+    m = re.fullmatch(r"(\d{4})-(\d{1,2})-(\d{1,2})", val)
+    if m:
+        return f"{m.group(1)}/{int(m.group(2)):02d}/{int(m.group(3)):02d}"
+    try:
+        year = int(float(val))
+    except ValueError:
+        return None
+    return f"{year:04d}/12/31" if end else f"{year:04d}/01/01"
+
+
+def _month_bound(val: str | None, end: bool) -> str | None:
+    """Normalize a month ("2025-03", "2025/3"), date or bare year to YYYY-MM;
+    a year is its first month as a start bound, its last as an end bound."""
+    if not val:
+        return None
+    val = val.strip().strip('"')
+    m = re.fullmatch(r"(\d{4})[-/](\d{1,2})", val)
+    if m and 1 <= int(m.group(2)) <= 12:
+        return f"{m.group(1)}-{int(m.group(2)):02d}"
+    norm = _date_bound(val, end)
+    return norm[:7].replace("/", "-") if norm else None
+
+
+class ConnectionPool:
+    """Read-only SQLite connections to one database file, reused across calls.
+
+    If the file is replaced (full rebuilds write a new registry.db), pooled
+    connections to the old file are closed and ``generation`` is bumped.
+    """
+
+    def __init__(self, db_path: Path | str, size: int = POOL_SIZE):
+        self.db_path = Path(db_path)
+        self.size = size
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._file_id: tuple[int, int] | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"{self.db_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE,
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def refresh(self) -> int:
+        """Check whether the file was replaced; return the current generation."""
+        st = os.stat(self.db_path)
+        file_id = (st.st_dev, st.st_ino)
+        with self._lock:
+            if file_id != self._file_id:
+                self._file_id = file_id
+                self.generation += 1
+                self._drain()
+            return self.generation
+
+    @contextmanager
+    def connection(self):
+        generation = self.refresh()
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            # Connections opened before the file was replaced are not reused
+            if generation == self.generation and self._pool.qsize() < self.size:
+                self._pool.put(conn)
+            else:
+                conn.close()
+
+    def _drain(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def close(self):
+        with self._lock:
+            self._drain()
+            self._file_id = None
+
+
+class RegistryReader:
+    """Pooled, cached read-only lookups against one registry database."""
+
+    def __init__(
+        self,
+        db_path: Path | str = DB_PATH,
+        pool_size: int = POOL_SIZE,
+        cache_size: int = CACHE_SIZE,
+    ):
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[tuple, tuple] = OrderedDict()
+        # (pool generation, build id) the cached results belong to
+        self._version: tuple[int, int | None] | None = None
+
+    def close(self):
+        """Close pooled connections and empty the result cache."""
+        self.pool.close()
+        with self._lock:
+            self._cache.clear()
+            self._version = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── Cache ──
+
+    def _current_build(self, conn: sqlite3.Connection) -> int | None:
+        try:
+            return conn.execute(SQL_BUILD_ID).fetchone()[0]
+        except sqlite3.OperationalError:
+            # Registries built before build stats existed have no builds table
+            return None
+
+    def _lookup(self, key: tuple, run) -> tuple:
+        """Return the cached result for `key`, or compute it with run(conn)."""
+        with self.pool.connection() as conn:
+            version = (self.pool.generation, self._current_build(conn))
+            with self._lock:
+                if version != self._version:
+                    self._version = version
+                    self._cache.clear()
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return self._cache[key]
+                self.misses += 1
+            try:
+                result = tuple(run(conn))
+            except sqlite3.OperationalError as e:
+                if not str(e).startswith("no such"):
+                    raise
+                raise OutdatedRegistryError(
+                    f"{self.pool.db_path} predates this lookup ({e}) — "
+                    "rebuild it with build_registry.py"
+                ) from e
+            with self._lock:
+                if version == self._version:
+                    self._cache[key] = result
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            return result
+
+    def build_id(self) -> int | None:
+        """Id of the last finished build (None if unrecorded)."""
+        with self.pool.connection() as conn:
+            return self._current_build(conn)
+
+    def build_running(self) -> bool:
+        """True while a build is writing to the registry (or after one
+        failed before finishing, which can leave it partly updated)."""
+        with self.pool.connection() as conn:
+            try:
+                return bool(conn.execute(SQL_BUILD_RUNNING).fetchone()[0])
+            except sqlite3.OperationalError:
+                return False
+
+    def cache_info(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+            "build_id": self._version[1] if self._version else None,
+        }
+
+    # ── Lookups ──
+
+    def files(
+        self, category: str | None = None, source: str | None = None
+    ) -> tuple[sqlite3.Row, ...]:
+        """Registry files, optionally of one category and/or source."""
+        return self._lookup(
+            ("files", category, source),
+            lambda conn: conn.execute(SQL_FILES, (category, source)),
+        )
+
+    def file_fields(self, file_id: int) -> tuple[sqlite3.Row, ...]:
+        """Profiled columns of one file, in column order."""
+        return self._lookup(
+            ("file_fields", file_id),
+            lambda conn: conn.execute(SQL_FILE_FIELDS, (file_id,)),
+        )
+
+    def files_with_field(self, canonical_name: str) -> tuple[sqlite3.Row, ...]:
+        """Files with a column mapped to `canonical_name`, one row per column."""
+        return self._lookup(
+            ("files_with_field", canonical_name),
+            lambda conn: conn.execute(SQL_FILES_WITH_FIELD, (canonical_name,)),
+        )
+
+    def files_covering(
+        self, region: str, start: str | None = None, end: str | None = None
+    ) -> tuple[sqlite3.Row, ...]:
+        """Files with rows in `region` whose date range overlaps start–end.
+
+        `region` may be any spelling ("منطقة الرياض", "الرياض", "Riyadh").
+        Dates may be YYYY/MM/DD or M/D/YYYY (as in the corpus), YYYY-MM-DD
+        or a bare year. Without start/end, every file in the region matches;
+        with either, files with no recorded date range are left out.
+        """
+        lo = _date_bound(start, end=False) if start else None
+        hi = _date_bound(end, end=True) if end else None
+        for given, norm in ((start, lo), (end, hi)):
+            if given and norm is None:
+                raise ValueError(f"unrecognized date: {given!r}")
+
+        rid = region_id(region)
+
+        def run(conn):
+            if rid is None:
+                return
+            for row in conn.execute(SQL_FILES_IN_REGION, (rid,)):
+                if lo is None and hi is None:
+                    yield row
+                    continue
+                file_start = _date_bound(row["date_range_start"], end=False)
+                file_end = _date_bound(row["date_range_end"], end=True)
+                if file_start is None or file_end is None:
+                    continue
+                if (hi is None or file_start <= hi) and (lo is None or file_end >= lo):
+                    yield row
+
+        return self._lookup(("files_covering", rid, lo, hi), run)
+
+    def files_with_rows(
+        self,
+        region: str | None = None,
+        city: str | None = None,
+        start: str | None = None,
+        end: str | None = None,
+    ) -> tuple[sqlite3.Row, ...]:
+        """Files with rows in a region and/or city during start–end, most
+        rows first.
+
+        Any spelling of `region` and `city` matches. Bounds are months
+        (YYYY-MM), dates or years, each optional; a period left open on one
+        side extends to the corpus' first or last month. Each row carries
+        ``rows`` (rows in the matching cells — a cell whose period only
+        overlaps start–end, e.g. a year or a quarter, counts in full) and
+        the ``first_month``/``last_month`` those cells span.
+        """
+        lo = _month_bound(start, end=False) if start else None
+        hi = _month_bound(end, end=True) if end else None
+        for given, norm in ((start, lo), (end, hi)):
+            if given and norm is None:
+                raise ValueError(f"unrecognized month: {given!r}")
+
+        rid = region_id(region) if region else None
+        city_key = normalize_name(city) if city and city.strip() else None
+        dated = lo is not None or hi is not None
+        sql = SQL_FILES_WITH_ROWS[region is not None, city_key is not None, dated]
+        params = (rid, city_key, lo or "0000-00", hi or "9999-99")
+
+        def run(conn):
+            if region is not None and rid is None:
+                return ()
+            return conn.execute(sql, params)
+
+        return self._lookup(("files_with_rows", region is not None, *params, dated), run)
+
+    def enum_distribution(
+        self, field: str, category: str | None = None
+    ) -> tuple[sqlite3.Row, ...]:
+        """Enumerated values of `field` summed across files, most common first.
+
+        `field` is a canonical name or an Arabic header; `category` limits
+        the files (e.g. "sales_indicators"). Rows are (value, count,
+        file_count); fields with too many distinct values to enumerate
+        contribute nothing.
+        """
+        return self._lookup(
+            ("enum_distribution", field, category),
+            lambda conn: conn.execute(SQL_ENUM_DISTRIBUTION, (field, category)),
+        )
+
+    def percentiles(
+        self, field: str, category: str | None = None
+    ) -> tuple[sqlite3.Row, ...]:
+        """Per-file p1 … p99 of a numeric field (canonical name or Arabic header)."""
+        return self._lookup(
+            ("percentiles", field, category),
+            lambda conn: conn.execute(SQL_PERCENTILES, (field, category)),
+        )
+
+    def merged_percentiles(self, field: str, category: str | None = None) -> dict | None:
+        """p1 … p99 of a canonical field across files, from the stored sketches."""
+        result = self._lookup(
+            ("merged_percentiles", field, category),
+            lambda conn: filter(None, [merge_field_quantiles(conn, field, category)]),
+        )
+        return result[0] if result else None
+
+    def index_series(
+        self,
+        level: str,
+        place: str,
+        metric: str = "total_price",
+        classification: str = "all",
+        property_type: str = "all",
+    ) -> tuple[sqlite3.Row, ...]:
+        """MOJ-RE-Index values of one region, city or district by period.
+
+        `level` is "region", "city" or "district"; `metric` is total_price,
+        area_m2 or total_transactions. Periods are "YYYY" (year totals) and
+        "YYYY-MM"; "all" selects the cross-class / cross-type totals.
+        """
+        if level not in SQL_INDEX_SERIES:
+            raise ValueError(f"unknown index level: {level!r}")
+        place = place.strip()
+        params = (
+            level,
+            place,
+            INDEX_NAME_PREFIX[level] + place,
+            metric,
+            classification,
+            property_type,
+        )
+        return self._lookup(
+            ("index_series", *params),
+            lambda conn: conn.execute(SQL_INDEX_SERIES[level], params),
+        )
+
+    def search(
+        self, text: str, kind: str | None = None, limit: int = 20
+    ) -> tuple[sqlite3.Row, ...]:
+        """Terms containing `text`, in files most widely covered first.
+
+        `text` matches headers, canonical names, enumerated values and place
+        names in any spelling (see search_index); `kind` limits to one of
+        header, canonical, value, place. Rows are (id, kind, term, field,
+        file_count).
+        """
+        sql, param = self._search_sql(text, kind, SQL_SEARCH, SQL_SEARCH_SHORT)
+        return self._lookup(
+            ("search", param, kind, limit),
+            lambda conn: conn.execute(sql, (param, kind, limit)) if param else (),
+        )
+
+    def search_files(self, text: str, kind: str | None = None) -> tuple[sqlite3.Row, ...]:
+        """Files containing a term that matches `text`, most matching terms first."""
+        sql, param = self._search_sql(text, kind, SQL_SEARCH_FILES, SQL_SEARCH_FILES_SHORT)
+        return self._lookup(
+            ("search_files", param, kind),
+            lambda conn: conn.execute(sql, (param, kind, SEARCH_FILES_TERMS)) if param else (),
+        )
+
+    @staticmethod
+    def _search_sql(text: str, kind: str | None, sql: str, short_sql: str) -> tuple[str, str]:
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"unknown search kind {kind!r} (one of {', '.join(KINDS)})")
+        folded = fold_arabic(text)
+        if len(folded) >= MIN_MATCH_CHARS:
+            return sql, fts_query(folded)
+        return short_sql, folded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the file registry")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="registry database")
+    sub = parser.add_subparsers(dest="lookup", required=True)
+    p = sub.add_parser("field", help="files containing a canonical field")
+    p.add_argument("canonical_name")
+    p = sub.add_parser("region", help="files covering a region and period")
+    p.add_argument("region")
+    p.add_argument("--from", dest="start", help="first date (YYYY/MM/DD or YYYY-MM-DD)")
+    p.add_argument("--to", dest="end", help="last date (YYYY/MM/DD or YYYY-MM-DD)")
+    p = sub.add_parser("rows", help="files with rows in a region/city and month range")
+    p.add_argument("--region")
+    p.add_argument("--city")
+    p.add_argument("--from", dest="start", help="first month (YYYY-MM)")
+    p.add_argument("--to", dest="end", help="last month (YYYY-MM)")
+    p = sub.add_parser("enum", help="value distribution of a field")
+    p.add_argument("field", help="canonical name or Arabic header")
+    p.add_argument("--category")
+    p = sub.add_parser("index", help="MOJ-RE-Index values of a place by period")
+    p.add_argument("level", choices=sorted(SQL_INDEX_SERIES))
+    p.add_argument("place", help="region, city or district name (Arabic)")
+    p.add_argument("--metric", default="total_price")
+    p.add_argument("--class", dest="classification", default="all", help="property class")
+    p.add_argument("--type", dest="property_type", default="all", help="property type")
+    p = sub.add_parser("search", help="headers, names, values and places containing TEXT")
+    p.add_argument("text")
+    p.add_argument("--kind", choices=KINDS)
+    p.add_argument("--files", action="store_true", help="list matching files instead")
+    p = sub.add_parser("quantiles", help="percentiles of a numeric field")
+    p.add_argument("field", help="canonical name (or Arabic header, per file)")
+    p.add_argument("--category")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"{args.db} not found — run build_registry.py first", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        with RegistryReader(args.db) as reader:
+            if args.lookup == "field":
+                rows = reader.files_with_field(args.canonical_name)
+                for row in rows:
+                    print(f"  {row['path']}  [{row['ordinal']}] {row['name_ar']} ({row['data_type']})")
+            elif args.lookup == "region":
+                try:
+                    rows = reader.files_covering(args.region, args.start, args.end)
+                except ValueError as e:
+                    parser.error(str(e))
+                for row in rows:
+                    period = f"{row['date_range_start'] or '?'} – {row['date_range_end'] or '?'}"
+                    print(f"  {row['path']}  {period}")
+            elif args.lookup == "rows":
+                try:
+                    rows = reader.files_with_rows(args.region, args.city, args.start, args.end)
+                except ValueError as e:
+                    parser.error(str(e))
+                for row in rows:
+                    period = f"{row['first_month'] or '?'} – {row['last_month'] or '?'}"
+                    print(f"  {row['rows']:>10,}  {row['path']}  {period}")
+            elif args.lookup == "index":
+                rows = reader.index_series(
+                    args.level, args.place, args.metric, args.classification, args.property_type
+                )
+                for row in rows:
+                    print(f"  {row['period']:<8} {row['value']:>20,.2f}")
+            elif args.lookup == "quantiles":
+                rows = reader.percentiles(args.field, args.category)
+                print(f"  {'values':>9} " + " ".join(f"{'p' + str(p):>12}" for p in PERCENTILES))
+                for row in rows:
+                    cells = " ".join(f"{row[f'p{p}']:>12,.1f}" for p in PERCENTILES)
+                    print(f"  {row['value_count']:>9,} {cells}  {row['path']}")
+                merged = reader.merged_percentiles(args.field, args.category)
+                if merged:
+                    cells = " ".join(f"{v:>12,.1f}" for v in merged["percentiles"].values())
+                    print(f"  {merged['value_count']:>9,} {cells}  (all {merged['fields']} fields)")
+            elif args.lookup == "search" and args.files:
+                rows = reader.search_files(args.text, args.kind)
+                for row in rows:
+                    print(f"  {row['hits']:>4}  {row['path']}")
+            elif args.lookup == "search":
+                rows = reader.search(args.text, args.kind)
+                for row in rows:
+                    field = f" ({row['field']})" if row["field"] and row["field"] != row["term"] else ""
+                    print(f"  {row['kind']:<9} {row['term']}{field}  {row['file_count']} files")
+            else:
+                rows = reader.enum_distribution(args.field, args.category)
+                total = sum(row["count"] for row in rows) or 1
+                for row in rows:
+                    print(
+                        f"  {row['value']:<40} {row['count']:>12,}"
+                        f"  {100 * row['count'] / total:5.1f}%  ({row['file_count']} files)"
+                    )
+            print(f"{len(rows)} row(s)")
+    except OutdatedRegistryError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
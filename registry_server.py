@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+Local read-only HTTP/JSON service over registry.db and data.db.
+
+Dashboards and notebooks query this instead of opening the databases over
+a shared filesystem. Endpoints (GET, JSON responses):
+
+    /health                          build id
+    /stats                           request and cache counters
+    /files?category=&source=         registry files
+    /files/<id>                      one file with its profiled fields
+    /fields?canonical=NAME           files containing a canonical field
+    /enums?field=F&category=C        enum distribution of a field
+    /coverage?region=R&from=D1&to=D2 files covering a region and period
+    /rows?region=&city=&from=&to=     files with rows in a region/city
+                                     and month range, with row counts
+    /search?q=TEXT&kind=&files=1     headers, names, values and places
+                                     containing TEXT (or the files with them)
+    /aggregate?category=C&region=&city=&from=&to=&group_by=&measure=
+                                     row counts (and SUM(measure)) of a
+                                     fact table, grouped by any of
+                                     region, city, period
+
+Periods are "YYYY-Qn" (or "YYYY" for rows without a quarter), derived as
+in the rollup cube from the table's Gregorian date column or its
+year/quarter columns. A year-only row spans Q1–Q4 of its year, so it is
+inside from/to only when the whole year is.
+
+Requests are handled by a bounded pool of worker threads sharing pooled
+read-only connections (registry_query). Every response carries an ETag
+derived from the registry's build id and the normalized query, so clients
+revalidate with If-None-Match and get 304 until the next build. Response
+bodies are kept in an in-memory LRU bounded by total bytes. While a build
+is writing to registry.db, responses carry no ETag and are not cached: the
+data may be half-updated and belongs to no finished build.
+
+Usage:
+
+    python registry_server.py [--port 8765] [--workers 8] [--cache-mb 64]
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from build_registry import DB_PATH
+from fact_store import DATA_DB_PATH, fact_table_name
+from geography import normalize_name, region_id
+from registry_query import ConnectionPool, OutdatedRegistryError, RegistryReader
+from rollup import period_sql
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 8
+DEFAULT_CACHE_MB = 64
+
+# Accepted connections allowed to wait for a worker; past this the accept
+# loop blocks and further clients wait in the listen backlog
+PENDING_PER_WORKER = 4
+
+# Bodies larger than this share of the cache are served but not cached
+MAX_ENTRY_SHARE = 8
+
+GROUP_COLUMNS = ("region", "city", "period")
+
+# Place names come from data.db's geography dimension tables
+PLACE_TABLES = {"region": "geo_regions", "city": "geo_cities"}
+
+_PERIOD = re.compile(r"^\d{4}(-Q[1-4])?$")
+
+
+class RequestError(Exception):
+    """A request the service answers with an HTTP error status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ── Response cache ──
+
+
+class ResponseCache:
+    """LRU of encoded response bodies, bounded by their total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: str, body: bytes):
+        if len(body) > self.max_bytes // MAX_ENTRY_SHARE:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ── Fact-table aggregation ──
+
+
+def _period_sql(columns: dict[str, str]) -> tuple[str, str, str] | None:
+    """SQL for a row's period label ("YYYY-Qn" / "YYYY") and the first and
+    last quarter it spans, if derivable."""
+    parts = period_sql(columns)
+    if parts is None:
+        return None
+    _, quarter, year = parts
+    return (
+        f"({year}) || COALESCE('-Q' || ({quarter}), '')",
+        f"({year}) || '-Q' || COALESCE(({quarter}), '1')",
+        f"({year}) || '-Q' || COALESCE(({quarter}), '4')",
+    )
+
+
+def _period_bound(val: str, end: bool) -> str:
+    if not _PERIOD.match(val):
+        raise RequestError(
+            HTTPStatus.BAD_REQUEST, f"period must be YYYY or YYYY-Qn: {val!r}"
+        )
+    # "2025" as a bound means its first (from) or last (to) quarter
+    if len(val) == 4:
+        return val + ("-Q4" if end else "-Q1")
+    return val
+
+
+class FactReader:
+    """Filtered aggregations over the fact tables in data.db."""
+
+    def __init__(self, data_path: Path = DATA_DB_PATH, pool_size: int = DEFAULT_WORKERS):
+        self.pool = ConnectionPool(data_path, pool_size)
+        self._lock = threading.Lock()
+        # {category: {column: declared type}} as of data.db's schema version
+        self._tables: dict[str, dict[str, str]] = {}
+        self._schema: tuple[int, int] | None = None
+
+    def available(self) -> bool:
+        return self.pool.db_path.exists()
+
+    def _columns(self, conn: sqlite3.Connection, category: str) -> dict[str, str]:
+        schema = (self.pool.generation, conn.execute("PRAGMA schema_version").fetchone()[0])
+        with self._lock:
+            if schema != self._schema:
+                tables = {}
+                for (name,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'fact_%'"
+                ):
+                    tables[name[len("fact_") :]] = {
+                        row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({name})")
+                    }
+                self._tables = tables
+                self._schema = schema
+            columns = self._tables.get(category)
+        if columns is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"no fact table for category {category!r}")
+        return columns
+
+    def aggregate(
+        self,
+        category: str,
+        region: str | None = None,
+        city: str | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        group_by: list[str] | None = None,
+        measure: str | None = None,
+    ) -> list[dict]:
+        group_by = group_by or []
+        for col in group_by:
+            if col not in GROUP_COLUMNS:
+                raise RequestError(
+                    HTTPStatus.BAD_REQUEST,
+                    f"group_by takes {', '.join(GROUP_COLUMNS)}: {col!r}",
+                )
+
+        with self.pool.connection() as conn:
+            columns = self._columns(conn, category)
+            period = _period_sql(columns)
+
+            def require(col: str, why: str):
+                missing = period is None if col == "period" else f"{col}_id" not in columns
+                if missing:
+                    raise RequestError(
+                        HTTPStatus.BAD_REQUEST, f"{category} has no {col} to {why}"
+                    )
+
+            where: list[str] = []
+            params: list = []
+            # Places are stored as geography IDs; any spelling of a name
+            # that normalizes the same way matches
+            if region:
+                require("region", "filter on")
+                where.append("region_id = ?")
+                params.append(region_id(region))
+            if city:
+                require("city", "filter on")
+                where.append("city_id IN (SELECT id FROM geo_cities WHERE name_key = ?)")
+                params.append(normalize_name(city))
+            if start or end:
+                require("period", "filter on")
+                _, first, last = period
+                if start:
+                    where.append(f"({first}) >= ?")
+                    params.append(_period_bound(start, end=False))
+                if end:
+                    where.append(f"({last}) <= ?")
+                    params.append(_period_bound(end, end=True))
+
+            select = []
+            keys = []
+            for col in group_by:
+                require(col, "group by")
+                if col == "period":
+                    select.append(f"({period[0]}) AS period")
+                    keys.append("period")
+                else:
+                    select.append(
+                        f"(SELECT name_ar FROM {PLACE_TABLES[col]} WHERE id = {col}_id) AS {col}"
+                    )
+                    keys.append(f"{col}_id")
+            select.append("COUNT(*) AS rows")
+            if measure:
+                if columns.get(measure) not in ("INTEGER", "REAL"):
+                    raise RequestError(
+                        HTTPStatus.BAD_REQUEST, f"{category} has no numeric column {measure!r}"
+                    )
+                select.append(f'SUM("{measure}") AS total')
+
+            sql = f"SELECT {', '.join(select)} FROM {fact_table_name(category)}"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            if keys:
+                sql += f" GROUP BY {', '.join(keys)} ORDER BY {', '.join(group_by)}"
+            return [dict(row) for row in conn.execute(sql, params)]
+
+
+# ── Service ──
+
+
+def _row(row: sqlite3.Row) -> dict:
+    out = dict(row)
+    if out.get("region_coverage"):
+        out["region_coverage"] = json.loads(out["region_coverage"])
+    return out
+
+
+def _param(params: dict, name: str, required: bool = False) -> str | None:
+    val = params.get(name) or None
+    if required and val is None:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"missing parameter: {name}")
+    return val
+
+
+class RegistryService:
+    """Routes requests to registry/fact lookups and caches the responses."""
+
+    def __init__(
+        self,
+        db_path: Path = DB_PATH,
+        data_path: Path = DATA_DB_PATH,
+        workers: int = DEFAULT_WORKERS,
+        cache_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024,
+    ):
+        self.reader = RegistryReader(db_path, pool_size=workers)
+        self.facts = FactReader(data_path, pool_size=workers)
+        self.cache = ResponseCache(cache_bytes)
+        self.workers = workers
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._version: str | None = None
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def version(self) -> str | None:
+        """Finished build id plus database generations; changes when either
+        DB does. None while a build is running (see RegistryReader)."""
+        if self.reader.build_running():
+            return None
+        build_id = self.reader.build_id()
+        data_generation = self.facts.pool.refresh() if self.facts.available() else 0
+        version = f"{build_id}.{self.reader.pool.generation}.{data_generation}"
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self.cache.clear()
+        return version
+
+    def etag(self, version: str, path: str, params: dict) -> str:
+        query = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        digest = hashlib.blake2b(f"{path}?{query}".encode(), digest_size=8).hexdigest()
+        return f'"{version}-{digest}"'
+
+    def respond(self, path: str, params: dict) -> object:
+        """Return the JSON-serializable payload for a request."""
+        parts = [p for p in path.split("/") if p]
+        route = parts[0] if parts else ""
+        reader = self.reader
+
+        if route == "" and len(parts) == 0:
+            return {"endpoints": ["/health", "/stats", "/files", "/files/<id>",
+                                  "/fields", "/enums", "/coverage", "/rows",
+                                  "/search", "/aggregate"]}
+        if route == "health" and len(parts) == 1:
+            return {"status": "ok", "build_id": reader.build_id()}
+        if route == "files" and len(parts) == 1:
+            rows = reader.files(_param(params, "category"), _param(params, "source"))
+            return [_row(r) for r in rows]
+        if route == "files" and len(parts) == 2:
+            try:
+                file_id = int(parts[1])
+            except ValueError:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"no file {parts[1]!r}")
+            rows = [r for r in reader.files() if r["file_id"] == file_id]
+            if not rows:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"no file {file_id}")
+            out = _row(rows[0])
+            out["fields"] = [dict(f) for f in reader.file_fields(file_id)]
+            return out
+        if route == "fields" and len(parts) == 1:
+            rows = reader.files_with_field(_param(params, "canonical", required=True))
+            return [_row(r) for r in rows]
+        if route == "enums" and len(parts) == 1:
+            rows = reader.enum_distribution(
+                _param(params, "field", required=True), _param(params, "category")
+            )
+            return [dict(r) for r in rows]
+        if route == "coverage" and len(parts) == 1:
+            try:
+                rows = reader.files_covering(
+                    _param(params, "region", required=True),
+                    _param(params, "from"),
+                    _param(params, "to"),
+                )
+            except ValueError as e:
+                raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+            return [_row(r) for r in rows]
+        if route == "rows" and len(parts) == 1:
+            try:
+                rows = reader.files_with_rows(
+                    _param(params, "region"),
+                    _param(params, "city"),
+                    _param(params, "from"),
+                    _param(params, "to"),
+                )
+            except ValueError as e:
+                raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+            return [_row(r) for r in rows]
+        if route == "search" and len(parts) == 1:
+            text = _param(params, "q", required=True)
+            kind = _param(params, "kind")
+            try:
+                if _param(params, "files"):
+                    return [_row(r) for r in reader.search_files(text, kind)]
+                return [dict(r) for r in reader.search(text, kind)]
+            except ValueError as e:
+                raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+        if route == "aggregate" and len(parts) == 1:
+            if not self.facts.available():
+                raise RequestError(
+                    HTTPStatus.NOT_FOUND,
+                    "data.db not found — build with build_registry.py --load-data",
+                )
+            group_by = _param(params, "group_by")
+            return self.facts.aggregate(
+                _param(params, "category", required=True),
+                region=_param(params, "region"),
+                city=_param(params, "city"),
+                start=_param(params, "from"),
+                end=_param(params, "to"),
+                group_by=group_by.split(",") if group_by else None,
+                measure=_param(params, "measure"),
+            )
+        raise RequestError(HTTPStatus.NOT_FOUND, f"unknown endpoint: {path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            "workers": self.workers,
+            "version": self._version,
+            "requests": counts,
+            "response_cache": {
+                "entries": len(self.cache),
+                "bytes": self.cache.size,
+                "max_bytes": self.cache.max_bytes,
+            },
+            "query_cache": self.reader.cache_info(),
+        }
+
+    def close(self):
+        self.reader.close()
+        self.facts.pool.close()
+
+
+# ── HTTP ──
+
+
+class RegistryHandler(BaseHTTPRequestHandler):
+    server_version = "RegistryServer/1.0"
+
+    def do_GET(self):
+        service: RegistryService = self.server.service
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        params = dict(parse_qsl(url.query))
+
+        if path == "/stats":
+            self._send(HTTPStatus.OK, json.dumps(service.stats()).encode())
+            return
+
+        try:
+            version = service.version()
+        except (OSError, sqlite3.Error) as e:
+            service.count("error")
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, f"registry unavailable: {e}")
+            return
+        # Mid-build responses are neither validated against nor cached
+        etag = service.etag(version, path, params) if version else None
+
+        if etag and etag in self._if_none_match():
+            service.count("not_modified")
+            self._send(HTTPStatus.NOT_MODIFIED, b"", etag)
+            return
+
+        body = service.cache.get(etag) if etag else None
+        if body is not None:
+            service.count("cache_hit")
+            self._send(HTTPStatus.OK, body, etag)
+            return
+
+        try:
+            payload = service.respond(path, params)
+        except RequestError as e:
+            service.count("error")
+            self._send_error(e.status, str(e))
+            return
+        except OutdatedRegistryError as e:
+            service.count("error")
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+            return
+        except sqlite3.Error as e:
+            service.count("error")
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+            return
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        if etag:
+            service.cache.put(etag, body)
+            service.count("cache_miss")
+        else:
+            service.count("uncached")
+        self._send(HTTPStatus.OK, body, etag)
+
+    def _if_none_match(self) -> set[str]:
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return set()
+        return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+    def _send(self, status: HTTPStatus, body: bytes, etag: str | None = None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str):
+        self._send(status, json.dumps({"error": message}, ensure_ascii=False).encode())
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer handling connections on a fixed pool of worker threads."""
+
+    request_queue_size = 128
+
+    def __init__(self, address, service: RegistryService, workers: int, verbose: bool = False):
+        super().__init__(address, RegistryHandler)
+        self.service = service
+        self.verbose = verbose
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="registry-http")
+        self.slots = threading.BoundedSemaphore(workers * PENDING_PER_WORKER)
+
+    def process_request(self, request, client_address):
+        self.slots.acquire()
+        self.executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+        self.service.close()
+
+
+def make_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    workers: int = DEFAULT_WORKERS,
+    cache_mb: float = DEFAULT_CACHE_MB,
+    db_path: Path = DB_PATH,
+    data_path: Path = DATA_DB_PATH,
+    verbose: bool = False,
+) -> PooledHTTPServer:
+    service = RegistryService(db_path, data_path, workers, int(cache_mb * 1024 * 1024))
+    return PooledHTTPServer((host, port), service, workers, verbose)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the registry over HTTP/JSON")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="worker threads")
+    parser.add_argument(
+        "--cache-mb", type=float, default=DEFAULT_CACHE_MB, help="response cache size (0 = off)"
+    )
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="registry database")
+    parser.add_argument("--data-db", type=Path, default=DATA_DB_PATH, help="fact tables database")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"{args.db} not found — run build_registry.py first", file=sys.stderr)
+        sys.exit(1)
+
+    server = make_server(
+        args.host, args.port, args.workers, args.cache_mb, args.db, args.data_db, args.verbose
+    )
+    host, port = server.server_address[:2]
+    print(f"Serving {args.db.name} on http://{host}:{port}/ ({args.workers} workers)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Rollup cube over the fact tables: region × city × period × category.
+
+Materializes, per category (fact table), counts and sums at every grain of
+
+    geography   city (region + city) | region | national
+    period      month | quarter | year
+
+so "mortgages per region per quarter" is a lookup instead of a scan. Each
+cell holds
+
+    row_count     records in the fact table
+    deals         deed_count / total_transactions / operation_count summed
+                  (row_count for files with no count column)
+    total_value   transaction_value / total_price / total_rent summed
+    total_area    area_m2 summed
+    min_ppm2      lowest price per m² (min_price_per_m2, an average, or
+    max_ppm2      value / area), and the highest
+
+Places are keyed by the geography dimension's IDs (geography.py):
+``region_id``/``city_id`` hold ALL_ID (0) where the dimension is rolled up
+and NO_ID (-1) where the records don't name one; queries and the CLI work
+with names and resolve them through ``geo_regions``/``geo_cities``. A file
+only reaches the grains its dates support: dated records (MOJ RealEstate)
+reach every period grain, year + quarter indicators reach quarter and year.
+
+The cube is maintained per file. fact_store calls ``add_file`` after loading
+a file, which stores the file's own cells in ``cube_parts`` and adds them to
+``rollup_cube``; ``subtract_file`` takes a replaced or deleted file's parts
+back out. Counts and sums are subtracted in place; min/max can't be, so only
+the cells the file touched are re-derived from the remaining parts.
+
+Usage:
+
+    python rollup.py --grain region:quarter --category mortgage
+    python rollup.py --grain city:month --region الرياض --from 2025-01 --to 2025-03
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+from geography import normalize_name, region_id
+
+ALL = "all"
+# Place-key sentinels: rolled up, and not given in the source
+ALL_ID = 0
+NO_ID = -1
+
+GEO_LEVELS = ("city", "region", "national")
+PERIOD_LEVELS = ("month", "quarter", "year")
+GRAINS = tuple(f"{geo}:{period}" for geo in GEO_LEVELS for period in PERIOD_LEVELS)
+
+# Fact columns feeding each measure, first present wins
+DATE_COLUMNS = ("date_gregorian", "decision_date_gregorian")
+QUARTER_COLUMNS = ("quarter", "quarter_number")
+# Arabic ordinal quarters ("الربع الأول"), with the common spelling variants
+QUARTER_ORDINALS = (
+    ("الأول", 1),
+    ("الاول", 1),
+    ("الثاني", 2),
+    ("الثانى", 2),
+    ("الثالث", 3),
+    ("الرابع", 4),
+)
+COUNT_COLUMNS = ("deed_count", "total_transactions", "operation_count")
+VALUE_COLUMNS = ("transaction_value", "total_price", "total_rent")
+AREA_COLUMNS = ("area_m2",)
+PPM2_COLUMNS = ("avg_price_per_m2", "weighted_avg_price_per_m2")
+
+MEASURES = ("row_count", "deals", "total_value", "total_area", "min_ppm2", "max_ppm2")
+KEY = ("grain", "category", "region_id", "city_id", "period")
+
+
+def create_cube_schema(data_conn: sqlite3.Connection):
+    data_conn.executescript("""
+        CREATE TABLE IF NOT EXISTS rollup_cube (
+            grain TEXT NOT NULL,
+            category TEXT NOT NULL,
+            region_id INTEGER NOT NULL,
+            city_id INTEGER NOT NULL,
+            period TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            deals REAL,
+            total_value REAL,
+            total_area REAL,
+            min_ppm2 REAL,
+            max_ppm2 REAL,
+            PRIMARY KEY (grain, category, region_id, city_id, period)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS cube_parts (
+            file_id INTEGER NOT NULL,
+            grain TEXT NOT NULL,
+            category TEXT NOT NULL,
+            region_id INTEGER NOT NULL,
+            city_id INTEGER NOT NULL,
+            period TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            deals REAL,
+            total_value REAL,
+            total_area REAL,
+            min_ppm2 REAL,
+            max_ppm2 REAL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_cube_parts_file ON cube_parts(file_id);
+        CREATE INDEX IF NOT EXISTS idx_cube_parts_cell
+            ON cube_parts(grain, category, region_id, city_id, period);
+        CREATE INDEX IF NOT EXISTS idx_rollup_cube_period
+            ON rollup_cube(grain, category, period);
+    """)
+
+
+# ── Per-file contribution ──
+
+
+def _first(columns: set[str], candidates: tuple[str, ...]) -> str | None:
+    return next((c for c in candidates if c in columns), None)
+
+
+def _coalesce_sql(exprs: list[str]) -> str | None:
+    if not exprs:
+        return None
+    return exprs[0] if len(exprs) == 1 else f"COALESCE({', '.join(exprs)})"
+
+
+def _coalesce(columns: set[str], candidates: tuple[str, ...]) -> str | None:
+    return _coalesce_sql([f'"{c}"' for c in candidates if c in columns])
+
+
+def _numeric(expr: str) -> str:
+    return f"CASE WHEN typeof({expr}) IN ('integer', 'real') THEN {expr} END"
+
+
+def _ordinal_quarter_sql(q: str) -> str:
+    whens = "\n".join(
+        f"WHEN {q} LIKE '%{word}%' THEN '{n}'" for word, n in QUARTER_ORDINALS
+    )
+    return f"""CASE
+        WHEN typeof({q}) = 'integer' AND {q} BETWEEN 1 AND 4 THEN CAST({q} AS TEXT)
+        {whens} END"""
+
+
+def period_sql(columns) -> tuple[str, str, str] | None:
+    """SQL expressions for a fact row's (month, quarter, year), as text.
+
+    Dated records give all three from the Gregorian date; indicator tables
+    give year plus, when they have one, a quarter column holding 1–4 or an
+    Arabic ordinal ("الربع الأول"). Parts that can't be derived are NULL;
+    None if the table has no period at all. Shared by the cube, the
+    server's /aggregate and the Parquet export.
+    """
+    date_col = _first(columns, DATE_COLUMNS)
+    quarter_col = _first(columns, QUARTER_COLUMNS)
+    if date_col:
+        d = f'"{date_col}"'
+        dated = f"{d} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'"
+        month = f"CASE WHEN {dated} THEN substr({d}, 1, 7) END"
+        year = f"CASE WHEN {dated} THEN substr({d}, 1, 4) END"
+        quarter = f"""CASE WHEN {dated}
+            THEN CAST((CAST(substr({d}, 6, 2) AS INTEGER) + 2) / 3 AS TEXT) END"""
+    elif "year" in columns:
+        month = "NULL"
+        year = "CASE WHEN typeof(year) = 'integer' THEN CAST(year AS TEXT) END"
+        quarter = _ordinal_quarter_sql(f'"{quarter_col}"') if quarter_col else "NULL"
+    else:
+        return None
+    return month, quarter, year
+
+
+def _contribution_sql(table: str, columns: set[str]) -> str | None:
+    """GROUP BY over one file's rows at its finest (region, city, period)."""
+    period = period_sql(columns)
+    if period is None:
+        return None
+    month, quarter, year = period
+
+    region = f"COALESCE(region_id, {NO_ID})" if "region_id" in columns else str(NO_ID)
+    city = f"COALESCE(city_id, {NO_ID})" if "city_id" in columns else str(NO_ID)
+    count = _coalesce(columns, COUNT_COLUMNS)
+    value = _coalesce(columns, VALUE_COLUMNS)
+    area = _coalesce(columns, AREA_COLUMNS)
+    avg = _coalesce(columns, PPM2_COLUMNS)
+    derived = f"{_numeric(value)} / NULLIF({_numeric(area)}, 0)" if value and area else None
+    lo = ['"min_price_per_m2"'] if "min_price_per_m2" in columns else []
+    hi = ['"max_price_per_m2"'] if "max_price_per_m2" in columns else []
+    fallbacks = [e for e in (avg, derived) if e]
+    ppm2_lo = _coalesce_sql(lo + fallbacks) or "NULL"
+    ppm2_hi = _coalesce_sql(hi + fallbacks) or "NULL"
+
+    return f"""
+        SELECT {region}, {city}, {month}, {quarter}, {year},
+               COUNT(*),
+               {f"SUM({_numeric(count)})" if count else "COUNT(*)"},
+               {f"SUM({_numeric(value)})" if value else "NULL"},
+               {f"SUM({_numeric(area)})" if area else "NULL"},
+               MIN({_numeric(ppm2_lo)}), MAX({_numeric(ppm2_hi)})
+        FROM {table} WHERE file_id = ?
+        GROUP BY 1, 2, 3, 4, 5
+    """
+
+
+def _merge(cell: list, row: tuple):
+    cell[0] += row[0]
+    for i in (1, 2, 3):
+        if row[i] is not None:
+            cell[i] = row[i] if cell[i] is None else cell[i] + row[i]
+    if row[4] is not None and (cell[4] is None or row[4] < cell[4]):
+        cell[4] = row[4]
+    if row[5] is not None and (cell[5] is None or row[5] > cell[5]):
+        cell[5] = row[5]
+
+
+def file_cells(data_conn: sqlite3.Connection, file_id: int, category: str, table: str) -> dict:
+    """The file's cube cells: {(grain, category, region_id, city_id, period): measures}."""
+    columns = {row[1] for row in data_conn.execute(f"PRAGMA table_info({table})")}
+    sql = _contribution_sql(table, columns)
+    if sql is None:
+        return {}
+    cells: dict[tuple, list] = {}
+    for region, city, month, quarter, year, *measures in data_conn.execute(sql, (file_id,)):
+        if year is None:
+            continue
+        periods = {
+            "month": month,
+            "quarter": f"{year}-Q{quarter}" if quarter else None,
+            "year": year,
+        }
+        places = {
+            "city": (region, city),
+            "region": (region, ALL_ID),
+            "national": (ALL_ID, ALL_ID),
+        }
+        for geo, (r, c) in places.items():
+            for level, period in periods.items():
+                if period is None:
+                    continue
+                key = (f"{geo}:{level}", category, r, c, period)
+                cell = cells.setdefault(key, [0, None, None, None, None, None])
+                _merge(cell, measures)
+    return cells
+
+
+# ── Maintenance ──
+
+
+def add_file(data_conn: sqlite3.Connection, file_id: int, category: str, table: str) -> int:
+    """Add one loaded file's contribution to the cube. Returns cells touched."""
+    cells = file_cells(data_conn, file_id, category, table)
+    data_conn.executemany(
+        f"INSERT INTO cube_parts (file_id, {', '.join(KEY)}, {', '.join(MEASURES)}) "
+        f"VALUES (?, {', '.join('?' * (len(KEY) + len(MEASURES)))})",
+        [(file_id, *key, *cell) for key, cell in cells.items()],
+    )
+    data_conn.executemany(
+        f"""
+        INSERT INTO rollup_cube ({', '.join(KEY)}, {', '.join(MEASURES)})
+        VALUES ({', '.join('?' * (len(KEY) + len(MEASURES)))})
+        ON CONFLICT ({', '.join(KEY)}) DO UPDATE SET
+            row_count = row_count + excluded.row_count,
+            deals = CASE WHEN excluded.deals IS NULL THEN deals
+                         ELSE COALESCE(deals, 0) + excluded.deals END,
+            total_value = CASE WHEN excluded.total_value IS NULL THEN total_value
+                               ELSE COALESCE(total_value, 0) + excluded.total_value END,
+            total_area = CASE WHEN excluded.total_area IS NULL THEN total_area
+                              ELSE COALESCE(total_area, 0) + excluded.total_area END,
+            min_ppm2 = COALESCE(MIN(min_ppm2, excluded.min_ppm2), min_ppm2, excluded.min_ppm2),
+            max_ppm2 = COALESCE(MAX(max_ppm2, excluded.max_ppm2), max_ppm2, excluded.max_ppm2)
+    """,
+        [(*key, *cell) for key, cell in cells.items()],
+    )
+    return len(cells)
+
+
+def subtract_file(data_conn: sqlite3.Connection, file_id: int) -> int:
+    """Take one file's contribution back out of the cube. Returns cells touched."""
+    parts = data_conn.execute(
+        f"SELECT {', '.join(KEY)}, {', '.join(MEASURES[:4])} FROM cube_parts WHERE file_id = ?",
+        (file_id,),
+    ).fetchall()
+    if not parts:
+        return 0
+    data_conn.execute("DELETE FROM cube_parts WHERE file_id = ?", (file_id,))
+    where = " AND ".join(f"{k} = ?" for k in KEY)
+    for *key, row_count, deals, value, area in parts:
+        remaining = data_conn.execute(
+            f"""
+            SELECT COUNT(*), MIN(min_ppm2), MAX(max_ppm2),
+                   COUNT(deals), COUNT(total_value), COUNT(total_area)
+            FROM cube_parts WHERE {where}
+        """,
+            key,
+        ).fetchone()
+        if remaining[0] == 0:
+            data_conn.execute(f"DELETE FROM rollup_cube WHERE {where}", key)
+            continue
+        _, lo, hi, has_deals, has_value, has_area = remaining
+        data_conn.execute(
+            f"""
+            UPDATE rollup_cube SET
+                row_count = row_count - ?,
+                deals = CASE WHEN ? THEN deals - COALESCE(?, 0) END,
+                total_value = CASE WHEN ? THEN total_value - COALESCE(?, 0) END,
+                total_area = CASE WHEN ? THEN total_area - COALESCE(?, 0) END,
+                min_ppm2 = ?, max_ppm2 = ?
+            WHERE {where}
+        """,
+            (row_count, has_deals, deals, has_value, value, has_area, area, lo, hi, *key),
+        )
+    return len(parts)
+
+
+def cube_file_ids(data_conn: sqlite3.Connection) -> set[int]:
+    return {row[0] for row in data_conn.execute("SELECT DISTINCT file_id FROM cube_parts")}
+
+
+# ── Queries ──
+
+
+def query_cube(
+    data_conn: sqlite3.Connection,
+    grain: str,
+    category: str | None = None,
+    region: str | None = None,
+    city: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> list[sqlite3.Row]:
+    """Cells of one grain, optionally filtered; periods compare as text.
+
+    `region` and `city` match any spelling geography.normalize_name folds
+    together. Rows carry ``region``/``city`` names next to the IDs: "all"
+    where rolled up, "" where the source had none.
+    """
+    if grain not in GRAINS:
+        raise ValueError(f"unknown grain {grain!r} (one of {', '.join(GRAINS)})")
+    rid = region_id(region) if region else None
+    if region and rid is None:
+        return []
+    data_conn.row_factory = sqlite3.Row
+    return data_conn.execute(
+        f"""
+        SELECT c.*,
+               CASE c.region_id WHEN {ALL_ID} THEN '{ALL}' ELSE COALESCE(r.name_ar, '') END
+                   AS region,
+               CASE c.city_id WHEN {ALL_ID} THEN '{ALL}' ELSE COALESCE(t.name_ar, '') END
+                   AS city
+        FROM rollup_cube c
+        LEFT JOIN geo_regions r ON r.id = c.region_id
+        LEFT JOIN geo_cities t ON t.id = c.city_id
+        WHERE c.grain = ?1
+          AND (?2 IS NULL OR c.category = ?2)
+          AND (?3 IS NULL OR c.region_id = ?3)
+          AND (?4 IS NULL OR c.city_id IN (SELECT id FROM geo_cities WHERE name_key = ?4))
+          AND (?5 IS NULL OR c.period >= ?5)
+          AND (?6 IS NULL OR c.period <= ?6)
+        ORDER BY c.category, c.period, c.region_id, c.city_id
+    """,
+        (grain, category, rid, normalize_name(city) if city else None, start, end),
+    ).fetchall()
+
+
+def main():
+    from fact_store import DATA_DB_PATH
+
+    parser = argparse.ArgumentParser(description="Query the rollup cube in data.db")
+    parser.add_argument("--db", type=Path, default=DATA_DB_PATH)
+    parser.add_argument("--grain", choices=GRAINS, default="region:quarter")
+    parser.add_argument("--category")
+    parser.add_argument("--region")
+    parser.add_argument("--city")
+    parser.add_argument("--from", dest="start", help="first period (YYYY, YYYY-Qn, YYYY-MM)")
+    parser.add_argument("--to", dest="end", help="last period")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"{args.db} not found — run build_registry.py --load-data first", file=sys.stderr)
+        sys.exit(1)
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    end = args.end + "~" if args.end and len(args.end) == 4 else args.end
+    rows = query_cube(conn, args.grain, args.category, args.region, args.city, args.start, end)
+    for row in rows:
+        place = " / ".join(p for p in (row["region"], row["city"]) if p != ALL) or ALL
+        value = f"{row['total_value']:>18,.0f}" if row["total_value"] is not None else f"{'':>18}"
+        print(
+            f"  {row['category']:<22} {row['period']:<8} {place:<40} "
+            f"{row['row_count']:>9,} {row['deals'] or 0:>12,.0f} {value}"
+        )
+    print(f"{len(rows)} cell(s)")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
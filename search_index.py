@@ -0,0 +1,133 @@
+"""
+Full-text search index over the registry's vocabulary.
+
+Builds an SQLite FTS5 index (trigram tokenizer) over every term the catalog
+knows, so "which files mention الشفا", "which spellings of property_type
+exist" or "which headers look like a price" are index lookups instead of
+``LIKE '%…%'`` scans over ``fields.sample_values`` and ``enum_values``:
+
+    header      Arabic / English column headers (fields.name_ar, name_en)
+    canonical   canonical field names (fields.canonical_name)
+    value       enumerated values (enum_values), per canonical field
+    place       region, city and district names: enum and sample values of
+                place columns, the MOJ-RE-Index pivots (index_values) and
+                the geography dimension (geo_regions)
+
+Each distinct (kind, folded term, field) is one ``search_terms`` row with the
+number of files it appears in; ``search_postings`` maps it to those files.
+Terms are indexed in folded form (geography.fold_arabic: alef/hamza forms,
+ta marbuta, alef maqsura, tashkeel and tatweel), and queries are folded the
+same way, so any spelling matches any substring of three characters or more.
+Results rank by file coverage (see registry_query.RegistryReader.search).
+
+The index is derived entirely from the other registry tables and is rebuilt
+at the end of every build.
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from collections import Counter
+
+from geography import PSEUDO_REGIONS, REGIONS, fold_arabic
+
+KINDS = ("header", "canonical", "value", "place")
+
+# Canonical fields whose values are place names
+PLACE_FIELDS = {"region", "city", "district", "city_district"}
+
+# Shortest query the trigram tokenizer can match; shorter ones scan
+MIN_MATCH_CHARS = 3
+
+
+def fts_query(folded: str) -> str:
+    """An FTS5 MATCH expression for a folded substring: one quoted phrase."""
+    return '"' + folded.replace('"', '""') + '"'
+
+
+def _terms(conn: sqlite3.Connection):
+    """(kind, raw term, field, file_id) for every term occurrence."""
+    for file_id, name_ar, name_en, canonical in conn.execute(
+        "SELECT file_id, name_ar, name_en, canonical_name FROM fields"
+    ):
+        for header in (name_ar, name_en):
+            if header:
+                yield "header", header, canonical, file_id
+        if canonical:
+            yield "canonical", canonical, canonical, file_id
+
+    for file_id, canonical, value in conn.execute("""
+        SELECT f.file_id, f.canonical_name, e.value
+        FROM enum_values e JOIN fields f ON f.id = e.field_id
+        WHERE e.value IS NOT NULL AND e.value != ''
+    """):
+        kind = "place" if canonical in PLACE_FIELDS else "value"
+        yield kind, value, canonical, file_id
+
+    # Place columns too diverse to enumerate still have sample values
+    for file_id, canonical, samples in conn.execute(
+        f"""
+        SELECT file_id, canonical_name, sample_values FROM fields
+        WHERE canonical_name IN ({", ".join("?" * len(PLACE_FIELDS))})
+          AND sample_values IS NOT NULL
+    """,
+        sorted(PLACE_FIELDS),
+    ):
+        try:
+            values = json.loads(samples)
+        except ValueError:
+            continue
+        for value in values:
+            if isinstance(value, str) and value.strip():
+                yield "place", value, canonical, file_id
+
+    for level in ("region", "city", "district"):
+        for file_id, name in conn.execute(
+            f"SELECT DISTINCT file_id, {level} FROM index_values WHERE {level} IS NOT NULL"
+        ):
+            yield "place", name.removeprefix("حي/"), level, file_id
+
+    # Canonical region names and aliases, matching files through file_regions
+    covered = {}
+    for file_id, rid in conn.execute("SELECT file_id, region_id FROM file_regions"):
+        covered.setdefault(rid, []).append(file_id)
+    for rid, ar, en, aliases in REGIONS + PSEUDO_REGIONS:
+        for name in (ar, en, *aliases):
+            for file_id in covered.get(rid, [None]):
+                yield "place", name, "region", file_id
+
+
+def build_search_index(conn: sqlite3.Connection) -> int:
+    """Rebuild search_terms, search_postings and search_fts. Returns terms."""
+    # (kind, folded, field) → spellings seen, and the files they occur in
+    spellings: dict[tuple, Counter] = {}
+    files: dict[tuple, set] = {}
+    for kind, raw, field, file_id in _terms(conn):
+        term = raw.strip()
+        folded = fold_arabic(term)
+        if not folded:
+            continue
+        key = (kind, folded, field)
+        spellings.setdefault(key, Counter())[term] += 1
+        seen_in = files.setdefault(key, set())
+        if file_id is not None:
+            seen_in.add(file_id)
+
+    conn.execute("DELETE FROM search_postings")
+    conn.execute("DELETE FROM search_terms")
+    terms = []
+    postings = []
+    for term_id, (key, seen) in enumerate(spellings.items(), start=1):
+        kind, folded, field = key
+        terms.append(
+            (term_id, kind, seen.most_common(1)[0][0], folded, field, len(files[key]))
+        )
+        postings.extend((term_id, file_id) for file_id in files[key])
+    conn.executemany("INSERT INTO search_terms VALUES (?, ?, ?, ?, ?, ?)", terms)
+    conn.executemany("INSERT INTO search_postings VALUES (?, ?)", postings)
+    conn.execute("INSERT INTO search_fts(search_fts) VALUES ('rebuild')")
+    conn.commit()
+    return len(terms)
@@ -0,0 +1,296 @@
+"""
+Mergeable streaming sketches for the registry builder.
+
+Fixed-memory summaries that can be serialized into registry.db and merged
+later (per category, per canonical field) without rescanning the CSVs:
+HyperLogLog (distinct counts), Misra-Gries (heavy hitters) and KLL
+(quantiles). BloomFilter is a fixed-memory set-membership test for the
+builder's cross-file passes.
+
+No external dependencies — stdlib only.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import random
+import struct
+import zlib
+from collections import Counter
+
+
+def hash64(value: str) -> int:
+    """Stable 64-bit hash of a string (same across processes and runs)."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-value estimator with 2**p one-byte registers."""
+
+    def __init__(self, p: int = 14, registers: bytes | None = None):
+        if not 4 <= p <= 18:
+            raise ValueError(f"HyperLogLog precision out of range: {p}")
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers else bytearray(self.m)
+
+    def update(self, values) -> None:
+        """Add an iterable of strings (duplicates are harmless)."""
+        p = self.p
+        shift = 64 - p
+        low_mask = (1 << shift) - 1
+        regs = self.registers
+        for v in values:
+            x = hash64(v)
+            idx = x >> shift
+            rho = shift - (x & low_mask).bit_length() + 1
+            if rho > regs[idx]:
+                regs[idx] = rho
+
+    def merge(self, other: HyperLogLog) -> None:
+        if other.p != self.p:
+            raise ValueError("cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        m = self.m
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        z = sum(2.0**-r for r in self.registers)
+        e = alpha * m * m / z
+        zeros = self.registers.count(0)
+        # Small-range correction: linear counting
+        if e <= 2.5 * m and zeros:
+            e = m * math.log(m / zeros)
+        return int(round(e))
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate, relative to the true count."""
+        return 1.04 / math.sqrt(self.m)
+
+    def to_bytes(self) -> bytes:
+        # Registers of low-cardinality columns are mostly zero — compress
+        return bytes([self.p]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> HyperLogLog:
+        return cls(p=data[0], registers=zlib.decompress(data[1:]))
+
+
+class MisraGries:
+    """Misra-Gries heavy-hitters summary with at most `k` counters.
+
+    Every stored count underestimates the true count by at most `offset`.
+    While `offset` is 0 the summary is exact: it holds every distinct value
+    seen with its true count.
+    """
+
+    def __init__(self, k: int, counts: dict[str, int] | None = None, offset: int = 0):
+        self.k = k
+        self.counts: Counter = Counter(counts or {})
+        self.offset = offset
+        self.total = sum(self.counts.values()) if counts else 0
+
+    @property
+    def exact(self) -> bool:
+        return self.offset == 0
+
+    def update(self, counts: Counter) -> None:
+        """Add a batch of value counts (e.g. ``Counter(values)``)."""
+        self.total += sum(counts.values())
+        self.counts.update(counts)
+        self._prune()
+
+    def merge(self, other: MisraGries) -> None:
+        self.total += other.total
+        self.offset += other.offset
+        self.counts.update(other.counts)
+        self._prune()
+
+    def _prune(self) -> None:
+        if len(self.counts) <= self.k:
+            return
+        # Subtract the (k+1)-th largest count and keep what stays positive
+        cut = sorted(self.counts.values(), reverse=True)[self.k]
+        self.offset += cut
+        self.counts = Counter(
+            {v: c - cut for v, c in self.counts.items() if c > cut}
+        )
+
+    def most_common(self, n: int | None = None) -> list[tuple[str, int]]:
+        return self.counts.most_common(n)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "k": self.k,
+                "offset": self.offset,
+                "total": self.total,
+                "counts": dict(self.counts),
+            },
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> MisraGries:
+        d = json.loads(data)
+        mg = cls(d["k"], d["counts"], d["offset"])
+        mg.total = d["total"]
+        return mg
+
+
+class KLL:
+    """KLL quantile sketch (Karnin, Lang & Liberty) over floats.
+
+    Level h holds items of weight 2**h. When the sketch outgrows its budget,
+    the lowest full level is sorted and every other item (odd or even, at
+    random) is promoted to the next level, halving its weight's item count.
+    Level capacities shrink geometrically by `c` below the top, so about
+    k / (1 - c) items are retained whatever the stream length, and a rank
+    is off by roughly 1.7 / k of the count. Sketches of the same k merge by
+    concatenating levels and compacting. Below the budget the sketch holds
+    every item and quantiles are exact.
+    """
+
+    C = 2 / 3
+
+    def __init__(self, k: int = 200, levels: list[list[float]] | None = None, count: int = 0):
+        self.k = k
+        self.levels: list[list[float]] = levels or [[]]
+        self.count = count
+        # Fixed seed: the same input builds the same registry
+        self._rng = random.Random(k)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return int(math.ceil(self.C**depth * self.k)) + 1
+
+    def _budget(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _size(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def update(self, values) -> None:
+        """Add an iterable of numbers (NaN is not allowed)."""
+        before = len(self.levels[0])
+        self.levels[0].extend(values)
+        self.count += len(self.levels[0]) - before
+        self._compress()
+
+    def merge(self, other: KLL) -> None:
+        if other.k != self.k:
+            raise ValueError("cannot merge KLL sketches of different k")
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in zip(self.levels, other.levels):
+            level.extend(items)
+        self.count += other.count
+        self._compress()
+
+    def _compress(self) -> None:
+        while self._size() >= self._budget():
+            for h, level in enumerate(self.levels):
+                if len(level) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append([])
+                    level.sort()
+                    odd = len(level) % 2
+                    start = odd + (self._rng.random() < 0.5)
+                    self.levels[h + 1].extend(level[start::2])
+                    self.levels[h] = level[:odd]
+                    break
+
+    def quantiles(self, qs) -> list[float | None]:
+        """Values at ranks q·count for each q in [0, 1] (None if empty)."""
+        weighted = sorted(
+            (v, 1 << h) for h, level in enumerate(self.levels) for v in level
+        )
+        total = sum(w for _, w in weighted)
+        out = []
+        for q in qs:
+            if not weighted:
+                out.append(None)
+                continue
+            target = q * total
+            seen = 0
+            value = weighted[-1][0]
+            for v, w in weighted:
+                seen += w
+                if seen >= target:
+                    value = v
+                    break
+            out.append(value)
+        return out
+
+    def to_bytes(self) -> bytes:
+        header = struct.pack("<IQI", self.k, self.count, len(self.levels))
+        sizes = struct.pack(f"<{len(self.levels)}I", *map(len, self.levels))
+        items = [v for level in self.levels for v in level]
+        return header + zlib.compress(sizes + struct.pack(f"<{len(items)}d", *items))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> KLL:
+        k, count, n_levels = struct.unpack_from("<IQI", data)
+        body = zlib.decompress(data[struct.calcsize("<IQI"):])
+        sizes = struct.unpack_from(f"<{n_levels}I", body)
+        items = struct.unpack_from(f"<{sum(sizes)}d", body, 4 * n_levels)
+        levels = []
+        at = 0
+        for size in sizes:
+            levels.append(list(items[at : at + size]))
+            at += size
+        return cls(k, levels, count)
+
+
+class BloomFilter:
+    """Partitioned Bloom filter over strings.
+
+    The bit array is split into `k` equal slices and each value sets one bit
+    per slice (from blake2b double hashing), which keeps the false-positive
+    rate at `error_rate` for up to `capacity` values. No false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.k = max(1, math.ceil(math.log2(1 / error_rate)))
+        self.slice_bits = max(
+            8, math.ceil(capacity * math.log(1 / error_rate) / (self.k * math.log(2) ** 2))
+        )
+        self.bits = bytearray((self.k * self.slice_bits + 7) // 8)
+
+    def _hashes(self, value: str) -> tuple[int, int]:
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, value: str) -> bool:
+        """Add `value`; return True if it was (probably) present already."""
+        h1, h2 = self._hashes(value)
+        bits = self.bits
+        n = self.slice_bits
+        present = True
+        for offset in range(0, self.k * n, n):
+            pos = offset + h1 % n
+            h1 += h2
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        return present
+
+    def __contains__(self, value: str) -> bool:
+        h1, h2 = self._hashes(value)
+        bits = self.bits
+        n = self.slice_bits
+        for offset in range(0, self.k * n, n):
+            pos = offset + h1 % n
+            h1 += h2
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True